@@ -8,13 +8,15 @@ import FreeCAD
 import Part
 import numpy as np
 from freecad.Curves import nurbs_tools
+from freecad.Curves import logger
 #  from math import pi
 
-DEBUG = True
+log = logger.get_logger(__name__)
 
 
 def debug(o):
-    if not DEBUG:
+    """Dumps o, if debug messages are enabled for this module"""
+    if not log.enabled(logger.DEBUG):
         return()
     if isinstance(o, Part.BSplineCurve):
         FreeCAD.Console.PrintWarning("\nBSplineCurve\n")
@@ -37,7 +39,7 @@ def debug(o):
             FreeCAD.Console.PrintError("Failed to compute vIso curve\n")
         FreeCAD.Console.PrintWarning("************\n")
     else:
-        FreeCAD.Console.PrintMessage("{}\n".format(str(o)))
+        log.debug(o)
 
 
 #  TODO is this the good square_distance function ???
@@ -133,10 +135,10 @@ class BSplineApproxInterp(object):
         """Switch point from approximation to interpolation
         If withKink, also set it as Kink"""
         if pointIndex not in self.indexOfApproximated:
-            debug("Invalid index in CTiglBSplineApproxInterp::InterpolatePoint")
-            debug("{} is not in {}".format(pointIndex, self.indexOfApproximated))
+            log.debug("Invalid index in CTiglBSplineApproxInterp::InterpolatePoint")
+            log.debug("{} is not in {}", pointIndex, self.indexOfApproximated)
         else:
-            debug("Successfully switched point # {} from approx to interp".format(pointIndex))
+            log.debug("Successfully switched point # {} from approx to interp", pointIndex)
             self.indexOfApproximated.remove(pointIndex)
             self.indexOfInterpolated.append(int(pointIndex))
         if withKink:
@@ -161,14 +163,14 @@ class BSplineApproxInterp(object):
         result, error = self.python_solve(parms, knots, mults)  # TODO occKnots, occMults ???? See above
         old_error = error * 2
 
-        debug("FitCurveOptimal iteration # {}".format(iteration))
-        debug("error = {}".format(error))
+        log.debug("FitCurveOptimal iteration # {}", iteration)
+        log.debug("error = {}", error)
         while ((error > 0) and ((old_error - error) / max(error, 1e-6) > 1e-6) and (iteration < maxIter)):
-            debug("FitCurveOptimal iteration # {}".format(iteration))
+            log.debug("FitCurveOptimal iteration # {}", iteration)
             old_error = error
             self.optimizeParameters(result, parms)
             result, error = self.python_solve(parms, knots, mults)
-            debug("error = {}".format(error))
+            log.debug("error = {}", error)
             iteration += 1
         return result, error
 
@@ -422,7 +424,7 @@ class BSplineApproxInterp(object):
             if self.isClosed():
                 continuity_entries = self.getContinuityMatrix(nCtrPnts, n_continuityConditions, params, flatKnots)
                 continuity_entriest = continuity_entries.T
-                debug("continuity_entries : {}".format(str(continuity_entries.shape)))
+                log.debug("continuity_entries : {}", continuity_entries.shape)
                 for i in range(n_continuityConditions):
                     for j in range(nCtrPnts):
                         lhs[nCtrPnts + n_intpolated + i][j] = continuity_entries[i][j]
@@ -453,16 +455,16 @@ class BSplineApproxInterp(object):
             cp_y = np.linalg.solve(lhs, rhsy)
             cp_z = np.linalg.solve(lhs, rhsz)
         except np.linalg.LinAlgError:
-            debug("Numpy linalg solver failed\n")
+            log.warning("Numpy linalg solver failed")
             return None, None
         poles = [FreeCAD.Vector(cp_x[i], cp_y[i], cp_z[i]) for i in range(nCtrPnts)]
 
         result = Part.BSplineCurve()
-        debug("{} poles : {}".format(len(poles), poles))
-        debug("{} knots : {}".format(len(knots), knots))
-        debug("{} mults : {}".format(len(mults), mults))
-        debug("degree : {}".format(self.degree))
-        debug("conti : {}".format(self.C2Continuous))
+        log.debug("{} poles : {}", len(poles), poles)
+        log.debug("{} knots : {}", len(knots), knots)
+        log.debug("{} mults : {}", len(mults), mults)
+        log.debug("degree : {}", self.degree)
+        log.debug("conti : {}", self.C2Continuous)
         result.buildFromPolesMultsKnots(poles, mults, knots, False, self.degree)
 
         #  compute error
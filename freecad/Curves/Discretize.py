@@ -10,6 +10,7 @@ import FreeCAD
 import FreeCADGui
 import Part
 from freecad.Curves import _utils
+from freecad.Curves import fingerprint
 from freecad.Curves import ICONPATH
 from freecad.Curves.nurbs_tools import knotSeqNormalize
 
@@ -113,6 +114,7 @@ class Discretization:
 
         return True
 
+    @fingerprint.cached_execute(outputs=("Points", "NormalizedParameters"))
     def execute(self, obj):
         debug("* Discretization : execute *")
         if self.buildPoints( obj):
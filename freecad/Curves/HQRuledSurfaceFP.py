@@ -18,6 +18,7 @@ from freecad.Curves import reparametrize as rp
 
 from freecad.Curves import _utils
 from freecad.Curves import ICONPATH
+from freecad.Curves import draft_mode
 
 TOOL_ICON = os.path.join( ICONPATH, 'ruled_surface.svg')
 #debug = _utils.debug
@@ -74,6 +75,8 @@ Sketcher::PropertyConstraintList
 
 class HQ_Ruled_SurfaceFP:
     """Creates a ..."""
+    supports_draft = True
+
     def __init__(self, obj, sources):
         """Add the properties"""
         obj.addProperty("App::PropertyLinkList",    "SourceObjects", "HQ_Ruled_Surface", "SourceObjects")
@@ -116,7 +119,7 @@ class HQ_Ruled_SurfaceFP:
 
     def execute(self, obj):
         c1, c2 = self.get_curves(obj)
-        nc1, nc2 = rp.reparametrize(c1, c2, num=obj.Samples, smooth_start=obj.SmoothingFactorStart, smooth_end=obj.SmoothingFactorEnd, method=obj.Method )
+        nc1, nc2 = rp.reparametrize(c1, c2, num=draft_mode.samples(obj, obj.Samples), smooth_start=obj.SmoothingFactorStart, smooth_end=obj.SmoothingFactorEnd, method=obj.Method )
         #com = Part.Compound([nc1.toShape(), nc2.toShape()])
         rs = Part.makeRuledSurface(nc1.toShape(), nc2.toShape())
         if isinstance(rs, Part.Face) and rs.isValid():
@@ -10,6 +10,7 @@ if sys.version_info.major >= 3:
     from importlib import reload
 
 import os
+import numpy as np
 import FreeCAD
 import FreeCADGui
 import Part
@@ -79,6 +80,27 @@ def vadd(v1,v2):
 def vmul(v1,f):
     return vec2(v1.x*f, v1.y*f)
 
+# Cell size of the edge lookup grid. Larger than the is_same tolerance,
+# so that equal curves are always in the same or in neighbouring cells.
+KEY_CELL = 1e-4
+
+def curve_cell(e):
+    """Grid cell of the first pole of the underlying BSpline curve of an edge.
+    Trimmed pieces of an edge keep the same curve, so they get the same cell.
+    Returns None if the curve is not a BSpline"""
+    c = e.Curve
+    if not isinstance(c, Part.BSplineCurve):
+        return None
+    p = c.getPole(1)
+    return tuple(int(np.floor(x / KEY_CELL)) for x in (p.x, p.y, p.z))
+
+def neighbour_cells(cell):
+    """The cell and its 26 neighbours"""
+    for i in (-1, 0, 1):
+        for j in (-1, 0, 1):
+            for k in (-1, 0, 1):
+                yield (cell[0] + i, cell[1] + j, cell[2] + k)
+
 class HelicalSweep:
     """Sweep a profile along an helical path"""
     def __init__(self):
@@ -88,6 +110,7 @@ class HelicalSweep:
         self.cylinder = Part.Cylinder()
         self.cylinder.transform(FreeCAD.Placement(FreeCAD.Vector(),FreeCAD.Vector(1,0,0),-90).toMatrix())
         self.rational_approx = True
+        self.analytic = False
         self.check_splines = False
         self.max_radius = 0
         self._placement = FreeCAD.Placement()
@@ -109,12 +132,59 @@ class HelicalSweep:
         vector_full_turns = vmul(vector_one_turn, nb_turns)
         lineseg = Part.Geom2d.Line2dSegment(sp, vadd(sp,vector_full_turns))
         return lineseg.toShape(self.cylinder)
+    def reference_helix(self, radius, extend=False):
+        """Helix BSpline of given radius, in the local frame of a Z axis cylinder.
+        The helix of radius r and height offset h is obtained by
+        scaling the X and Y coordinates of the poles by r/radius
+        and translating the Z coordinates by h."""
+        offset = 0
+        nb_turns = self.nb_of_turns
+        if extend:
+            offset = -self.lead*2
+            nb_turns = self.nb_of_turns + 4
+        cyl = Part.Cylinder()
+        cyl.Radius = radius
+        sp = vec2(0, offset)
+        lineseg = Part.Geom2d.Line2dSegment(sp, vadd(sp, vmul(vec2(2*pi,self.lead), nb_turns)))
+        return lineseg.toShape(cyl).Curve
+    def sweep_edge_analytic(self, bs, extend=False):
+        """Build the helical surface pole grid of BSpline curve bs directly from a reference helix"""
+        inv = self._placement.inverse()
+        local = np.array([inv.multVec(p) for p in bs.getPoles()])
+        radii = local[:,0]
+        heights = local[:,1]
+        rmax = max(abs(radii).max(), 1e-3)
+        self.max_radius = max(self.max_radius, radii.max())
+        ref = self.reference_helix(rmax, extend)
+        ref_poles = np.array(ref.getPoles())
+        scale = radii / rmax
+        grid = np.empty((len(local), len(ref_poles), 3))
+        grid[:,:,0] = np.outer(scale, ref_poles[:,0])
+        grid[:,:,1] = np.outer(scale, ref_poles[:,1])
+        grid[:,:,2] = ref_poles[:,2][np.newaxis,:] + heights[:,np.newaxis]
+        weights = np.outer(bs.getWeights(), ref.getWeights())
+        poles = [[FreeCAD.Vector(*p) for p in row] for row in grid.tolist()]
+        bss = Part.BSplineSurface()
+        bss.buildFromPolesMultsKnots(poles,
+                                        bs.getMultiplicities(),ref.getMultiplicities(),
+                                        bs.getKnots(), ref.getKnots(),
+                                        bs.isPeriodic(), ref.isPeriodic(),
+                                        bs.Degree, ref.Degree,
+                                        weights.tolist())
+        bss.transform(self.cylinder_matrix())
+        return bss.toShape()
+    def cylinder_matrix(self):
+        """Matrix that maps the Z axis cylinder to the sweep cylinder"""
+        rot = FreeCAD.Placement(FreeCAD.Vector(),FreeCAD.Vector(1,0,0),-90)
+        return self._placement.multiply(rot).toMatrix()
     def sweep_edge(self, e, extend=False):
         if self.rational_approx:
             approx = e.toNurbs().Edges[0]
         else:
             approx = e.Curve.toBSpline(e.FirstParameter,e.LastParameter).toShape()
         bs = approx.Curve
+        if self.analytic:
+            return self.sweep_edge_analytic(bs, extend)
         #self.cylinder.transform(self.placement.toMatrix())
         poles = []
         weights = []
@@ -146,14 +216,21 @@ class HelicalSweep:
             cyl.Placement = self._placement.multiply(FreeCAD.Placement(FreeCAD.Vector(),FreeCAD.Vector(1,0,0),-90))
             common = cyl.common(shell)
             cut_faces = common.Faces
+            shell_edges = dict()
+            for e2 in shell.Edges:
+                cell = curve_cell(e2)
+                if cell is not None:
+                    shell_edges.setdefault(cell, []).append(e2)
             new_edges = []
             for e1 in common.Edges:
                 found = False
-                for e2 in shell.Edges:
+                cell = curve_cell(e1)
+                candidates = [] if cell is None else [e2 for c in neighbour_cells(cell) for e2 in shell_edges.get(c, [])]
+                for e2 in candidates:
                     if nurbs_tools.is_same(e1.Curve, e2.Curve, tol=1e-7, full=False):
                         found = True
                         #print("found similar edges")
-                        continue
+                        break
                 if not found:
                     new_edges.append(e1)
             #print(len(Part.sortEdges(new_edges)))
@@ -181,12 +258,17 @@ class HelicalSweepFP:
         obj.addProperty("App::PropertyFloat", "Lead", "Settings", "Thread lead (-1 for auto)").Lead = -1
         obj.addProperty("App::PropertyBool", "Rational", "Settings", "Allow rational bsplines").Rational = False
         obj.addProperty("App::PropertyBool", "Solid", "Settings", "Create a solid shape").Solid = False
+        obj.addProperty("App::PropertyBool", "Analytic", "Settings", "Compute the surface poles directly from a reference helix").Analytic = True
         obj.Proxy = self
 
     def execute(self, obj):
         edges =  obj.Profile.Shape.Edges
         hs = HelicalSweep()
         hs.rational_approx = obj.Rational
+        if hasattr(obj, "Analytic"):
+            hs.analytic = obj.Analytic
+        else:
+            hs.analytic = False
         gpl = obj.Profile.getGlobalPlacement()
         hs.set_placement(gpl)
         # 3 priorities to get Lead value
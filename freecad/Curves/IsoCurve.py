@@ -142,25 +142,21 @@ class IsoCurve:
                 selfobj.setEditorMode("Orientation", 2)
                 selfobj.setEditorMode("NumberU", 0)
                 selfobj.setEditorMode("NumberV", 0)
-            self.execute(selfobj)
         if prop == 'Parameter':
             if  selfobj.Parameter  < self.p0:
                 selfobj.Parameter  = self.p0
             elif selfobj.Parameter  > self.p1:
                 selfobj.Parameter  = self.p1
-            self.execute(selfobj)
         if prop == 'NumberU':
             if  selfobj.NumberU  < 0:
                 selfobj.NumberU  = 0
             elif selfobj.NumberU  > 1000:
                 selfobj.NumberU  = 1000
-            self.execute(selfobj)
         if prop == 'NumberV':
             if  selfobj.NumberV  < 0:
                 selfobj.NumberV  = 0
             elif selfobj.NumberV  > 1000:
                 selfobj.NumberV  = 1000
-            self.execute(selfobj)
         if prop == 'Orientation':
             self.getBounds(selfobj)
             if selfobj.Orientation == "U":
@@ -169,7 +165,6 @@ class IsoCurve:
             else:
                 self.p0 = self.v0
                 self.p1 = self.v1
-            self.execute(selfobj)
 
 class ViewProviderIsoCurve:
     def __init__(self,vobj):
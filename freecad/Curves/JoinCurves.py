@@ -12,6 +12,8 @@ import Part
 from freecad.Curves import _utils
 from freecad.Curves import ICONPATH
 from freecad.Curves import approximate_extension
+from freecad.Curves import join_engine
+from freecad.Curves import continuity
 
 TOOL_ICON = os.path.join(ICONPATH, 'joincurve.svg')
 # debug = _utils.debug
@@ -86,6 +88,7 @@ class join:
         obj.addProperty("App::PropertyBool", "ForceContact", "Join", "Force connection of edges").ForceContact = True
         obj.addProperty("App::PropertyBool", "ForceClosed", "Join", "Force closed curve").ForceClosed = False
         obj.addProperty("App::PropertyInteger", "StartOffset", "Join", "Set the start point of closed curve").StartOffset = 0
+        obj.addProperty("App::PropertyBool", "Chaining", "Join", "Chain the edges by their endpoints and join each chain in a single pass").Chaining = True
         obj.Proxy = self
 
     def onChanged(self, fp, prop):
@@ -103,20 +106,8 @@ class join:
                     res.append(link[0].getSubObject(ss))
         return res
 
-    def execute(self, obj):
-        edges = self.getEdges(obj)
-        tmp = list()
-        for e in edges:
-            tmp += e.toNurbs().Edges
-        curves = list()
-        for e in tmp:
-            c = e.Curve
-            if not isinstance(e.Curve, Part.BSplineCurve):
-                c = e.Curve.toBSpline()
-            c.segment(e.FirstParameter, e.LastParameter)
-            curves.append(c)
-        debug("Edges : \n{}".format(str(curves)))
-
+    def sequentialJoin(self, curves, obj):
+        "Joins the curves one by one, in the input order"
         c0 = curves[0].copy()
         outcurves = []
         for n, c in enumerate(curves[1:]):
@@ -144,6 +135,42 @@ class join:
                         c0 = c.copy()
                         debug("Failed to smooth edge #{}".format(curves[1:].index(c) + 2))
         outcurves.append(c0)
+        return outcurves
+
+    def bridgeGaps(self, curves, tol):
+        "Connects the chains that are separated by a gap larger than tol"
+        c0 = curves[0]
+        outcurves = []
+        for c in curves[1:]:
+            d = min([p.distanceToPoint(q) for p in (c0.StartPoint, c0.EndPoint) for q in (c.StartPoint, c.EndPoint)])
+            if d > tol and forceJoin(c0, c):
+                c0 = continuity.repair(c0, continuity.tolerance_angle(tol), tol=tol)[0]
+            else:
+                outcurves.append(c0)
+                c0 = c
+        outcurves.append(c0)
+        return outcurves
+
+    def execute(self, obj):
+        edges = self.getEdges(obj)
+        tmp = list()
+        for e in edges:
+            tmp += e.toNurbs().Edges
+        curves = list()
+        for e in tmp:
+            c = e.Curve
+            if not isinstance(e.Curve, Part.BSplineCurve):
+                c = e.Curve.toBSpline()
+            c.segment(e.FirstParameter, e.LastParameter)
+            curves.append(c)
+        debug("Edges : \n{}".format(str(curves)))
+
+        if hasattr(obj, "Chaining") and obj.Chaining:
+            outcurves = join_engine.join_curves(curves, obj.Tolerance, obj.CornerBreak)
+            if obj.ForceContact:
+                outcurves = self.bridgeGaps(outcurves, obj.Tolerance)
+        else:
+            outcurves = self.sequentialJoin(curves, obj)
         if obj.ForceClosed:
             forceClosed(outcurves)
         if len(outcurves) == 1 and outcurves[0].isClosed():
@@ -5,19 +5,15 @@ __author__ = "Christophe Grellier (Chris_G)"
 __license__ = "LGPL 2.1"
 __doc__ = """Outline curve of a shape"""
 
-import sys
-if sys.version_info.major >= 3:
-    from importlib import reload
-
+import os
 import FreeCAD
 import FreeCADGui
 import Part
-import _utils
-import approximate_extension
+from freecad.Curves import approximate_extension
+from freecad.Curves import outline
+from freecad.Curves import ICONPATH
 
-TOOL_ICON = _utils.iconsPath() + 'icon.svg'
-#debug = _utils.debug
-#debug = _utils.doNothing
+TOOL_ICON = os.path.join(ICONPATH, 'icon.svg')
 
 props = """
 App::PropertyBool
@@ -75,29 +71,18 @@ class OutlineFP:
         obj.addProperty("App::PropertyLink", "Source", "Outline", "Source object").Source = s
         obj.addProperty("App::PropertyVector", "Direction", "Outline", "Direction Vector").Direction = FreeCAD.Vector(0,0,1)
         obj.addProperty("App::PropertyInteger", "RadialSamples", "Outline", "Number of samples around object").RadialSamples = 360
+        obj.addProperty("App::PropertyBool", "Parallel", "Outline", "Process the radial samples in worker processes").Parallel = False
+        obj.addProperty("App::PropertyInteger", "Processes", "Outline", "Number of worker processes (0 = number of cores)").Processes = 0
         obj.Proxy = self
 
     def execute(self, obj):
         o = obj.Source
-        base = o.Shape.BoundBox.Center
-        dl = o.Shape.BoundBox.DiagonalLength
-        cyl = Part.makeCylinder(dl, dl*2, base-obj.Direction*dl, obj.Direction).Face1
-
-        uf,ul,vf,vl=cyl.ParameterRange
-        pts = list()
-        for i in range(obj.RadialSamples):
-            u = uf + (float(i)/(obj.RadialSamples-1))*(ul-uf)
-            e = cyl.Surface.uIso(u).toShape()
-            #best = 1e50
-            #good_pt = None
-            d,pt,info = o.Shape.distToShape(e)
-            if len(pt) > 1:
-                debug("multi pt %s"%str(pt))
-                #good_point = pt[0][0]
-            for i,inf in enumerate(info):
-                if inf[0] in (b"Face","Face"):
-                    pts.append(pt[i][0])
-
+        parallel_mode = False
+        processes = None
+        if hasattr(obj, "Parallel"):
+            parallel_mode = obj.Parallel
+            processes = obj.Processes
+        pts = outline.outline_points(o.Shape, obj.Direction, obj.RadialSamples, parallel_mode, processes)
 
         if hasattr(obj,"ExtensionProxy"):
             if obj.Active:
@@ -108,6 +93,9 @@ class OutlineFP:
         obj.Shape = bs.toShape()
 
     def onChanged(self, fp, prop):
+        if prop == "Processes":
+            if fp.Processes < 0:
+                fp.Processes = 0
         if hasattr(fp,"ExtensionProxy"):
             fp.ExtensionProxy.onChanged(fp, prop)
         #return(False)
@@ -11,8 +11,9 @@ import FreeCAD
 import FreeCADGui
 import Part
 
-from freecad.Curves import nurbs_tools
+from freecad.Curves import reflect_lines
 from freecad.Curves import _utils
+from freecad.Curves import fingerprint
 from freecad.Curves import ICONPATH
 
 TOOL_ICON = os.path.join(ICONPATH, 'reflectLines.svg')
@@ -38,6 +39,14 @@ class ReflectLinesFP:
                         "CleaningOptions", "Number of edge samples").Samples = 10
         obj.addProperty("App::PropertyQuantity", "Tolerance",
                         "CleaningOptions", "Tolerance for duplicate detection").Tolerance = 1e-3
+        obj.addProperty("App::PropertyVectorList", "ViewDirections",
+                        "Batch", "View directions of the batch mode. Leave empty for a single view")
+        obj.addProperty("App::PropertyInteger", "Frame",
+                        "Batch", "Displayed view of the batch (-1 = all views)").Frame = -1
+        obj.addProperty("App::PropertyInteger", "Processes",
+                        "Batch", "Number of worker processes (0 = number of cores)").Processes = 0
+        obj.addProperty("App::PropertyFile", "CacheFile",
+                        "Batch", "File where the reflect lines of the batch views are written")
         # obj.Samples = [10,3,999,1]
         obj.ViewPos = FreeCAD.Vector(0, 0, 0)
         obj.ViewDir = FreeCAD.Vector(0, 0, 1)
@@ -50,27 +59,54 @@ class ReflectLinesFP:
             obj.Source = src
         obj.Proxy = self
 
+    def __getstate__(self):
+        return None
+
+    def __setstate__(self, state):
+        return None
+
+    @fingerprint.cached_execute()
     def execute(self, obj):
         sh = None
-        rl = False
         if len(obj.IndivFaces) > 0:
             faces = _utils.getShape(obj, "IndivFaces", "Face")
             sh = Part.Compound(faces)
         elif hasattr(obj.Source, "Shape"):
             sh = obj.Source.Shape
-        try:
-            rl = sh.reflectLines(obj.ViewDir, obj.ViewPos, obj.UpDir)
-        except AttributeError:
-            pass
-        if rl and obj.ShapeCleaning:
-            edges = rl.Edges
-            rl = Part.Compound(nurbs_tools.remove_subsegments(edges, num=obj.Samples, tol=obj.Tolerance))
+        if sh is None:
+            return
+        if hasattr(obj, "ViewDirections") and obj.ViewDirections:
+            self.execute_batch(obj, sh)
+            return
+        rl = reflect_lines.reflect_lines(sh, obj.ViewDir, obj.ViewPos, obj.UpDir,
+                                         obj.ShapeCleaning, obj.Samples, obj.Tolerance.Value)
         if rl:
             obj.Shape = rl
 
+    def execute_batch(self, obj, sh):
+        """Computes the reflect lines of all the view directions.
+        The line sets are kept, so that changing Frame only changes the displayed view."""
+        key = fingerprint.compute(obj, outputs=("Frame",))
+        if not key == getattr(self, "batch_key", None):
+            self.batch = reflect_lines.batch_reflect_lines(sh, obj.ViewDirections, obj.ViewPos, obj.UpDir,
+                                                           obj.ShapeCleaning, obj.Samples, obj.Tolerance.Value,
+                                                           obj.Processes)
+            self.batch_key = key
+            if obj.CacheFile:
+                reflect_lines.write_cache(obj.CacheFile, obj.ViewDirections, self.batch)
+        views = [Part.Compound([]) if rl is None else rl for rl in self.batch]
+        if 0 <= obj.Frame < len(views):
+            obj.Shape = views[obj.Frame]
+        else:
+            obj.Shape = Part.Compound(views)
+
     def onChanged(self, obj, prop):
-        if prop in ("Source", "ViewPos", "ViewDir", "UpDir"):
-            self.execute(obj)
+        if prop == "Processes":
+            if obj.Processes < 0:
+                obj.Processes = 0
+        if prop == "Frame":
+            if obj.Frame < -1:
+                obj.Frame = -1
         if prop == "ShapeCleaning":
             if obj.ShapeCleaning:
                 obj.setEditorMode("Samples", 0)
@@ -138,6 +174,7 @@ class ReflectLinesCommand:
                 fp.ViewPos = pos
                 fp.ViewDir = vdir
                 fp.UpDir = udir
+            FreeCAD.ActiveDocument.recompute()
 
     def IsActive(self):
         if FreeCAD.ActiveDocument:
@@ -12,6 +12,7 @@ import Part
 import Sketcher
 from freecad.Curves import _utils
 from freecad.Curves import ICONPATH
+from freecad.Curves import draft_mode
 
 TOOL_ICON = os.path.join(ICONPATH, 'sketch_surf.svg')
 
@@ -133,6 +134,8 @@ def print_tolerance(shape):
 
 class sketchOnSurface:
     "This feature object maps a sketch on a surface"
+    supports_draft = True
+
     def __init__(self, obj):
         obj.addProperty("App::PropertyLink", "Sketch", "SketchOnSurface",
                         "Input Sketch")
@@ -282,16 +285,17 @@ class sketchOnSurface:
         if (obj.Offset == 0):
             shapes_1 = self.map_shapelist(imput_shapes, quad, face, obj.FillFaces)
         else:
-            f1 = face.makeOffsetShape(obj.Offset, 1e-7)
+            f1 = face.makeOffsetShape(obj.Offset, draft_mode.tolerance(obj, 1e-7))
             shapes_1 = self.map_shapelist(imput_shapes, quad, f1.Face1, obj.FillFaces)
         if (obj.Thickness == 0):
             if shapes_1:
                 obj.Shape = Part.Compound(shapes_1)
             return
         else:
-            f2 = face.makeOffsetShape(obj.Offset+obj.Thickness, 1e-7)
+            f2 = face.makeOffsetShape(obj.Offset+obj.Thickness, draft_mode.tolerance(obj, 1e-7))
             shapes_2 = self.map_shapelist(imput_shapes, quad, f2.Face1, obj.FillFaces)
-            if not obj.FillExtrusion:
+            # in draft mode, the solids are not built
+            if (not obj.FillExtrusion) or draft_mode.is_draft(obj):
                 if shapes_1 or shapes_2:
                     obj.Shape = Part.Compound(shapes_1 + shapes_2)
                     return
@@ -7,10 +7,13 @@ from pivy import coin
 from freecad.Curves import libS2R
 from freecad.Curves import CoinNodes
 from freecad.Curves import ICONPATH
+from freecad.Curves import logger
+from freecad.Curves import draft_mode
 
 TOOL_ICON = os.path.join(ICONPATH, 'sw2r.svg')
 fac = 1.0
 DEBUG = False
+log = logger.get_logger(__name__)
 
 
 def debug(string):
@@ -20,6 +23,8 @@ def debug(string):
 
 
 class sweep2rails:
+    supports_draft = True
+
     def __init__(self, obj):
         obj.Proxy = self
         obj.addProperty("App::PropertyLink",       "Birail",         "Base",   "Birail object")
@@ -43,8 +48,8 @@ class sweep2rails:
                 s2r = libS2R.SweepOn2Rails()
                 s2r.parametrization = obj.Parametrization
                 s2r.extend = obj.Extend
-                s2r.profileSamples = obj.ProfileSamples
-                s2r.railSamples = obj.RailSamples
+                s2r.profileSamples = draft_mode.samples(obj, obj.ProfileSamples)
+                s2r.railSamples = draft_mode.samples(obj, obj.RailSamples)
                 s2r.setRails(obj.Birail.Shape.Face1)
                 s2r.setProfiles(self.setProfiles(obj.Profiles))  # ((e1,e2,e3))
                 s2r.build()
@@ -57,7 +62,7 @@ class sweep2rails:
                 return s2r
 
     def onChanged(self, fp, prop):
-        FreeCAD.Console.PrintMessage('{} changed\n'.format(prop))
+        log.debug('{} changed', prop)
         if prop == "Birail":
             pass
         if prop == "Profiles":
@@ -12,6 +12,7 @@ from freecad.Curves import ICONPATH
 from PySide import QtGui, QtCore
 from pivy import coin
 from freecad.Curves.Gui import Zebra_Gui
+from freecad.Curves import zebra_texture
 
 TOOL_ICON =  os.path.join( ICONPATH, 'zebra.svg')
 
@@ -45,57 +46,41 @@ class zebra(QtGui.QWidget):
         self.ui.horizontalSlider_3.valueChanged[int].connect(self.changeSlide_3)
         self.ui.horizontalSlider_3.setValue(self.Rotation)
 
+        self.isophoteCheck = QtGui.QCheckBox("Isophotes")
+        self.isophoteCheck.setToolTip("Shader-free isophote stripes computed from the mesh normals")
+        self.ui.verticalLayout.insertWidget(6, self.isophoteCheck)
+        self.isophoteCheck.stateChanged.connect(self.changeMode)
+
         self.ui.pushButton.clicked.connect(self.quit)
 
         #self.zebraWidget.show()
 
     def coinSetUp(self):
-        #print "coinSetUp"
-        self.TexW = 10
-        self.TexH = 100
-
-        self.sg = FreeCADGui.ActiveDocument.ActiveView.getSceneGraph()
-        #print str( FreeCADGui.ActiveDocument.Document.Label )
-        #print str( self.sg )
-        
-
-        self.stripes = coin.SoTexture2()
-        self.sg.insertChild(self.stripes,0)
-        self.stripes.filename = ""
-
-        self.string = '\xff' * 50 + '\x00' * self.StripeWidth
-        self.chars = self.string * self.TexW * self.TexH
-
-        self.img = coin.SoSFImage()
-        self.img.setValue(coin.SbVec2s(len(self.string) * self.TexW ,self.TexH), 1, self.chars);
-
-        self.stripes.image = self.img
-
-        # **** here we can transform the texture
-        self.transTexture = coin.SoTexture2Transform()
-        self.sg.insertChild(self.transTexture,1)
-        #transTexture.translation.setValue(1, 1)
-        self.transTexture.scaleFactor.setValue(self.Scale, self.Scale)
-        self.transTexture.rotation.setValue(1. * self.Rotation / 100)
-        #transTexture.center.setValue(0, .5)
-
-        self.tc = coin.SoTextureCoordinateEnvironment()
-        self.sg.insertChild(self.tc,2)
+        self.texture = zebra_texture.ZebraTexture(self.StripeWidth)
+        self.texture.set_scale(self.Scale)
+        self.texture.set_rotation(1. * self.Rotation / 100)
+        self.texture.attach(FreeCADGui.ActiveDocument)
+        self.isophotes = zebra_texture.IsophoteDisplay(FreeCADGui.ActiveDocument)
 
     def coinQuit(self):
-        #print "coinQuit"
-        self.sg.removeChild(self.tc)
-        self.sg.removeChild(self.transTexture)
-        self.sg.removeChild(self.stripes)
+        self.texture.detach()
+        self.isophotes.detach()
+
+    def changeMode(self, state):
+        if state:
+            self.texture.detach()
+            self.isophotes.view_direction()
+            self.isophotes.attach()
+        else:
+            self.isophotes.detach()
+            self.texture.attach(FreeCADGui.ActiveDocument)
 
     def changeSlide_1(self, value):
         #print "Stripes width : "+str(value)
         self.StripeWidth = value
-        self.string = '\xff' * 50 + '\x00' * self.StripeWidth
-        self.chars = self.string * self.TexW * self.TexH
-        self.img.setValue(coin.SbVec2s(0 ,0), 1, '');
-        self.img.setValue(coin.SbVec2s(len(self.string) * self.TexW ,self.TexH), 1, self.chars);
-        self.stripes.image = self.img
+        self.texture.set_width(value)
+        self.isophotes.ratio = 50. / (50 + value)
+        self.isophotes.update()
 
     def changeSlide_2(self, value):
         #print "scale : "+str(value)
@@ -104,12 +89,14 @@ class zebra(QtGui.QWidget):
             scale = 1. * self.Scale / 20
         else:
             scale = self.Scale -19
-        self.transTexture.scaleFactor.setValue(scale, scale)
+        self.texture.set_scale(scale)
+        self.isophotes.bands = max(1, value)
+        self.isophotes.update()
 
     def changeSlide_3(self, value):
         #print "Rotation : "+str(value)
         self.Rotation = value
-        self.transTexture.rotation.setValue(1. * self.Rotation / 100)
+        self.texture.set_rotation(1. * self.Rotation / 100)
 
     def quit(self):
         #print "Quit ..."
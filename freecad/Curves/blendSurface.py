@@ -1,3 +1,4 @@
+import numpy
 import FreeCAD
 import Part
 from freecad.Curves.curveOnSurface import curveOnSurface
@@ -38,26 +39,21 @@ class blendSurface:
         self.profSamples = 20
         self.untwist = False
         self.curves = []
+        self.poles = None
 
     def buildCurves(self): # -----------------------DEPRECATED ---------------------
-        for i in range(self.railSamples):
-            t1 = self.cos1.firstParameter + (1.0 * i * self.paramRange(self.cos1) / (self.railSamples - 1))
-            if not self.untwist:
-                t2 = self.cos2.firstParameter + (1.0 * i * self.paramRange(self.cos2) / (self.railSamples - 1))
-            else:
-                t2 = self.cos2.lastParameter  - (1.0 * i * self.paramRange(self.cos2) / (self.railSamples - 1))
-            pt1 = self.cos1.valueAt(t1)
-            pt2 = self.cos2.valueAt(t2)
-            chord = pt2.sub(pt1).Length
-        #    ip1 = cos1.tangentTo(t1,pt2)[0]
-        #    ip2 = cos2.tangentTo(t2,pt1)[0]
-            ip1 = self.cos1.binormalAt(t1)
-            ip2 = self.cos2.binormalAt(t2)
-            ip1.normalize().multiply(chord / 3.0)
-            ip2.normalize().multiply(chord / 3.0)
-            poles = [pt1, pt1.add(ip1), pt2.add(ip2), pt2]
+        params1 = self.cos1.sample_params(self.railSamples)
+        params2 = self.cos2.sample_params(self.railSamples)
+        if self.untwist:
+            params2 = params2[::-1]
+        pts1, _, _, binormals1 = self.cos1.frames(params1)
+        pts2, _, _, binormals2 = self.cos2.frames(params2)
+        chords = numpy.linalg.norm(pts2 - pts1, axis=1)[:, numpy.newaxis]
+        ip1 = pts1 + binormals1 * chords / 3.0
+        ip2 = pts2 + binormals2 * chords / 3.0
+        for poles in numpy.stack((pts1, ip1, ip2, pts2), axis=1).tolist():
             bz = Part.BezierCurve()
-            bz.setPoles(poles)
+            bz.setPoles([FreeCAD.Vector(*p) for p in poles])
             self.curves.append(bz)
 
     def compute_scale(self, sc, edge):
@@ -80,101 +76,72 @@ class blendSurface:
             FreeCAD.Console.PrintError("BlendSurface : failed to compute scale\n%s\n"%str(sc))
             return(None)
 
+    def scale_array(self, var_scale, scale, edge):
+        "Returns the (railSamples,) array of the scale factors"
+        sc = self.compute_scale(var_scale, edge)
+        if sc:
+            return numpy.array([v.y for v in sc])
+        return numpy.full(self.railSamples, float(scale))
+
+    def batch_blend(self, edges1, params1, edges2, params2, scales1, scales2):
+        """Computes all the blend curves in one batch,
+        and returns the list of their shapes.
+        The samples with coincident end points (edges that share a corner vertex)
+        have no blend curve, and are skipped with a warning."""
+        ders1 = nurbs_tools.edge_derivatives(edges1, params1, self.cont1)
+        ders2 = nurbs_tools.edge_derivatives(edges2, params2, self.cont2)
+        self.poles = nurbs_tools.blend_poles(ders1, ders2, scales1, scales2)
+        self.curves = nurbs_tools.bezier_curves(self.poles)
+        skipped = self.curves.count(None)
+        if skipped:
+            FreeCAD.Console.PrintWarning("BlendSurface : {} degenerate blend curves skipped\n".format(skipped))
+        return [c.toShape() for c in self.curves if c is not None]
+
     def cross_curves2(self):
-        self.curves = list()
-        params1 = self.cos1.build_param_list(self.railSamples)
-        params2 = self.cos2.build_param_list(self.railSamples)
+        self.cos1.build_param_list(self.railSamples)
+        self.cos2.build_param_list(self.railSamples)
         if self.untwist:
             self.cos2.param_list.reverse()
-        sc1 = self.compute_scale(self.var_scale1, self.cos1.edge)
-        sc2 = self.compute_scale(self.var_scale2, self.cos2.edge)
-        # if self.untwist:
-        #   c2 = self.cos2.get_cross_curves(self.railSamples, 1.0, True)
-        #   sc2.reverse()
-        blends = list()
+        sc1 = self.scale_array(self.var_scale1, self.scale1, self.cos1.edge)
+        sc2 = self.scale_array(self.var_scale2, self.scale2, self.cos2.edge)
+        pts1 = self.cos1.frames(self.cos1.param_list)[0]
+        pts2 = self.cos2.frames(self.cos2.param_list)[0]
+        edges1 = list()
+        edges2 = list()
         for i in range(self.railSamples):
-            pt1 = self.cos1.edgeOnFace.valueAt(self.cos1.param_list[i])
-            pt2 = self.cos2.edgeOnFace.valueAt(self.cos2.param_list[i])
-            c1 = self.cos1.get_cross_curve_toward_point(self.cos1.param_list[i],
-                                                        pt2, 1e-1, False)
-            c2 = self.cos2.get_cross_curve_toward_point(self.cos2.param_list[i],
-                                                        pt1, 1e-1, False)
-            b = nurbs_tools.blendCurve(c1, c2)
-            b.cont1 = self.cont1
-            b.cont2 = self.cont2
-            if sc1:
-                b.scale1 = sc1[i].y
-            else:
-                b.scale1 = self.scale1
-            if sc2:
-                b.scale2 = sc2[i].y
-            else:
-                b.scale2 = self.scale2
-            b.compute()
-            blends.append(b.shape())
-            self.curves.append(b)
-        return(blends)
+            pt1 = FreeCAD.Vector(*pts1[i])
+            pt2 = FreeCAD.Vector(*pts2[i])
+            edges1.append(self.cos1.get_cross_curve_toward_point(self.cos1.param_list[i],
+                                                                 pt2, 1e-1, False))
+            edges2.append(self.cos2.get_cross_curve_toward_point(self.cos2.param_list[i],
+                                                                 pt1, 1e-1, False))
+        return(self.batch_blend(edges1, [e.FirstParameter for e in edges1],
+                                edges2, [e.FirstParameter for e in edges2], sc1, sc2))
 
     def cross_curves(self):
-        self.curves = list()
         c1 = self.cos1.get_cross_curves(self.railSamples, 1.0)
-        c2 = self.cos2.get_cross_curves(self.railSamples, 1.0)
-        sc1 = self.compute_scale(self.var_scale1, self.cos1.edge)
-        sc2 = self.compute_scale(self.var_scale2, self.cos2.edge)
+        c2 = self.cos2.get_cross_curves(self.railSamples, 1.0, self.untwist)
+        sc1 = self.scale_array(self.var_scale1, self.scale1, self.cos1.edge)
+        sc2 = self.scale_array(self.var_scale2, self.scale2, self.cos2.edge)
         if self.untwist:
-            c2 = self.cos2.get_cross_curves(self.railSamples, 1.0, True)
-            sc2.reverse()
-        blends = list()
-        for i in range(self.railSamples):
-            b = nurbs_tools.blendCurve(c1[i], c2[i])
-            b.cont1 = self.cont1
-            b.cont2 = self.cont2
-            if sc1:
-                b.scale1 = sc1[i].y
-            else:
-                b.scale1 = self.scale1
-            if sc2:
-                b.scale2 = sc2[i].y
-            else:
-                b.scale2 = self.scale2
-            b.compute()
-            blends.append(b.shape())
-            self.curves.append(b)
-        return(blends)
+            sc2 = sc2[::-1]
+        return(self.batch_blend(c1, [e.FirstParameter for e in c1],
+                                c2, [e.FirstParameter for e in c2], sc1, sc2))
 
     def blend_curves(self):
-        blend_curves = list()
         offset_curve_1 = self.cos1.get_offset_curve2d(0.1)
         offset_curve_2 = self.cos2.get_offset_curve2d(0.1)
-        sc1 = self.compute_scale(self.var_scale1, self.cos1.edge)
-        sc2 = self.compute_scale(self.var_scale2, self.cos2.edge)
+        sc1 = self.scale_array(self.var_scale1, self.scale1, self.cos1.edge)
+        sc2 = self.scale_array(self.var_scale2, self.scale2, self.cos2.edge)
         self.cos1.build_param_list(self.railSamples)
         self.cos2.build_param_list(self.railSamples)
         if self.untwist:
             self.cos2.param_list.reverse()
-            sc2.reverse()
-        for i in range(self.railSamples):
-            c1 = self.cos1.get_cross_curve(offset_curve_1,
-                                           self.cos1.param_list[i])
-            c2 = self.cos2.get_cross_curve(offset_curve_2,
-                                           self.cos2.param_list[i])
-            b = nurbs_tools.blendCurve(c1, c2)
-            b.cont1 = self.cont1
-            b.cont2 = self.cont2
-            b.param1 = b.edge1.LastParameter
-            b.param2 = b.edge2.LastParameter
-            if sc1:
-                b.scale1 = sc1[i].y
-            else:
-                b.scale1 = self.scale1
-            if sc2:
-                b.scale2 = sc2[i].y
-            else:
-                b.scale2 = self.scale2
-            b.compute()
-            blend_curves.append(b.shape())
-            self.curves.append(b)
-        return(blend_curves)
+            sc2 = sc2[::-1]
+        c1 = [self.cos1.get_cross_curve(offset_curve_1, p) for p in self.cos1.param_list]
+        c2 = [self.cos2.get_cross_curve(offset_curve_2, p) for p in self.cos2.param_list]
+        return(self.batch_blend(c1, [e.LastParameter for e in c1],
+                                c2, [e.LastParameter for e in c2], sc1, sc2))
 
     def get_gordon_shapes(self, curvetype=0):
         com1 = Part.Compound([self.cos1.edge, self.cos2.edge])
@@ -186,6 +153,8 @@ class blendSurface:
     def getPoints(self):
         pts = []
         for c in self.curves:
+            if c is None:
+                continue
             e = c.toShape()
             pts.append(e.discretize(self.profSamples))
         return(pts)
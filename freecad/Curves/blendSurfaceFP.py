@@ -7,6 +7,7 @@ from freecad.Curves import blendSurface
 from freecad.Curves import property_editor
 from freecad.Curves import _utils
 from freecad.Curves import ICONPATH
+from freecad.Curves import draft_mode
 
 TOOL_ICON = os.path.join( ICONPATH, 'blendSurf.svg')
 
@@ -45,6 +46,8 @@ def getComboView(mw):
 
 
 class blendSurfFP:
+    supports_draft = True
+
     def __init__(self, obj):
         obj.Proxy = self
         obj.addProperty("App::PropertyLink",       "Edge1",          "Base",   "First edge")
@@ -85,8 +88,8 @@ class blendSurfFP:
             if (not obj.Edge1 == None) and (not obj.Edge2 == None):
                 
                 bs = blendSurface.blendSurface(obj.Edge1, obj.Edge2)
-                bs.railSamples = obj.RailSamples
-                bs.profSamples = obj.ProfileSamples
+                bs.railSamples = draft_mode.samples(obj, obj.RailSamples)
+                bs.profSamples = draft_mode.samples(obj, obj.ProfileSamples)
                 if "Untwist" in obj.PropertiesList:
                     bs.untwist = obj.Untwist
                 bs.cont1 = self.getContinuity(obj.Continuity1)
@@ -135,11 +138,9 @@ class blendSurfFP:
         if prop == "Scale1":
             if fp.Scale1 == 0:
                 fp.Scale1 = 0.0001
-            self.execute(fp)
         elif prop == "Scale2":
             if fp.Scale2 == 0:
                 fp.Scale2 = 0.0001
-            self.execute(fp)
 
 
 class blendSurfVP:
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Command registry"
+__author__ = "Christophe Grellier (Chris_G)"
+__license__ = "LGPL 2.1"
+__doc__ = "Lazy registration of the workbench commands, and import timing of their modules."
+
+import os
+import sys
+import time
+import importlib
+import importlib.util
+import FreeCAD
+import FreeCADGui
+from freecad.Curves import ICONPATH
+from freecad.Curves import logger
+
+# The commands of the workbench are registered from a static table
+# (name, module, icon, menu text, tooltip), without importing their module.
+# The module of a command is only imported when the command is activated.
+# A module can also be imported by FreeCAD, when a document that contains
+# one of its features is restored. In both cases, the addCommand call
+# of the module is caught, and the real command replaces the lazy one.
+# Each module import is timed, and reported in the "info" log level.
+
+log = logger.get_logger(__name__)
+
+_commands = dict()  # command name -> LazyCommand
+_timings = dict()  # module name -> import time in seconds
+_add_command = None
+
+
+def import_module(module):
+    """Imports freecad.Curves.<module>, and records the import time"""
+    name = "freecad.Curves." + module
+    start = time.perf_counter()
+    mod = importlib.import_module(name)
+    if module not in _timings:
+        _timings[module] = time.perf_counter() - start
+        log.info("{} imported in {:.1f} ms", module, _timings[module] * 1000)
+    return mod
+
+
+def module_available(name):
+    """Returns True if module name can be found, without importing it
+    (the parent packages of name are imported)"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def timings():
+    """Returns the list of the (module, import time) already recorded, slowest first"""
+    return sorted(_timings.items(), key=lambda t: t[1], reverse=True)
+
+
+class LazyCommand(object):
+    """Command proxy that imports its module on first activation
+    LazyCommand(name, module, icon, menu_text, tooltip, checkable=None)
+    icon is a file name in the icons directory, or a FreeCAD icon name."""
+    def __init__(self, name, module, icon, menu_text, tooltip, checkable=None):
+        self.name = name
+        self.module = module
+        self.icon = icon
+        self.menu_text = menu_text
+        self.tooltip = tooltip
+        self.checkable = checkable
+        self.command = None
+
+    def load(self):
+        """Imports the module, and returns the real command"""
+        if self.command is None:
+            try:
+                import_module(self.module)
+            except ImportError as exc:
+                log.error("Command {} : failed to import module {} : {}", self.name, self.module, exc)
+                return None
+        if self.command is None:
+            log.error("Module {} didn't register command {}", self.module, self.name)
+        return self.command
+
+    def Activated(self, *args):
+        cmd = self.load()
+        if cmd is not None:
+            return cmd.Activated(*args)
+
+    def IsActive(self):
+        if self.command is None:
+            return FreeCAD.ActiveDocument is not None
+        if hasattr(self.command, "IsActive"):
+            return self.command.IsActive()
+        return True
+
+    def GetResources(self):
+        pixmap = os.path.join(ICONPATH, self.icon)
+        if not os.path.exists(pixmap):
+            pixmap = self.icon
+        res = {'Pixmap': pixmap,
+               'MenuText': self.menu_text,
+               'ToolTip': self.tooltip}
+        if self.checkable is not None:
+            res['Checkable'] = self.checkable
+        return res
+
+
+def _hooked_add_command(name, cmd, *args):
+    """Replacement of FreeCADGui.addCommand that catches the commands registered lazily
+    Only the commands defined in the Curves package are caught.
+    The commands of other workbenches are always passed to addCommand."""
+    lazy = _commands.get(name)
+    if lazy is None or cmd is lazy or not type(cmd).__module__.startswith("freecad.Curves."):
+        return _add_command(name, cmd, *args)
+    lazy.command = cmd
+
+
+def install_hook():
+    """Installs the addCommand hook. This must be done before any
+    module of the workbench is imported, since a module can be imported
+    by the restore of a document, before the workbench is initialized."""
+    global _add_command
+    if _add_command is None:
+        _add_command = FreeCADGui.addCommand
+        FreeCADGui.addCommand = _hooked_add_command
+
+
+def register(name, module, icon, menu_text, tooltip, checkable=None):
+    """Registers a lazy command in FreeCADGui
+    Nothing is done if the module is already imported,
+    since it has already registered the real command."""
+    install_hook()
+    if name in _commands:
+        return _commands[name]
+    if "freecad.Curves." + module in sys.modules:
+        return None
+    cmd = LazyCommand(name, module, icon, menu_text, tooltip, checkable)
+    _commands[name] = cmd
+    _add_command(name, cmd)
+    return cmd
+
+
+def register_all(table):
+    """Registers the lazy commands of a table of
+    (name, module, icon, menu text, tooltip[, checkable]) tuples,
+    and returns the list of the command names"""
+    for entry in table:
+        register(*entry)
+    return [entry[0] for entry in table]
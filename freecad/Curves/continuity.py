@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Continuity"
+__author__ = "Christophe Grellier (Chris_G)"
+__license__ = "LGPL 2.1"
+__doc__ = "Vectorized G1 / G2 continuity analysis and repair of BSpline curves."
+
+from math import asin, degrees
+import numpy as np
+import Part
+from freecad.Curves import nurbs_array
+
+TABLE_DTYPE = np.dtype([("index", "i4"),  # 1-based knot index
+                        ("param", "f8"),
+                        ("mult", "i4"),
+                        ("gap", "f8"),  # position jump
+                        ("angle", "f8"),  # tangent angle jump, in degrees
+                        ("curvature", "f8")])  # norm of the curvature vector jump
+
+
+def tolerance_angle(tol):
+    """Returns the angle, in degrees, between two unit vectors whose difference has length tol
+    This is the angle tolerance of JoinCurves.alignedTangents"""
+    return degrees(2 * asin(min(1.0, tol / 2.0)))
+
+
+def curve_arrays(bs):
+    """Returns the (knot_seq, degree, poles, weights, knots, mults) arrays of a non-periodic BSpline"""
+    if bs.isPeriodic():
+        raise ValueError("Continuity : periodic curves are not supported")
+    t, deg, poles, weights = nurbs_array.bspline_arrays(bs)
+    return t, deg, poles, weights, np.array(bs.getKnots()), np.array(bs.getMultiplicities(), dtype=int)
+
+
+def analyze_arrays(knot_seq, degree, poles, weights, knots, mults):
+    """Returns the continuity table of the interior knots of a BSpline, from its arrays"""
+    table = np.zeros(max(0, len(knots) - 2), dtype=TABLE_DTYPE)
+    if len(table) == 0:
+        return table
+    params = knots[1:-1]
+    ev = nurbs_array.CurveEvaluator.from_arrays(knot_seq, degree, poles, weights, order=2)
+    left = ev.derivatives(params, 2, left=True)
+    right = ev.derivatives(params, 2)
+    table["index"] = np.arange(2, len(knots))
+    table["param"] = params
+    table["mult"] = mults[1:-1]
+    table["gap"] = np.linalg.norm(right[0] - left[0], axis=1)
+    t1 = nurbs_array.unit_vectors(left[1])
+    t2 = nurbs_array.unit_vectors(right[1])
+    table["angle"] = np.degrees(np.arccos(np.clip((t1 * t2).sum(axis=1), -1.0, 1.0)))
+    curv = []
+    for d in (left, right):
+        speed = np.linalg.norm(d[1], axis=1)
+        speed[speed == 0] = np.inf
+        curv.append(np.cross(d[1], d[2]) / speed[:, np.newaxis] ** 3)
+    table["curvature"] = np.linalg.norm(curv[1] - curv[0], axis=1)
+    return table
+
+
+def analyze(bs):
+    """Computes the position, tangent angle and curvature jumps at all the interior knots
+    table = analyze(bs)
+    table is a numpy structured array (see TABLE_DTYPE)"""
+    return analyze_arrays(*curve_arrays(bs))
+
+
+def table_string(table):
+    """Formats a continuity table as text"""
+    lines = ["{:>6} {:>12} {:>5} {:>12} {:>12} {:>12}".format("Knot", "Parameter", "Mult", "Gap", "Angle", "Curvature")]
+    for row in table:
+        lines.append("{:6d} {:12.6g} {:5d} {:12.3e} {:12.6g} {:12.3e}".format(*row.tolist()))
+    return "\n".join(lines)
+
+
+def _c1_fix(hpoles, knot_seq, degree, j):
+    """Returns the 2 neighbours of junction pole j that make the curve C1 at the junction.
+    The first derivatives on both sides are replaced by their average,
+    which is the smallest symmetric change of the adjacent poles.
+    Returns None if the fix would produce a negative weight."""
+    dl = knot_seq[j + degree] - knot_seq[j]
+    dr = knot_seq[j + degree + 1] - knot_seq[j + 1]
+    v = 0.5 * ((hpoles[j] - hpoles[j - 1]) / dl + (hpoles[j + 1] - hpoles[j]) / dr)
+    prev = hpoles[j] - v * dl
+    nxt = hpoles[j] + v * dr
+    if prev[-1] <= 0 or nxt[-1] <= 0:
+        return None
+    return prev, nxt
+
+
+def _displacement(old, new):
+    """Distance between the cartesian poles of 2 arrays of homogeneous poles"""
+    old = np.atleast_2d(old)
+    new = np.atleast_2d(new)
+    return np.linalg.norm(old[:, :3] / old[:, 3:] - new[:, :3] / new[:, 3:], axis=1).max()
+
+
+def _removable(hpoles, knot_seq, degree, j, tol=1e-9):
+    """Returns True if the junction pole j lies on the chord of its neighbours,
+    at the position of an exact knot removal"""
+    dl = knot_seq[j + degree] - knot_seq[j]
+    dr = knot_seq[j + degree + 1] - knot_seq[j + 1]
+    p = (dr * hpoles[j - 1] + dl * hpoles[j + 1]) / (dl + dr)
+    scale = max(1.0, np.abs(hpoles[j - 1:j + 2]).max())
+    return np.linalg.norm(p - hpoles[j]) <= tol * scale
+
+
+def _g2_fix(poles, knot_seq, degree, j, param, tol=None):
+    """Moves poles j-2 and j+2, orthogonally to the tangent, to give both sides
+    of the C1 junction j the average curvature vector. Non-rational curves only.
+    The poles are not moved if their displacement would exceed tol."""
+    if j < 2 or j + 2 >= len(poles):
+        return False
+    n = len(poles)
+    b1 = nurbs_array.basis_derivatives(knot_seq, degree, n, [param], 1)[0]
+    b2l = nurbs_array.basis_derivatives(knot_seq, degree, n, [param], 2, left=True)[0]
+    b2r = nurbs_array.basis_derivatives(knot_seq, degree, n, [param], 2)[0]
+    if b2l[j - 2] == 0 or b2r[j + 2] == 0:
+        return False
+    d1 = b1.dot(poles)
+    s2 = d1.dot(d1)
+    if s2 == 0:
+        return False
+    tan = d1 / np.sqrt(s2)
+    perp = []
+    for b in (b2l, b2r):
+        d2 = b.dot(poles)
+        perp.append(d2 - d2.dot(tan) * tan)
+    target = 0.5 * (perp[0] + perp[1])
+    moves = ((target - perp[0]) / b2l[j - 2], (target - perp[1]) / b2r[j + 2])
+    if tol is not None and max(np.linalg.norm(m) for m in moves) > tol:
+        return False
+    poles[j - 2] += moves[0]
+    poles[j + 2] += moves[1]
+    return True
+
+
+def repair(bs, max_angle=1.0, curvature_tol=None, remove_knots=True, tol=None):
+    """Repairs the tangency (and optionally curvature) defects of a BSpline curve at its junction knots
+    newbs, table, corners = repair(bs, max_angle=1.0, curvature_tol=None, remove_knots=True, tol=None)
+    The junction knots (multiplicity >= degree) whose tangent angle jump, in degrees,
+    is below max_angle, are made C1 by moving their 2 neighbour poles.
+    The poles moved by a fix are locked : a junction whose neighbour poles
+    are locked by another fix (degree 2 curves) is left unchanged.
+    If tol is not None, the fixes that would move a pole farther than tol are rejected.
+    If curvature_tol is not None, the C1 junctions whose curvature jump exceeds
+    curvature_tol are made G2 by moving the next poles (non-rational curves only).
+    With remove_knots, the multiplicity of the junctions that are C1 after all the fixes
+    is decreased by one, by deleting the junction pole. This is an exact knot removal.
+    Returns the repaired curve, the continuity table of the input curve,
+    and the parameters of the junctions that are left unrepaired."""
+    t, deg, poles, weights, knots, mults = curve_arrays(bs)
+    table = analyze_arrays(t, deg, poles, weights, knots, mults)
+    rational = bs.isRational()
+    hpoles = np.hstack((poles * weights[:, np.newaxis], weights[:, np.newaxis]))
+    cum = np.cumsum(mults)
+    corners = []
+    fixed = []
+    locked = set()
+    if deg < 2:
+        return bs, table, [float(row["param"]) for row in table if row["angle"] > max_angle]
+    for k, row in enumerate(table, 1):
+        if row["mult"] < deg:
+            continue
+        if row["mult"] > deg or row["gap"] > 1e-7 or row["angle"] > max_angle:
+            corners.append(float(row["param"]))
+            continue
+        j = cum[k] - deg - 1
+        res = None
+        if not locked.intersection((j - 1, j, j + 1)):
+            res = _c1_fix(hpoles, t, deg, j)
+        if res is not None and tol is not None:
+            if _displacement(hpoles[[j - 1, j + 1]], np.array(res)) > tol:
+                res = None
+        if res is None:
+            corners.append(float(row["param"]))
+            continue
+        hpoles[j - 1], hpoles[j + 1] = res
+        locked.update((j - 1, j, j + 1))
+        fixed.append((k, j))
+    if curvature_tol is not None and not rational:
+        # each G2 fix must not move the poles that control another junction
+        for k, j in fixed:
+            row = table[k - 1]
+            if row["curvature"] <= curvature_tol or (j - 2) in locked or (j + 2) in locked:
+                continue
+            if _g2_fix(hpoles[:, :3], t, deg, j, row["param"], tol):
+                locked.update((j - 2, j + 2))
+    new_mults = mults.copy()
+    keep = np.ones(len(hpoles), dtype=bool)
+    if remove_knots and fixed:
+        after = analyze_arrays(t, deg, hpoles[:, :3] / hpoles[:, 3:], hpoles[:, 3], knots, mults)
+        for k, j in fixed:
+            if after[k - 1]["angle"] < 1e-3 and _removable(hpoles, t, deg, j):
+                new_mults[k] -= 1
+                keep[j] = False
+    hpoles = hpoles[keep]
+    w = hpoles[:, 3]
+    pts = hpoles[:, :3] / w[:, np.newaxis]
+    nbs = Part.BSplineCurve()
+    nbs.buildFromPolesMultsKnots(nurbs_array.to_vectors(pts), new_mults.tolist(), knots.tolist(),
+                                 False, deg, w.tolist(), rational)
+    return nbs, table, corners
@@ -1,8 +1,11 @@
+import numpy as np
 import FreeCAD
 import Part
 from Part import Geom2d
 from FreeCAD import Base
 from freecad.Curves import _utils
+from freecad.Curves import nurbs_array
+from freecad.Curves import logger
 
 #Find the minimum distance to another shape.
 #distToShape(Shape s):  Returns a list of minimum distance and solution point pairs.
@@ -29,6 +32,7 @@ from freecad.Curves import _utils
 #    params is a tuple (u,v). 
 
 debug = _utils.debug
+log = logger.get_logger(__name__)
 
 def startPoint(c):
     return c.value(c.FirstParameter)
@@ -187,6 +191,8 @@ class curveOnSurface(object):
         self.isValid = False
         self._closed = False
         self._reversed = False
+        self._frames = dict()
+        self.offset_error = None
         self.validate()
 
     @property
@@ -218,6 +224,7 @@ class curveOnSurface(object):
             self.firstParameter = self.curve2D.parameter(v2)
             self.lastParameter = self.curve2D.parameter(v1)
             self._reversed = not self._reversed
+            self._frames = dict()
             print("%f,%f"%(self.firstParameter,self.lastParameter))
             self.edgeOnFace = self.curve2D.toShape(self.face, self.firstParameter, self.lastParameter)
             #self.edgeOnFace.Placement = self.face.Placement
@@ -237,6 +244,7 @@ class curveOnSurface(object):
 
     def validate(self):
         c2d = None
+        self._frames = dict()
         if (not self.edge == None) and (not self.face == None):
             c2d = self.face.curveOnSurface(self.edge)
             if not isinstance(c2d,tuple):
@@ -333,6 +341,64 @@ class curveOnSurface(object):
         else:
             return(None)
 
+    def _raw_frames(self, params):
+        "Evaluates the (points, tangents, normals) arrays, without the reverse flags"
+        pts = list()
+        tans = list()
+        nors = list()
+        surf = self.face.Surface
+        for t in params:
+            if self.isValid:
+                p = self.curve2D.value(t)
+                pts.append(self.edgeOnFace.valueAt(t))
+                tans.append(self.edgeOnFace.tangentAt(t))
+                nors.append(self.face.normalAt(p.x, p.y))
+            else:
+                u, v = surf.parameter(self.edge.valueAt(t))
+                pts.append(surf.value(u, v))
+                tans.append(self.edge.tangentAt(t))
+                nors.append(surf.normal(u, v))
+        return (nurbs_array.to_array(pts),
+                nurbs_array.unit_vectors(nurbs_array.to_array(tans)),
+                nurbs_array.unit_vectors(nurbs_array.to_array(nors)))
+
+    def frames(self, params):
+        """Returns the (points, tangents, normals, binormals) arrays at an array of parameters
+        pts, tangents, normals, binormals = cos.frames(params)
+        Each parameter is evaluated once, and the samples are cached
+        until the edge, the face, or the orientation changes.
+        The reverseTangent, reverseNormal and reverseBinormal flags are applied."""
+        params = np.asarray(params, dtype=float)
+        key = params.tobytes()
+        if key not in self._frames:
+            if len(self._frames) > 16:
+                self._frames = dict()
+            self._frames[key] = self._raw_frames(params)
+        pts, tans, nors = self._frames[key]
+        st = -1.0 if self.reverseTangent else 1.0
+        sn = -1.0 if self.reverseNormal else 1.0
+        sb = -1.0 if self.reverseBinormal else 1.0
+        binors = nurbs_array.unit_vectors(np.cross(tans, nors)) * (st * sn * sb)
+        return pts, tans * st, nors * sn, binors
+
+    def sample_params(self, num):
+        "Returns the array of num parameters uniformly distributed on the curve"
+        return np.linspace(self.firstParameter, self.lastParameter, max(2, num))
+
+    def interpolated_frames(self, params, samples=100):
+        """Returns the (points, tangents, normals, binormals) arrays at params,
+        linearly interpolated between the cached frames of a uniform sampling.
+        Cheaper than frames() when the parameters change often, at the cost of accuracy."""
+        knots = self.sample_params(samples)
+        params = np.asarray(params, dtype=float)
+        res = list()
+        for i, arr in enumerate(self.frames(knots)):
+            val = np.column_stack([np.interp(params, knots, arr[:, j]) for j in range(3)])
+            if i > 0:
+                val = nurbs_array.unit_vectors(val)
+            res.append(val)
+        return tuple(res)
+
     def tangentTo(self, t, pt):
         v = self.valueAt(t)
         n = self.normalAt(t)
@@ -454,7 +520,7 @@ class curveOnSurface(object):
         ls = Part.Geom2d.Line2dSegment(p1,p2)
         sh = ls.toShape(self.face.Surface)
         #sh = sh.transformGeometry(self.face.Placement.toMatrix()).Edges[0]
-        FreeCAD.Console.PrintMessage(" %s - %s\n"%(self.edge.Curve, str( sh.distToShape(self.edge)[0])))
+        log.debug("{} - {}", self.edge.Curve, lambda: sh.distToShape(self.edge)[0])
         #d,pts,info = sh.distToShape(self.edge)
         #if d > 1e-8:
             #bs = sh.Edges[0].Curve.toBSpline()
@@ -481,34 +547,21 @@ class curveOnSurface(object):
         #edge1.Placement = pl
         #return(edge1)
 
-    def normalFace(self, samp, dist, tol=1e-5, sym=False):
-        face = None
+    def offset_face(self, vectors, dist, tol=1e-5, sym=False):
+        """Ruled face between the curve and its offset along the sampled vectors.
+        vectors are sampled at the uniform parameters of sample_params(len(vectors)).
+        With sym, the ruled face is centered on the curve."""
         if sym:
-            dist /=2.0
-        ran = self.lastParameter - self.firstParameter
-        pts = list()
-        pars = list()
-        for i in range(samp):
-            t = self.firstParameter + float(i) * ran / (samp-1)
-            pts.append(self.valueAt(t).add(self.normalAt(t)*float(dist)))
-            pars.append(t)
-        #if self._closed:
-            #pts = pts[:-1]
+            dist /= 2.0
+        pars = self.sample_params(len(vectors))
+        pts = self.frames(pars)[0]
         bs = Part.BSplineCurve()
-        #bs.interpolate(Points = pts, Parameters = pars, PeriodicFlag = self._closed)
-        bs.approximate(Points = pts, Parameters = pars, DegMin = 3, DegMax = 7, Tolerance = tol)
+        bs.approximate(Points=nurbs_array.to_vectors(pts + vectors * dist), Parameters=pars.tolist(),
+                       DegMin=3, DegMax=7, Tolerance=tol)
         if sym:
-            pts = list()
-            pars = list()
-            for i in range(samp):
-                t = self.firstParameter + float(i) * ran / (samp-1)
-                pts.append(self.valueAt(t).sub(self.normalAt(t)*float(dist)))
-                pars.append(t)
-            #if self._closed:
-                #pts = pts[:-1]
             bs2 = Part.BSplineCurve()
-            #bs2.interpolate(Points = pts, Parameters = pars, PeriodicFlag = self._closed)
-            bs2.approximate(Points = pts, Parameters = pars, DegMin = 3, DegMax = 7, Tolerance = tol)
+            bs2.approximate(Points=nurbs_array.to_vectors(pts - vectors * dist), Parameters=pars.tolist(),
+                            DegMin=3, DegMax=7, Tolerance=tol)
             face = Part.makeRuledSurface(bs2.toShape(), bs.toShape())
         else:
             face = Part.makeRuledSurface(self.edgeOnFace, bs.toShape())
@@ -516,45 +569,66 @@ class curveOnSurface(object):
             surf = face.Surface.copy()
             surf.setUPeriodic()
             face = surf.toShape()
-        #face.Placement = self.face.Placement
         return(face.transformGeometry(self.face.Placement.toMatrix()))
 
-    def binormalFace(self, samp, dist, tol=1e-5, sym=False):
-        face = None
-        if sym:
-            dist /=2.0
-        ran = self.lastParameter - self.firstParameter
-        pts = list()
-        pars = list()
-        for i in range(samp):
-            t = self.firstParameter + float(i) * ran / (samp-1)
-            pts.append(self.valueAt(t).add(self.binormalAt(t)*float(dist)))
-            pars.append(t)
-        #if self._closed:
-            #pts = pts[:-1]
-        bs = Part.BSplineCurve()
-        bs.approximate(Points = pts, Parameters = pars, DegMin = 3, DegMax = 7, Tolerance = tol)
+    def offset_ribbon(self, index, dist, tol=1e-5, sym=False, max_iter=8, checks=3):
+        """Ruled face between the curve and its offset along the frame vectors
+        of the given index (2: normals, 3: binormals), built without approximation.
+        The edge on face BSpline is refined until the offset of its poles,
+        along the vectors at the Greville abscissae, is closer than tol to the
+        exact offset. The error is checked at 'checks' points in each knot span,
+        and knots are only inserted in the spans that exceed tol.
+        The reached error estimate is stored in self.offset_error."""
         if sym:
-            pts = list()
-            pars = list()
-            for i in range(samp):
-                t = self.firstParameter + float(i) * ran / (samp-1)
-                pts.append(self.valueAt(t).sub(self.binormalAt(t)*float(dist)))
-                pars.append(t)
-            #if self._closed:
-                #pts = pts[:-1]
-            bs2 = Part.BSplineCurve()
-            bs2.approximate(Points = pts, Parameters = pars, DegMin = 3, DegMax = 7, Tolerance = tol)
-            face = Part.makeRuledSurface(bs2.toShape(), bs.toShape())
-        else:
-            face = Part.makeRuledSurface(self.edgeOnFace, bs.toShape())
+            dist /= 2.0
+        bs = self.edgeOnFace.Curve.toBSpline(self.firstParameter, self.lastParameter)
+        fracs = np.arange(1, checks + 1) / (checks + 1.0)
+        for it in range(max_iter):
+            t, deg, poles, weights = nurbs_array.bspline_arrays(bs)
+            vecs = self.frames(nurbs_array.greville_abscissae(t, deg, len(poles)))[index]
+            if sym:
+                rows = (poles - vecs * dist, poles + vecs * dist)
+                sides = (-dist, dist)
+            else:
+                rows = (poles, poles + vecs * dist)
+                sides = (0.0, dist)
+            knots = np.unique(t[deg:len(poles) + 1])
+            params = (knots[:-1, np.newaxis] + np.diff(knots)[:, np.newaxis] * fracs).ravel()
+            frames = self.frames(params)
+            err = np.zeros(len(params))
+            for row, side in zip(rows, sides):
+                exact = frames[0] + frames[index] * side
+                approx = nurbs_array.rational_de_boor(t, deg, row, weights, params)
+                err = np.maximum(err, np.linalg.norm(approx - exact, axis=1))
+            span_err = err.reshape(-1, checks).max(axis=1)
+            if span_err.max() <= tol or it == max_iter - 1:
+                break
+            for k in np.nonzero(span_err > tol)[0]:
+                bs.insertKnot(0.5 * (knots[k] + knots[k + 1]), 1, 0.0)
+        self.offset_error = float(span_err.max())
+        debug("Offset ribbon : {} poles, error {}".format(len(poles), self.offset_error))
+        surf = Part.BSplineSurface()
+        grid = [[FreeCAD.Vector(*p0), FreeCAD.Vector(*p1)] for p0, p1 in zip(rows[0].tolist(), rows[1].tolist())]
+        uknots, umults = np.unique(t, return_counts=True)
+        surf.buildFromPolesMultsKnots(grid, umults.tolist(), [2, 2], uknots.tolist(), [0.0, 1.0],
+                                      False, False, deg, 1, [[w, w] for w in weights.tolist()])
         if self._closed:
-            surf = face.Surface.copy()
             surf.setUPeriodic()
-            face = surf.toShape()
-        #nf = face.transformGeometry(self.face.Placement.toMatrix())
+        face = surf.toShape()
         return(face.transformGeometry(self.face.Placement.toMatrix()))
 
+    def normalFace(self, samp, dist, tol=1e-5, sym=False, direct=False):
+        if direct:
+            return self.offset_ribbon(2, float(dist), tol, sym)
+        normals = self.frames(self.sample_params(samp))[2]
+        return self.offset_face(normals, float(dist), tol, sym)
+
+    def binormalFace(self, samp, dist, tol=1e-5, sym=False, direct=False):
+        if direct:
+            return self.offset_ribbon(3, float(dist), tol, sym)
+        binormals = self.frames(self.sample_params(samp))[3]
+        return self.offset_face(binormals, float(dist), tol, sym)
+
     def get_adjacent_edges(self):
         """returns the edges of Face that are connected to Edge"""
         e1 = None
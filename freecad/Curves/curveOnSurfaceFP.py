@@ -35,6 +35,9 @@ class cosFP:
         obj.addProperty("App::PropertyBool",       "Symmetric",      "CurveOnSurface", "Face symmetric across curve").Symmetric = False
         obj.addProperty("App::PropertyBool",       "Closed",         "CurveOnSurface", "Close the curve").Closed = False
         obj.addProperty("App::PropertyBool",       "Reverse",        "CurveOnSurface", "Reverse the parametric orientation of the curve").Reverse = False
+        obj.addProperty("App::PropertyBool",       "DirectOffset",   "CurveOnSurface", "Build the face by offsetting the poles of the curve, within Tolerance").DirectOffset = True
+        obj.addProperty("App::PropertyFloat",      "OffsetError",    "CurveOnSurface", "Estimated error of the direct offset face")
+        obj.setEditorMode("OffsetError", 1)
         obj.Output = "Curve only"
         obj.Proxy = self
 
@@ -62,12 +65,15 @@ class cosFP:
         cos.reverseTangent = obj.ReverseTangent
         cos.reverseNormal = obj.ReverseNormal
         cos.reverseBinormal = obj.ReverseBinormal
+        direct = hasattr(obj, "DirectOffset") and obj.DirectOffset
         if obj.Output == "Normal face":
-            obj.Shape = cos.normalFace(obj.Samples, float(obj.FaceWidth), obj.Tolerance, obj.Symmetric)
+            obj.Shape = cos.normalFace(obj.Samples, float(obj.FaceWidth), obj.Tolerance, obj.Symmetric, direct)
         elif obj.Output == "Binormal face":
-            obj.Shape = cos.binormalFace(obj.Samples, float(obj.FaceWidth), obj.Tolerance, obj.Symmetric)
+            obj.Shape = cos.binormalFace(obj.Samples, float(obj.FaceWidth), obj.Tolerance, obj.Symmetric, direct)
         else:
             obj.Shape = cos.getEdge()
+        if direct and cos.offset_error is not None:
+            obj.OffsetError = cos.offset_error
         #obj.Placement.Base = face.Placement.Base
         return(cos)
 
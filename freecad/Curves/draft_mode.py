@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Draft mode"
+__author__ = "Christophe Grellier (Chris_G)"
+__license__ = "LGPL 2.1"
+__doc__ = "Toggle the draft mode : heavy features recompute at reduced quality while editing."
+
+import os
+import FreeCAD
+from freecad.Curves import ICONPATH
+from freecad.Curves import logger
+
+# How it works :
+# The feature python classes that support draft mode have a class attribute
+# supports_draft = True, and read their heavy settings through the
+# samples / tolerance / ctrl_pts functions below.
+# When draft mode is on, a document observer marks these features as drafts
+# as soon as one of their inputs (or the feature itself) is edited.
+# The shape of a draft feature is drawn with dashed lines.
+# After DELAY ms without edit, or when the document is saved,
+# the drafts are finalized : they are recomputed at full quality.
+
+TOOL_ICON = os.path.join(ICONPATH, 'draft_mode.svg')
+PARAM_PATH = "User parameter:BaseApp/Preferences/Mod/Curves"
+DELAY = 1500
+IGNORED_PROPS = ("Label", "Label2", "Visibility", "ExpressionEngine", "Shape")
+
+log = logger.get_logger(__name__)
+
+_drafts = dict()  # (document name, object name) -> saved DrawStyle
+_timer = None
+_observer = None
+
+
+def enabled():
+    """Returns True if draft mode is active. Draft mode requires the GUI."""
+    if not FreeCAD.GuiUp:
+        return False
+    return FreeCAD.ParamGet(PARAM_PATH).GetBool("DraftMode", False)
+
+
+def set_enabled(value):
+    """Switches draft mode on or off. Switching off finalizes the current drafts."""
+    FreeCAD.ParamGet(PARAM_PATH).SetBool("DraftMode", bool(value))
+    if value:
+        _install_observer()
+    else:
+        finalize()
+
+
+def _key(obj):
+    return (obj.Document.Name, obj.Name)
+
+
+def supports_draft(obj):
+    return getattr(getattr(obj, "Proxy", None), "supports_draft", False)
+
+
+def is_draft(obj):
+    """Returns True if obj must be computed at draft quality"""
+    return _key(obj) in _drafts
+
+
+def samples(obj, value, factor=0.25, minimum=3):
+    """Returns the sample count to use for obj"""
+    if not is_draft(obj):
+        return value
+    return min(value, max(minimum, int(value * factor)))
+
+
+def tolerance(obj, value, factor=100.0):
+    """Returns the tolerance to use for obj"""
+    if not is_draft(obj):
+        return value
+    return value * factor
+
+
+def ctrl_pts(obj, value, cap=20):
+    """Returns the maximum number of control points to use for obj"""
+    if not is_draft(obj):
+        return value
+    return min(value, cap)
+
+
+def _set_indicator(obj):
+    "Draws the draft shape dashed, and returns the previous draw style"
+    vobj = getattr(obj, "ViewObject", None)
+    if vobj is None or not hasattr(vobj, "DrawStyle"):
+        return None
+    style = vobj.DrawStyle
+    vobj.DrawStyle = "Dashed"
+    return style
+
+
+def _restore_indicator(obj, style):
+    vobj = getattr(obj, "ViewObject", None)
+    if style is not None and vobj is not None and hasattr(vobj, "DrawStyle"):
+        vobj.DrawStyle = style
+
+
+def mark(obj):
+    """Marks obj as a draft, and restarts the idle timer of the full quality recompute"""
+    if not (enabled() and supports_draft(obj)):
+        return
+    key = _key(obj)
+    if key not in _drafts:
+        _drafts[key] = _set_indicator(obj)
+        log.debug("{} is a draft", obj.Label)
+    _restart_timer()
+
+
+def _restart_timer():
+    global _timer
+    from PySide import QtCore
+    if _timer is None:
+        _timer = QtCore.QTimer()
+        _timer.setSingleShot(True)
+        _timer.timeout.connect(finalize)
+    _timer.start(DELAY)
+
+
+def finalize(doc=None):
+    """Recomputes the drafts of document doc (or of all documents) at full quality"""
+    keys = [k for k in _drafts if doc is None or k[0] == doc.Name]
+    docs = set()
+    for key in keys:
+        style = _drafts.pop(key)
+        d = FreeCAD.getDocument(key[0]) if key[0] in FreeCAD.listDocuments() else None
+        obj = d.getObject(key[1]) if d else None
+        if obj is None:
+            continue
+        _restore_indicator(obj, style)
+        obj.touch()
+        docs.add(d)
+    for d in docs:
+        log.debug("Full quality recompute of {}", d.Label)
+        d.recompute()
+
+
+class DraftObserver(object):
+    "Document observer that marks the edited draft features and finalizes them on save"
+    def slotChangedObject(self, obj, prop):
+        if prop in IGNORED_PROPS or not enabled():
+            return
+        if getattr(obj.Document, "Recomputing", False):
+            return
+        for o in [obj] + obj.InListRecursive:
+            mark(o)
+
+    def slotStartSaveDocument(self, doc, filename):
+        finalize(doc)
+
+    def slotDeletedDocument(self, doc):
+        for key in [k for k in _drafts if k[0] == doc.Name]:
+            _drafts.pop(key)
+
+
+def _install_observer():
+    global _observer
+    if _observer is None:
+        _observer = DraftObserver()
+        FreeCAD.addDocumentObserver(_observer)
+
+
+if enabled():
+    _install_observer()
+
+
+class DraftModeCommand:
+    "Toggles the draft mode of the heavy features"
+    def Activated(self, checked=None):
+        if checked is None:
+            checked = not enabled()
+        set_enabled(checked)
+        FreeCAD.Console.PrintMessage("Curves draft mode : {}\n".format("on" if checked else "off"))
+
+    def IsActive(self):
+        return True
+
+    def GetResources(self):
+        return {'Pixmap': TOOL_ICON,
+                'MenuText': "Draft mode",
+                'ToolTip': __doc__,
+                'Checkable': enabled()}
+
+
+if FreeCAD.GuiUp:
+    import FreeCADGui
+    FreeCADGui.addCommand('draft_mode', DraftModeCommand())
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Fingerprint"
+__author__ = "Christophe Grellier (Chris_G)"
+__license__ = "LGPL 2.1"
+__doc__ = "Input fingerprints of feature python objects, to skip the recomputes that change nothing."
+
+import hashlib
+import functools
+import FreeCAD
+import Part
+from freecad.Curves import draft_mode
+from freecad.Curves import logger
+
+# Usage, in a feature python class :
+#
+# @fingerprint.cached_execute(outputs=["Points"], link_props=["NormalizedParameters"])
+# def execute(self, obj):
+#     ...
+#
+# The fingerprint of a feature is a hash of the values of its properties,
+# except the ones listed in outputs (the ones written by execute).
+# Linked objects contribute their global placement, the values of their
+# properties listed in link_props, and their stored fingerprint if they have one
+# (their shape only changes with their inputs), else a cheap digest of their Shape.
+# So a feature whose inputs were recomputed without change is skipped too,
+# and a chain of features only recomputes from the first real change.
+# The fingerprints are kept in memory, so the first recompute
+# after opening a document is always done.
+# A forced recompute (mark to recompute) is skipped too :
+# use the "Force recompute" command, that clears the fingerprints first.
+
+# Placement is set by execute, with the shape
+IGNORED_PROPS = ("Label", "Label2", "Visibility", "ExpressionEngine", "Proxy", "Shape", "Placement")
+PARAM_PATH = "User parameter:BaseApp/Preferences/Mod/Curves"
+
+log = logger.get_logger(__name__)
+
+_fingerprints = dict()  # (document name, object name) -> hex digest
+
+
+def enabled():
+    """Fingerprints can be disabled with the Mod/Curves/Fingerprints preference"""
+    return FreeCAD.ParamGet(PARAM_PATH).GetBool("Fingerprints", True)
+
+
+def shape_digest(shape):
+    """Returns a cheap digest of a shape : the hash of its topology, its placement and its bounding box.
+    A shape that is rebuilt gets a new digest, even if its geometry is the same."""
+    if shape.isNull():
+        return "null"
+    bb = shape.BoundBox
+    return repr((shape.hashCode(), shape.ShapeType, shape.Placement.toMatrix().A,
+                 (bb.XMin, bb.YMin, bb.ZMin, bb.XMax, bb.YMax, bb.ZMax)))
+
+
+def _update(h, value, link_props):
+    if isinstance(value, Part.Shape):
+        h.update(shape_digest(value).encode())
+    elif isinstance(value, FreeCAD.DocumentObject):
+        h.update(value.Name.encode())
+        if hasattr(value, "getGlobalPlacement"):
+            h.update(repr(value.getGlobalPlacement().toMatrix().A).encode())
+        stored = _fingerprints.get(_key(value))
+        if stored is not None:
+            h.update(stored.encode())
+        elif hasattr(value, "Shape"):
+            h.update(shape_digest(value.Shape).encode())
+        for name in link_props:
+            if name in value.PropertiesList:
+                h.update(name.encode())
+                _update(h, value.getPropertyByName(name), ())
+    elif isinstance(value, (list, tuple)):
+        h.update(b"[")
+        for v in value:
+            _update(h, v, link_props)
+        h.update(b"]")
+    else:
+        h.update(repr(value).encode())
+
+
+def compute(obj, outputs=(), link_props=()):
+    """Returns the fingerprint of the inputs of obj"""
+    h = hashlib.sha1()
+    for name in sorted(obj.PropertiesList):
+        if name in IGNORED_PROPS or name in outputs:
+            continue
+        h.update(name.encode())
+        _update(h, obj.getPropertyByName(name), link_props)
+    h.update(repr(draft_mode.is_draft(obj)).encode())
+    return h.hexdigest()
+
+
+def _key(obj):
+    return (obj.Document.Name, obj.Name)
+
+
+def unchanged(obj, digest):
+    """Returns True if digest is the stored fingerprint of obj, and obj has a shape"""
+    if _fingerprints.get(_key(obj)) != digest:
+        return False
+    return hasattr(obj, "Shape") and not obj.Shape.isNull()
+
+
+def store(obj, digest):
+    _fingerprints[_key(obj)] = digest
+
+
+def clear(obj=None):
+    """Forgets the fingerprint of obj, or of all objects, to force the next recompute"""
+    if obj is None:
+        _fingerprints.clear()
+    else:
+        _fingerprints.pop(_key(obj), None)
+
+
+def cached_execute(outputs=(), link_props=()):
+    """Decorator of the execute method of feature python classes
+    The execution is skipped, and the current shape kept,
+    if the fingerprint of the inputs didn't change since the last execution."""
+    def decorator(execute):
+        @functools.wraps(execute)
+        def wrapper(self, obj):
+            if not enabled():
+                return execute(self, obj)
+            digest = compute(obj, outputs, link_props)
+            if unchanged(obj, digest):
+                log.debug("{} : inputs unchanged, skipping recompute", obj.Label)
+                return None
+            clear(obj)
+            result = execute(self, obj)
+            store(obj, digest)
+            return result
+        return wrapper
+    return decorator
+
+
+class ForceRecomputeCommand:
+    "Clears the fingerprints of the selected objects (or of all objects), and recomputes them"
+    def Activated(self):
+        import FreeCADGui
+        doc = FreeCAD.ActiveDocument
+        sel = FreeCADGui.Selection.getSelection()
+        if sel:
+            objs = list(sel)
+            for o in sel:
+                objs.extend(o.InListRecursive)
+        else:
+            objs = doc.Objects
+            clear()
+        for o in objs:
+            clear(o)
+            o.touch()
+        doc.recompute()
+
+    def IsActive(self):
+        return FreeCAD.ActiveDocument is not None
+
+    def GetResources(self):
+        return {'Pixmap': 'view-refresh',
+                'MenuText': "Force recompute",
+                'ToolTip': "Recompute the selected objects (or all objects), even if their inputs didn't change"}
+
+
+if FreeCAD.GuiUp:
+    import FreeCADGui
+    FreeCADGui.addCommand('force_recompute', ForceRecomputeCommand())
@@ -1,6 +1,10 @@
+import numpy as np
 import FreeCAD
-import FreeCADGui as Gui
 import Part
+from freecad.Curves import nurbs_array
+from freecad.Curves import parallel
+from freecad.Curves import logger
+log = logger.get_logger(__name__)
 vec = FreeCAD.Vector
 vec2 = FreeCAD.Base.Vector2d
 
@@ -37,8 +41,14 @@ def longest_segment(e, p):
     return longest_edge(w.Edges[0], w.Edges[1])
 
 
-def join_2_edges(e1, e2):
-    d, pts, info = e1.distToShape(e2)
+def join_2_edges(e1, e2, dist=None):
+    """
+    edges = join_2_edges(e1, e2, dist=None)
+    dist is the result of e1.distToShape(e2), if already computed
+    """
+    if dist is None:
+        dist = e1.distToShape(e2)
+    d, pts, info = dist
     if d < 1e-7:  # edges are touching
         for i in info:
             if (i[0] == "Vertex") and (i[3] == "Vertex"):  # Contact type : end to end
@@ -62,7 +72,184 @@ def join_2_edges(e1, e2):
                 return (longest_segment(e1, i[2]), line, longest_segment(e2, i[5]))
 
 
-def join_multi_edges(edgelist, closed=False):
+def sample_edges(edges, samples=8):
+    """
+    points, owner = sample_edges(edges, samples=8)
+    returns the (n * samples, 3) array of the sampled edge polylines,
+    and the index of the edge of each point
+    """
+    pts = list()
+    for e in edges:
+        pts.extend(e.discretize(samples))
+    points = nurbs_array.to_array(pts)
+    owner = np.repeat(np.arange(len(edges)), samples)
+    return points, owner
+
+
+class EdgeIndex(object):
+    """Nearest edge search on the sampled polylines of a list of edges.
+    Used edges are skipped by the queries."""
+    def __init__(self, edges, samples=8):
+        self.edges = edges
+        self.samples = samples
+        self.points, self.owner = sample_edges(edges, samples)
+        self.index = nurbs_array.PointIndex(self.points)
+        self.used = np.zeros(len(edges), dtype=bool)
+
+    def nearest(self, shape, nb=3):
+        """
+        indices = nearest(shape, nb=3)
+        returns the indices of the nb unused edges closest to the sampled shape,
+        sorted by approximate distance
+        """
+        queries = nurbs_array.to_array(shape.discretize(self.samples))
+        k = min(len(self.points), max(2, nb * self.samples))
+        while True:
+            res = self.index.query(queries, k).reshape(len(queries), -1)
+            dist = np.linalg.norm(self.points[res] - queries[:, np.newaxis], axis=2).ravel()
+            owners = self.owner[res].ravel()
+            order = dist.argsort()
+            owners = owners[order][~self.used[owners[order]]]
+            _, first = np.unique(owners, return_index=True)
+            found = owners[np.sort(first)]
+            if len(found) >= nb or k >= len(self.points):
+                return found[:nb].tolist()
+            k = min(len(self.points), 4 * k)
+
+
+def connected_groups(edges, tol=1e-7, samples=8):
+    """
+    groups = connected_groups(edges, tol=1e-7, samples=8)
+    returns the lists of the indices of the edges whose sampled polylines
+    are closer than tol, directly or through other edges.
+    The polyline proximity is approximate : sample points are compared.
+    """
+    points, owner = sample_edges(edges, samples)
+    index = nurbs_array.PointIndex(points)
+    k = min(len(points), 2 * samples + 2)
+    res = index.query(points, k).reshape(len(points), -1)
+    close = np.linalg.norm(points[res] - points[:, np.newaxis], axis=2) <= tol
+    parent = list(range(len(edges)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in zip(np.repeat(owner, k)[close.ravel()], owner[res][close]):
+        ra, rb = root(int(a)), root(int(b))
+        if ra != rb:
+            parent[rb] = ra
+    groups = dict()
+    for i in range(len(edges)):
+        groups.setdefault(root(i), []).append(i)
+    return list(groups.values())
+
+
+def chain_edges(edgelist, candidates=3, samples=8):
+    """
+    edges = chain_edges(edgelist, candidates=3, samples=8)
+    Indexed version of the nearest edge chaining of join_multi_edges.
+    The exact distance is only computed on the closest candidates of the index.
+    """
+    index = EdgeIndex(edgelist, samples)
+    index.used[0] = True
+    good_edges = list()
+    last = edgelist[0]
+    res = []
+    for _ in range(len(edgelist) - 1):
+        closest_dist = None
+        closest = None
+        for c in index.nearest(last, candidates):
+            dist = last.distToShape(edgelist[c])
+            if closest_dist is None or closest_dist[0] > dist[0]:
+                closest_dist = dist
+                closest = c
+        index.used[closest] = True
+        res = join_2_edges(last, edgelist[closest], closest_dist)
+        last = res[-1]
+        good_edges.extend(res[:-1])
+    if res:
+        good_edges.append(res[-1])
+    elif len(edgelist) == 1:
+        good_edges.append(edgelist[0])
+    return good_edges
+
+
+def _chain_edges_job(job):
+    """Worker job : (compound BREP string, candidates, samples) -> BREP string of the chained edges"""
+    brep, candidates, samples = job
+    edges = parallel.brep_to_shape(brep).Edges
+    return parallel.shape_to_brep(Part.Compound(chain_edges(edges, candidates, samples)))
+
+
+def bridge_chains(chains):
+    """
+    edges = bridge_chains(chains)
+    Joins the chained edge lists into a single chain.
+    The next chain is the one with the end closest to the current chain end,
+    and the chains are connected with join_2_edges, like in join_multi_edges.
+    """
+    good_edges = list(chains[0])
+    remaining = [list(c) for c in chains[1:] if c]
+    while remaining:
+        last = good_edges[-1]
+        best = None
+        for n, c in enumerate(remaining):
+            for rev, e in ((False, c[0]), (True, c[-1])):
+                dist = last.distToShape(e)
+                if best is None or dist[0] < best[0][0]:
+                    best = (dist, n, rev)
+        dist, n, rev = best
+        c = remaining.pop(n)
+        if rev:
+            c.reverse()
+        res = join_2_edges(last, c[0], dist) or (last, c[0])
+        good_edges[-1:] = res
+        good_edges.extend(c[1:])
+    return good_edges
+
+
+def build_wires(good_edges, closed=False):
+    se = Part.sortEdges(good_edges)
+    wires = list()
+    for group in se:
+        print("Wire has {} edges".format(len(group)))
+        wires.append(Part.Wire(group))
+    if closed:
+        for w in wires:
+            if not w.isClosed():
+                ov = w.OrderedVertexes
+                d, p, i = ov[0].distToShape(ov[-1])
+                w.add(Part.makeLine(p[0][0], p[0][1]))
+    return wires
+
+
+def join_multi_edges(edgelist, closed=False, indexed=False, candidates=3, samples=8,
+                     groups=False, tol=1e-7, parallel_mode=False, processes=None):
+    """
+    compound = join_multi_edges(edgelist, closed=False, indexed=False, candidates=3, samples=8,
+                                groups=False, tol=1e-7, parallel_mode=False, processes=None)
+    Chains the edges by nearest neighbour, and joins them into wires.
+    indexed : search the nearest edge in a spatial index of the sampled edges,
+              and compute the exact distance only on the 'candidates' closest ones.
+    groups : chain separately the groups of edges that are connected within tol,
+             then bridge the group chains by join lines.
+    parallel_mode : process the groups in worker processes.
+    """
+    if groups:
+        index_groups = connected_groups(edgelist, tol, samples)
+        log.debug("{} disconnected groups", len(index_groups))
+        edge_groups = [[edgelist[i] for i in g] for g in index_groups]
+        if parallel_mode:
+            jobs = [(parallel.shape_to_brep(Part.Compound(g)), candidates, samples) for g in edge_groups]
+            chains = [parallel.brep_to_shape(brep).Edges for brep in parallel.map_jobs(_chain_edges_job, jobs, processes)]
+        else:
+            chains = [chain_edges(g, candidates, samples) for g in edge_groups]
+        return Part.Compound(build_wires(bridge_chains(chains), closed))
+    if indexed:
+        return Part.Compound(build_wires(chain_edges(edgelist, candidates, samples), closed))
     good_edges = list()
     last = edgelist[0]
     remaining = edgelist[1:]
@@ -91,26 +278,16 @@ def join_multi_edges(edgelist, closed=False):
         remaining = rejected
     if res:
         good_edges.append(res[-1])
-    se = Part.sortEdges(good_edges)
-    wires = list()
-    for group in se:
-        print("Wire has {} edges".format(len(group)))
-        wires.append(Part.Wire(group))
-    if closed:
-        for w in wires:
-            if not w.isClosed():
-                ov = w.OrderedVertexes
-                d, p, i = ov[0].distToShape(ov[-1])
-                w.add(Part.makeLine(p[0][0], p[0][1]))
-    return Part.Compound(wires)
+    return Part.Compound(build_wires(good_edges, closed))
 
 
-def run(closed=False):
+def run(closed=False, **kwargs):
+    import FreeCADGui as Gui
     s = Gui.Selection.getSelection()
     ori_edges = s[0].Shape.Edges
-    return join_multi_edges(ori_edges, closed)
+    return join_multi_edges(ori_edges, closed, **kwargs)
 
 
-def show(closed=False):
-    Part.show(run(closed))
+def show(closed=False, **kwargs):
+    Part.show(run(closed, **kwargs))
 
@@ -15,6 +15,7 @@ import FreeCADGui
 import Part
 from freecad.Curves import _utils
 from freecad.Curves import ICONPATH
+from freecad.Curves import draft_mode
 from freecad.Curves.gordon import InterpolateCurveNetwork
 
 TOOL_ICON = os.path.join( ICONPATH, 'gordon.svg')
@@ -48,6 +49,8 @@ def debug(o):
 
 class gordonFP:
     """Creates a surface that skins a network of curves"""
+    supports_draft = True
+
     def __init__(self, obj):
         """Add the properties"""
         obj.addProperty("App::PropertyLinkList", "Sources", "Gordon", "Curve network")
@@ -119,8 +122,10 @@ class gordonFP:
             debug("All profiles are closed")
             #guide_curves.append(guide_curves[0])
         # create the gordon surface
-        gordon_surf = InterpolateCurveNetwork(profile_curves, guide_curves, obj.Tol3D, obj.Tol2D)
-        gordon_surf.max_ctrl_pts = obj.MaxCtrlPts
+        gordon_surf = InterpolateCurveNetwork(profile_curves, guide_curves,
+                                              draft_mode.tolerance(obj, obj.Tol3D),
+                                              draft_mode.tolerance(obj, obj.Tol2D))
+        gordon_surf.max_ctrl_pts = draft_mode.ctrl_pts(obj, obj.MaxCtrlPts)
         #gordon.perform()
         #s = gordon.surface_intersections()
         #debug(s)
@@ -138,11 +143,13 @@ class gordonFP:
         if obj.Output == "Wireframe":
             edges = list()
             u0,u1,v0,v1 = s.bounds()
-            for i in range(obj.SamplesU+1):
-                pu = u0 + (u1-u0)*float(i)/obj.SamplesU
+            nu = draft_mode.samples(obj, obj.SamplesU, minimum=2)
+            nv = draft_mode.samples(obj, obj.SamplesV, minimum=2)
+            for i in range(nu+1):
+                pu = u0 + (u1-u0)*float(i)/nu
                 edges.append(s.uIso(pu).toShape())
-            for i in range(obj.SamplesV+1):
-                pv = v0 + (v1-v0)*float(i)/obj.SamplesV
+            for i in range(nv+1):
+                pv = v0 + (v1-v0)*float(i)/nv
                 edges.append(s.vIso(pv).toShape())
             obj.Shape = Part.Compound(edges)
         else:
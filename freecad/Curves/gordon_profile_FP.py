@@ -15,6 +15,7 @@ import FreeCADGui
 import Part
 from freecad.Curves import _utils
 from freecad.Curves import profile_editor
+from freecad.Curves import profile_solve
 reload(profile_editor)
 
 from freecad.Curves import ICONPATH
@@ -71,43 +72,17 @@ class GordonProfileFP:
         if   not len(fp.Data) == len(fp.DataType):
             FreeCAD.Console.PrintError("Gordon Profile : Data and DataType mismatch\n")
             return(None)
-        pts = list()
-        shape_idx = 0
-        for i in range(len(fp.Data)):
-            if   fp.DataType[i] == 0: # Free point
-                pts.append(fp.Data[i])
-            elif (fp.DataType[i] == 1):
-                if (shape_idx < len(shapes)): # project on shape
-                    d,p,i = Part.Vertex(fp.Data[i]).distToShape(shapes[shape_idx])
-                    if d > fp.Tolerance:
-                        touched = True
-                    pts.append(p[0][1]) #shapes[shape_idx].valueAt(fp.Data[i].x))
-                    shape_idx += 1
-                else:
-                    pts.append(fp.Data[i])
+        pts = list(fp.Data)
+        snapped = [t == 1 for t in fp.DataType]
+        # the i-th snapped point is projected on the i-th support shape
+        proj = [i for i, f in enumerate(snapped) if f][:len(shapes)]
+        if proj:
+            dists, res = profile_solve.project_points([fp.Data[i] for i in proj], shapes[:len(proj)])
+            touched = bool((dists > fp.Tolerance).any())
+            for i, p in zip(proj, res):
+                pts[i] = p
         if stretch and touched:
-            params = [0]
-            knots = [0]
-            moves = [pts[0]-fp.Data[0]]
-            lsum = 0
-            mults = [2]
-            for i in range(1,len(pts)):
-                lsum += fp.Data[i-1].distanceToPoint(fp.Data[i])
-                params.append(lsum)
-                if fp.DataType[i] == 1:
-                    knots.append(lsum)
-                    moves.append(pts[i]-fp.Data[i])
-                    mults.insert(1,1)
-            mults[-1] = 2
-            if len(moves) < 2:
-                return(pts)
-            #FreeCAD.Console.PrintMessage("%s\n%s\n%s\n"%(moves,mults,knots))
-            curve = Part.BSplineCurve()
-            curve.buildFromPolesMultsKnots(moves,mults,knots,False,1)
-            for i in range(1,len(pts)):
-                if fp.DataType[i] == 0:
-                    #FreeCAD.Console.PrintMessage("Stretch %s #%d: %s to %s\n"%(fp.Label,i,pts[i],curve.value(params[i])))
-                    pts[i] += curve.value(params[i])
+            pts = profile_solve.stretch(fp.Data, pts, snapped)
         if touched:
             return pts
         else:
@@ -130,12 +105,9 @@ class GordonProfileFP:
         else:
             pts = obj.Data
 
-        tans = [FreeCAD.Vector()]*len(pts)
-        flags = [False]*len(pts)
-        for i in range(len(obj.Tangents)):
-            tans[i] = obj.Tangents[i]
-        for i in range(len(obj.Flags)):
-            flags[i] = obj.Flags[i]
+        n = len(pts)
+        tans = list(obj.Tangents[:n]) + [FreeCAD.Vector()] * (n - len(obj.Tangents))
+        flags = list(obj.Flags[:n]) + [False] * (n - len(obj.Flags))
         #if not (len(obj.LinearSegments) == len(pts)-1):
             #FreeCAD.Console.PrintError("%s : Points and LinearSegments mismatch\n"%obj.Label)
         if len(obj.LinearSegments) > 0:
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Nurbs binary import / export"
+__author__ = "Christophe Grellier (Chris_G)"
+__license__ = "LGPL 2.1"
+__doc__ = "Import and export of Bezier and BSpline geometries in Curves binary format (*.cnb)."
+
+import os
+import time
+import FreeCAD
+import FreeCADGui
+import Part
+from freecad.Curves import nurbs_binary
+from freecad.Curves import ICONPATH
+
+TOOL_ICON = os.path.join(ICONPATH, 'bezier.svg')
+FILE_FILTER = "Curves NURBS binary (*.{})".format(nurbs_binary.EXTENSION)
+
+
+def process_file(doc, filename):
+    """Adds a compound feature of the geometries stored in filename"""
+    t0 = time.time()
+    geoms = nurbs_binary.read(filename)
+    name = os.path.splitext(os.path.basename(filename))[0]
+    obj = doc.addObject("Part::Feature", name)
+    obj.Shape = Part.Compound(nurbs_binary.to_shapes(geoms))
+    FreeCAD.Console.PrintMessage("{} geometries imported from {} in {:.3f}s\n".format(len(geoms), filename, time.time() - t0))
+    return obj
+
+
+def open(filename):
+    "called when freecad opens a file."
+    docname = os.path.splitext(os.path.basename(filename))[0]
+    doc = FreeCAD.newDocument(docname)
+    process_file(doc, filename)
+    doc.recompute()
+    return doc
+
+
+def insert(filename, docname):
+    "called when freecad imports a file"
+    try:
+        doc = FreeCAD.getDocument(docname)
+    except NameError:
+        doc = FreeCAD.newDocument(docname)
+    process_file(doc, filename)
+    doc.recompute()
+
+
+def export(objects, filename):
+    "called when freecad exports a file"
+    geoms = []
+    for o in objects:
+        if hasattr(o, "Shape"):
+            geoms.extend(nurbs_binary.shape_geometries(o.Shape))
+    nb = nurbs_binary.write(filename, geoms)
+    FreeCAD.Console.PrintMessage("{} geometries exported to {}\n".format(nb, filename))
+
+
+class NurbsBinaryImport:
+    "Imports the geometries of a Curves binary NURBS file"
+    def GetResources(self):
+        return {'Pixmap': TOOL_ICON,
+                'MenuText': "Import NURBS binary",
+                'Accel': "",
+                'ToolTip': "Import BSpline and Bezier geometries from a Curves binary file"}
+
+    def Activated(self):
+        from PySide import QtGui
+        filename = QtGui.QFileDialog.getOpenFileName(None, "Import NURBS binary", "", FILE_FILTER)[0]
+        if filename:
+            doc = FreeCAD.ActiveDocument
+            if not doc:
+                doc = FreeCAD.newDocument()
+            process_file(doc, filename)
+            doc.recompute()
+
+    def IsActive(self):
+        return True
+
+
+class NurbsBinaryExport:
+    "Exports the BSpline and Bezier geometries of the selected objects"
+    def GetResources(self):
+        return {'Pixmap': TOOL_ICON,
+                'MenuText': "Export NURBS binary",
+                'Accel': "",
+                'ToolTip': "Export BSpline and Bezier geometries of the selection to a Curves binary file"}
+
+    def Activated(self):
+        from PySide import QtGui
+        sel = FreeCADGui.Selection.getSelection()
+        if sel == []:
+            FreeCAD.Console.PrintError("Select something first !\n")
+            return
+        filename = QtGui.QFileDialog.getSaveFileName(None, "Export NURBS binary", "", FILE_FILTER)[0]
+        if filename:
+            if not filename.endswith(".{}".format(nurbs_binary.EXTENSION)):
+                filename += ".{}".format(nurbs_binary.EXTENSION)
+            export(sel, filename)
+
+    def IsActive(self):
+        if FreeCAD.ActiveDocument:
+            return True
+        else:
+            return False
+
+
+FreeCADGui.addCommand('nurbs_binary_import', NurbsBinaryImport())
+FreeCADGui.addCommand('nurbs_binary_export', NurbsBinaryExport())
@@ -1,7 +1,66 @@
 import os
+import time
 import FreeCADGui as Gui
 import FreeCAD as App
 from freecad.Curves import ICONPATH
+from freecad.Curves import logger
+from freecad.Curves import command_registry
+
+log = logger.get_logger(__name__)
+
+# Installed before any document restore can import a command module
+command_registry.install_hook()
+
+# Same as import_nurbs_binary.FILE_FILTER, that imports numpy
+NURBS_BINARY_FILTER = "Curves NURBS binary (*.cnb)"
+
+# Modules that need the pivy.graphics interaction library
+PIVY_MODULES = ("gordon_profile_FP",)
+
+# Toolbar commands : (name, module, icon, menu text, tooltip[, checkable])
+COMMANDS = [
+    ("line", "lineFP", "line.svg", "Line", "Creates a line between 2 vertexes"),
+    ("gordon_profile", "gordon_profile_FP", "editableSpline.svg", "Freehand BSpline", "Creates an freehand BSpline curve"),
+    ("mixed_curve", "mixed_curve", "mixed_curve.svg", "Mixed curve", "Builds a 3D curve as the intersection of 2 projected curves"),
+    ("extend", "curveExtendFP", "extendcurve.svg", "Extend Curve", "Extends the selected edge"),
+    ("join", "JoinCurves", "joincurve.svg", "Join Curves", "Joins the selected edges into BSpline Curves"),
+    ("split", "splitCurves_2", "splitcurve.svg", "Split Curve", "Splits the selected edge"),
+    ("Discretize", "Discretize", "discretize.svg", "Discretize", "Discretize an edge or a wire"),
+    ("Approximate", "approximate", "approximate.svg", "Approximate", "Approximate points to NURBS curve or surface"),
+    ("Interpolate", "interpolate", "interpolate.svg", "Interpolate", "Interpolate points with a BSpline curve"),
+    ("ParametricBlendCurve", "ParametricBlendCurve", "blend1.svg", "Blend curve", "Blend curve between two edges."),
+    ("ParametricComb", "ParametricComb", "comb.svg", "Comb plot", "Creates a parametric Comb plot on selected edges"),
+    ("ZebraTool", "ZebraTool", "zebra.svg", "ZebraTool", "Zebra texture for surface inspection"),
+    ("Trim", "TrimFace", "trimFace.svg", "Trim face", "Trim a face with a projected curve"),
+    ("GeomInfo", "GeomInfo", "info.svg", "Geometry Info", "Display info about the geometry of the selected topology", False),
+    ("extract", "ExtractShapes", "extract.svg", "Extract", "Extract selected subshapes from objects"),
+    ("solid", "parametricSolid", "solid.svg", "Make Solid", "Make a parametric solid from selected faces"),
+    ("IsoCurve", "IsoCurve", "isocurve.svg", "IsoCurve", "IsoCurve: Create an IsoCurve from a face"),
+    ("SoS", "Sketch_On_Surface", "sketch_surf.svg", "Sketch on surface", "Map a sketch on a surface"),
+    ("sw2r", "Sweep2Rails", "sw2r.svg", "Sweep2Rails", "Sweep profiles on 2 rails"),
+    ("profileSupportCmd", "ProfileSketch", "profileSupport.svg", "Profile support plane", "Creates a support plane for sketches"),
+    ("cos", "curveOnSurfaceFP", "curveOnSurface.svg", "CurveOnSurface", "Create a curve on surface object"),
+    ("blendSurface", "blendSurfaceFP", "blendSurf.svg", "Blend Surface", "Blend surface between two curveOnSurface objects"),
+    ("pasteSVG", "pasteSVG", "svg_rv3.svg", "Paste SVG", "Paste the SVG content of the clipboard"),
+    ("profile", "pipeshellProfileFP", "profile.svg", "Pipeshell profile", "Creates a Profile object for PipeShell"),
+    ("pipeshell", "pipeshellFP", "pipeshell.svg", "Pipeshell", "Creates a PipeShell sweep object"),
+    ("gordon", "gordonFP", "gordon.svg", "Gordon surface", "Creates a surface that skins a network of curves"),
+    ("segment_surface", "segmentSurfaceFP", "segment_surface.svg", "Segment surface", "Segment a surface on isocurves"),
+    ("to_console", "toConsole", "toconsole.svg", "to Console", "Objects to python console."),
+    ("SublinkEditor", "sublink_edit", "sublink_edit.svg", "Sublink Editor", "Editor widget for sublink properties of objects"),
+    ("comp_spring", "comp_spring", "spring.svg", "Compression Spring", "Parametric Compression Spring"),
+    ("ReflectLines", "ReflectLinesFP", "reflectLines.svg", "Reflect Lines", "Creates the reflect lines on a shape, according to a view direction"),
+    ("MultiLoft", "multiLoftFP", "multiLoft.svg", "MultiLoft", "Loft profile objects made of multiple faces in parallel"),
+]  # "hq_ruled_surface","HelicalSweep"
+
+# Menu and context menu commands
+MENU_COMMANDS = [
+    ("force_recompute", "fingerprint", "view-refresh", "Force recompute", "Recompute the selected objects (or all objects), even if their inputs didn't change"),
+    ("bspline_to_console", "curve_to_script", "toconsole.svg", "BSpline to Console", "BSpline curves to python console"),
+    ("nurbs_binary_import", "import_nurbs_binary", "bezier.svg", "Import NURBS binary", "Import BSpline and Bezier geometries from a Curves binary file"),
+    ("nurbs_binary_export", "import_nurbs_binary", "bezier.svg", "Export NURBS binary", "Export BSpline and Bezier geometries of the selection to a Curves binary file"),
+    ("adjacent_faces", "adjacent_faces", "WhatsThis.svg", "Adjacent faces", "Select the adjacent faces of the selected shape"),
+]
 
 class CurvesWorkbench(Gui.Workbench):
     """FreeCAD workbench that offers a collection of tools mainly related to Nurbs curves and surfaces."""
@@ -13,81 +72,34 @@ class CurvesWorkbench(Gui.Workbench):
     def Initialize(self):
         """This function is executed when FreeCAD starts"""
         
-        #import Sw2R
-        #import PlateSurface
-        #import Birail
-        #import paramVector
-        #import SurfaceEdit
-
-        # TODO changes module names to lower_with_underscore
-
-        #import lineFP # cleaned
-        #import bezierCurve
-        stablelist = list()
-        try:
-            from freecad.Curves import graphics
-            marker = graphics.Marker([App.Vector()])
-            from freecad.Curves import gordon_profile_FP
-            stablelist = []
+        start = time.perf_counter()
+        # graphics.py is built on pivy.coin
+        pivy_graphics = (command_registry.module_available("freecad.Curves.graphics")
+                         and command_registry.module_available("pivy.coin"))
+        if pivy_graphics:
             App.Console.PrintMessage("Pivy.graphics interaction library enabled\n")
-        except:
+        else:
             App.Console.PrintWarning("Pivy.graphics interaction library is not available on this computer\n")
 
-        from freecad.Curves import lineFP # cleaned
-        from freecad.Curves import curveExtendFP # TODO use basisSpline
-        from freecad.Curves import JoinCurves
-        from freecad.Curves import splitCurves_2 # cleaned
-        from freecad.Curves import Discretize # cleaned
-        from freecad.Curves import approximate
-        from freecad.Curves import ParametricBlendCurve # cleaned
-        from freecad.Curves import ParametricComb
-        from freecad.Curves import ZebraTool
-        from freecad.Curves import TrimFace
-        from freecad.Curves import GeomInfo
-        from freecad.Curves import ExtractShapes # cleaned
-        from freecad.Curves import IsoCurve
-        from freecad.Curves import Sketch_On_Surface
-        from freecad.Curves import Sweep2Rails
-        #from freecad.Curves import hooks
-        from freecad.Curves import curveOnSurfaceFP
-        from freecad.Curves import blendSurfaceFP
-        from freecad.Curves import parametricSolid # cleaned
-        from freecad.Curves import ProfileSketch
-        from freecad.Curves import pasteSVG
-        from freecad.Curves import pipeshellProfileFP
-        from freecad.Curves import pipeshellFP
-        from freecad.Curves import gordonFP
-        from freecad.Curves import toConsole
-        from freecad.Curves import mixed_curve
-        from freecad.Curves import curve_to_script
-        from freecad.Curves import sublink_edit
-        from freecad.Curves import adjacent_faces
-        from freecad.Curves import interpolate
-        from freecad.Curves import comp_spring
-        from freecad.Curves import ReflectLinesFP
-        from freecad.Curves import segmentSurfaceFP
-        #from freecad.Curves import OrientedSketchFP
-        #from freecad.Curves import HQRuledSurfaceFP
-        from freecad.Curves import multiLoftFP
-        #from freecad.Curves import HelicalSweepFP
-        #import sectionSketch
-        #if hasattr(Part.BezierSurface,"extendByLength"):
-            #import ExtendSurfaceFP
-
-        stablelist.extend(["line","gordon_profile","mixed_curve","extend","join","split","Discretize",
-                           "Approximate","Interpolate","ParametricBlendCurve","ParametricComb","ZebraTool",
-                           "Trim","GeomInfo","extract","solid","IsoCurve","SoS","sw2r","profileSupportCmd",
-                           "cos","blendSurface","pasteSVG","profile","pipeshell","gordon","segment_surface",
-                           "to_console","SublinkEditor","comp_spring","ReflectLines",
-                           "MultiLoft"]) # "hq_ruled_surface","HelicalSweep"])
-        
+        # The command modules are only imported on first use (see command_registry)
+        # The draft mode module is imported now, to restore its document observer
+        from freecad.Curves import draft_mode
+        table = [c for c in COMMANDS if pivy_graphics or c[1] not in PIVY_MODULES]
+        command_registry.register_all(table)
+        command_registry.register_all(MENU_COMMANDS)
+
         #if hasattr(Part.BezierSurface,"extendByLength"):
             #stablelist.append("extend_surface")
-            
+
+        stablelist = [c[0] for c in table]
         self.appendToolbar("Curves",stablelist)
         self.appendMenu("Curves",stablelist)
         self.appendMenu("Curves",["bspline_to_console"])
-        
+        self.appendMenu("Curves",["nurbs_binary_import","nurbs_binary_export"])
+        self.appendMenu("Curves",["draft_mode","force_recompute"])
+        App.addImportType(NURBS_BINARY_FILTER, "freecad.Curves.import_nurbs_binary")
+        App.addExportType(NURBS_BINARY_FILTER, "freecad.Curves.import_nurbs_binary")
+        log.info("Curves workbench initialized in {:.1f} ms", (time.perf_counter() - start) * 1000)
 
     def Activated(self):
         """This function is executed when the workbench is activated"""
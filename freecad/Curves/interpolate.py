@@ -6,10 +6,12 @@ __license__ = "LGPL 2.1"
 __doc__ = "Interpolate a set of points."
 
 import os
+import numpy as np
 import FreeCAD
 import FreeCADGui
 import Part
 from freecad.Curves import _utils
+from freecad.Curves import nurbs_array
 from freecad.Curves import ICONPATH
 
 TOOL_ICON = os.path.join( ICONPATH, 'interpolate.svg')
@@ -101,31 +103,40 @@ class Interpolate:
 
     def detect_aligned_pts(self, fp, pts):
         tol = .99
-        tans = fp.Tangents
-        flags = [False]*len(pts) #list(fp.TangentFlags)
-        for i in range(len(pts)-2):
-            v1 = pts[i+1]-pts[i]
-            v2 = pts[i+2]-pts[i+1]
-            l1 = v1.Length
-            l2 = v2.Length
-            v1.normalize()
-            v2.normalize()
-            if v1.dot(v2) > tol:
-                debug("aligned points detected : %d - %d - %d"%(i,i+1,i+2))
-                tans[i] = v1.multiply(l1/3.0)
-                tans[i+2] = v2.multiply(l2/3.0)
-                tans[i+1] = (v1+v2).multiply(min(l1,l2)/6.0)
-                flags[i] = True
-                flags[i+1] = True
-                flags[i+2] = True
-        fp.Tangents = tans
-        fp.TangentFlags = flags
-        
+        arr = nurbs_array.to_array(pts)
+        if len(fp.Tangents) == len(pts):
+            tans = nurbs_array.to_array(fp.Tangents)
+        else:
+            tans = np.zeros((len(pts), 3))
+        flags = np.zeros(len(pts), dtype=bool)
+        v1 = arr[1:-1] - arr[:-2]
+        v2 = arr[2:] - arr[1:-1]
+        l1 = np.linalg.norm(v1, axis=1)
+        l2 = np.linalg.norm(v2, axis=1)
+        u1 = nurbs_array.unit_vectors(v1)
+        u2 = nurbs_array.unit_vectors(v2)
+        idx = np.nonzero((u1 * u2).sum(axis=1) > tol)[0]
+        for i in idx:
+            debug("aligned points detected : %d - %d - %d"%(i,i+1,i+2))
+        # same overwriting order as a sequential loop on the aligned triplets
+        tans[idx + 2] = u2[idx] * (l2[idx] / 3.0)[:, np.newaxis]
+        tans[idx + 1] = (u1[idx] + u2[idx]) * (np.minimum(l1[idx], l2[idx]) / 6.0)[:, np.newaxis]
+        tans[idx] = u1[idx] * (l1[idx] / 3.0)[:, np.newaxis]
+        flags[idx] = True
+        flags[idx + 1] = True
+        flags[idx + 2] = True
+        fp.Tangents = nurbs_array.to_vectors(tans)
+        fp.TangentFlags = flags.tolist()
+
+    def default_tangents(self, bs, params):
+        """Unit tangents of curve bs at params, in a single batched evaluation"""
+        ders = nurbs_array.curve_derivatives(bs, params, 1)
+        return nurbs_array.to_vectors(nurbs_array.unit_vectors(ders[1]))
 
     def execute(self, obj):
         debug("* Interpolate : execute *")
         pts = self.getPoints(obj)
-        self.setParameters(obj)
+        self.setParameters(obj, pts)
         if obj.Polygonal:
             if obj.Periodic:
                 pts.append(pts[0])
@@ -140,9 +151,9 @@ class Interpolate:
             bs.interpolate(Points=pts, PeriodicFlag=obj.Periodic, Tolerance=obj.Tolerance, Parameters=obj.Parameters)
             if not (len(obj.Tangents) == len(pts) and len(obj.TangentFlags) == len(pts)): # or obj.DetectAligned:
                 if obj.Periodic:
-                    obj.Tangents = [bs.tangent(p)[0] for p in obj.Parameters[0:-1]]
+                    obj.Tangents = self.default_tangents(bs, obj.Parameters[0:-1])
                 else:
-                    obj.Tangents = [bs.tangent(p)[0] for p in obj.Parameters]
+                    obj.Tangents = self.default_tangents(bs, obj.Parameters)
                 obj.TangentFlags = [True]*len(pts)
             if obj.CustomTangents: # or obj.DetectAligned:
                 #if obj.DetectAligned:
@@ -150,11 +161,10 @@ class Interpolate:
                 bs.interpolate(Points=pts, PeriodicFlag=obj.Periodic, Tolerance=obj.Tolerance, Parameters=obj.Parameters, Tangents=obj.Tangents, TangentFlags=obj.TangentFlags) #, Scale=False)
         obj.Shape = bs.toShape()
 
-    def setParameters(self, obj):
+    def setParameters(self, obj, pts=None):
         # Computes a knot Sequence for a set of points
         # fac (0-1) : parameterization factor
         # fac=0 -> Uniform / fac=0.5 -> Centripetal / fac=1.0 -> Chord-Length
-        pts = self.getPoints(obj)
         val = 1.0 # Chord-length
         if obj.Parametrization == "Custom":
             return
@@ -163,15 +173,11 @@ class Interpolate:
             val = 0.5
         elif obj.Parametrization == "Uniform":
             val = 0.0
-        if obj.Periodic: # we need to add the first point as the end point
-            pts.append(pts[0])
-        params = [0]
-        for i in range(1,len(pts)):
-            p = pts[i].sub(pts[i-1])
-            pl = pow(p.Length, val)
-            params.append(params[-1] + pl)
-        m = float(max(params))
-        obj.Parameters = [p/m for p in params]
+        if pts is None:
+            pts = self.getPoints(obj)
+        # the first point is added as the end point if periodic
+        params = nurbs_array.chord_parameters(nurbs_array.to_array(pts), val, obj.Periodic)
+        obj.Parameters = params.tolist()
 
     def touch_parametrization(self, fp):
         p = fp.Parametrization
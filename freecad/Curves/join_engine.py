@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Join engine"
+__author__ = "Christophe Grellier (Chris_G)"
+__license__ = "LGPL 2.1"
+__doc__ = "Bulk joining of BSpline curves, chained by endpoint topology."
+
+import numpy as np
+import FreeCAD
+import Part
+from freecad.Curves import continuity
+from freecad.Curves import logger
+
+log = logger.get_logger(__name__)
+
+
+class EndpointHash(object):
+    """Spatial hash of points on a uniform grid of cell size tol.
+    Points closer than tol are always found in neighbouring cells."""
+    def __init__(self, tol):
+        self.tol = max(tol, 1e-12)
+        self.cells = dict()
+        self.points = []
+
+    def _cell(self, pt):
+        return tuple(int(np.floor(x / self.tol)) for x in pt)
+
+    def add(self, pt):
+        """Adds a point and returns its index"""
+        idx = len(self.points)
+        self.points.append(np.asarray(pt, dtype=float))
+        self.cells.setdefault(self._cell(pt), []).append(idx)
+        return idx
+
+    def near(self, pt):
+        """Returns the indices of the points closer than tol to pt"""
+        pt = np.asarray(pt, dtype=float)
+        cx, cy, cz = self._cell(pt)
+        res = []
+        for i in (cx - 1, cx, cx + 1):
+            for j in (cy - 1, cy, cy + 1):
+                for k in (cz - 1, cz, cz + 1):
+                    for idx in self.cells.get((i, j, k), []):
+                        if np.linalg.norm(self.points[idx] - pt) <= self.tol:
+                            res.append(idx)
+        return res
+
+
+def endpoint_vertices(curves, tol):
+    """Merges the endpoints of the curves that are closer than tol
+    vertex_of, ends_of = endpoint_vertices(curves, tol)
+    Endpoint 2*i is the start of curve i, endpoint 2*i+1 is its end.
+    vertex_of[endpoint] is the merged vertex index,
+    ends_of[vertex] is the list of endpoints of this vertex."""
+    hsh = EndpointHash(tol)
+    vertex_of = []
+    ends_of = []
+    for c in curves:
+        for pt in (c.StartPoint, c.EndPoint):
+            near = hsh.near((pt.x, pt.y, pt.z))
+            hsh.add((pt.x, pt.y, pt.z))
+            if near:
+                v = vertex_of[near[0]]
+            else:
+                v = len(ends_of)
+                ends_of.append([])
+            vertex_of.append(v)
+            ends_of[v].append(len(vertex_of) - 1)
+    return vertex_of, ends_of
+
+
+def find_chains(curves, tol):
+    """Sorts the curves into chains connected by their endpoints
+    chains = find_chains(curves, tol)
+    Each chain is a list of (curve index, reversed) tuples.
+    Chains stop at free ends and at vertices shared by more than 2 curves.
+    The input order is kept as far as possible : chains start
+    at the first unused curve, and are extended at both ends."""
+    vertex_of, ends_of = endpoint_vertices(curves, tol)
+    used = [False] * len(curves)
+
+    def next_end(end):
+        "Returns the endpoint connected to 'end', or None"
+        ends = ends_of[vertex_of[end]]
+        if len(ends) != 2:
+            return None
+        other = ends[0] if ends[1] == end else ends[1]
+        if used[other // 2]:
+            return None
+        return other
+
+    chains = []
+    for i in range(len(curves)):
+        if used[i]:
+            continue
+        used[i] = True
+        chain = [(i, False)]
+        # extend forward from the end of curve i
+        end = 2 * i + 1
+        while True:
+            other = next_end(end)
+            if other is None:
+                break
+            idx, rev = other // 2, bool(other % 2)
+            used[idx] = True
+            chain.append((idx, rev))
+            end = 2 * idx + (0 if rev else 1)
+        # extend backward from the start of curve i
+        end = 2 * i
+        while True:
+            other = next_end(end)
+            if other is None:
+                break
+            idx, rev = other // 2, not bool(other % 2)
+            used[idx] = True
+            chain.insert(0, (idx, rev))
+            end = 2 * idx + (1 if rev else 0)
+        chains.append(chain)
+    log.debug("{} curves sorted in {} chains", len(curves), len(chains))
+    return chains
+
+
+class CurveData(object):
+    "Pole, weight, knot and mult arrays of a clamped BSpline curve"
+    def __init__(self, bs, reverse=False):
+        self.degree = bs.Degree
+        self.poles = np.array([(p.x, p.y, p.z) for p in bs.getPoles()], dtype=float)
+        self.weights = np.array(bs.getWeights(), dtype=float)
+        self.knots = np.array(bs.getKnots(), dtype=float)
+        self.mults = np.array(bs.getMultiplicities(), dtype=int)
+        self.rational = bs.isRational()
+        if reverse:
+            self.poles = self.poles[::-1]
+            self.weights = self.weights[::-1]
+            self.knots = (self.knots[0] + self.knots[-1] - self.knots)[::-1]
+            self.mults = self.mults[::-1]
+
+    def start_derivative(self):
+        "First derivative at start, from the first two poles"
+        p = self.degree
+        seq = np.repeat(self.knots, self.mults)
+        dt = seq[p + 1] - seq[1]
+        return p / dt * self.weights[1] / self.weights[0] * (self.poles[1] - self.poles[0])
+
+    def end_derivative(self):
+        "First derivative at end, from the last two poles"
+        p = self.degree
+        seq = np.repeat(self.knots, self.mults)
+        dt = seq[-2] - seq[-p - 2]
+        return p / dt * self.weights[-2] / self.weights[-1] * (self.poles[-1] - self.poles[-2])
+
+
+def aligned_tangents(d0, d1, tol):
+    "Same test as JoinCurves.alignedTangents, on derivative vectors"
+    n0 = np.linalg.norm(d0)
+    n1 = np.linalg.norm(d1)
+    if n0 == 0 or n1 == 0:
+        return False
+    return np.linalg.norm(d0 / n0 - d1 / n1) < tol
+
+
+def concatenate(data):
+    """Concatenates a list of oriented CurveData, of same degree, in one pass
+    bs = concatenate(data)
+    Each junction gets a knot of multiplicity degree, as nurbs_tools.join_curve does.
+    The start pole of each curve is merged with the end pole of the previous one.
+    Knot spans are scaled so that the first derivatives have the same magnitude
+    at the junctions. Weights are scaled to match at the junctions."""
+    degree = data[0].degree
+    poles = [data[0].poles]
+    weights = [data[0].weights]
+    knots = [data[0].knots]
+    mults = [data[0].mults[:-1]]
+    end_der = data[0].end_derivative()
+    for d in data[1:]:
+        start_der = d.start_derivative()
+        n0 = np.linalg.norm(end_der)
+        n1 = np.linalg.norm(start_der)
+        scale = n1 / n0 if (n0 > 0 and n1 > 0) else 1.0
+        k = knots[-1][-1] + (d.knots - d.knots[0]) * scale
+        w = d.weights * weights[-1][-1] / d.weights[0]
+        poles.append(d.poles[1:])
+        weights.append(w[1:])
+        knots.append(k[1:])
+        mults.append([degree])
+        mults.append(d.mults[1:-1])
+        end_der = d.end_derivative() / scale
+    mults.append([degree + 1])
+    poles = np.concatenate(poles)
+    weights = np.concatenate(weights)
+    knots = np.concatenate(knots)
+    mults = np.concatenate(mults).astype(int)
+    rational = any(d.rational for d in data)
+    bs = Part.BSplineCurve()
+    bs.buildFromPolesMultsKnots([FreeCAD.Vector(*p) for p in poles.tolist()],
+                                mults.tolist(), knots.tolist(), False, degree,
+                                weights.tolist(), rational)
+    return bs
+
+
+def join_chain(curves, chain, tol, corner_break=False):
+    """Joins a chain of curves into a list of BSpline curves
+    The junctions with a tangent angle below the tolerance angle are made C1.
+    With corner_break, the chain is split at the other junctions."""
+    degree = max(curves[i].Degree for i, r in chain)
+    data = []
+    for i, rev in chain:
+        c = curves[i]
+        if c.Degree < degree:
+            c = c.copy()
+            c.increaseDegree(degree)
+        data.append(CurveData(c, rev))
+    groups = [[data[0]]]
+    for d in data[1:]:
+        if corner_break and not aligned_tangents(groups[-1][-1].end_derivative(), d.start_derivative(), tol):
+            log.debug("No tangency, adding breakpoint")
+            groups.append([d])
+        else:
+            groups[-1].append(d)
+    result = []
+    max_angle = continuity.tolerance_angle(tol)
+    for group in groups:
+        bs, table, corners = continuity.repair(concatenate(group), max_angle, tol=tol)
+        log.debug("{}", lambda: continuity.table_string(table))
+        if corners and corner_break:
+            log.debug("Failed to smooth {} junctions", len(corners))
+            bounds = [bs.FirstParameter] + corners + [bs.LastParameter]
+            for u0, u1 in zip(bounds[:-1], bounds[1:]):
+                c = bs.copy()
+                c.segment(u0, u1)
+                result.append(c)
+        else:
+            result.append(bs)
+    return result
+
+
+def join_curves(curves, tol, corner_break=False):
+    """Joins BSpline curves into a list of BSpline curves, in a single pass
+    outcurves = join_curves(curves, tol, corner_break=False)
+    The curves are chained by their endpoints closer than tol, whatever their order,
+    the poles, knots and mults of each chain are concatenated at once,
+    and the tangency of the junctions is repaired at the end (see continuity.repair)."""
+    outcurves = []
+    for chain in find_chains(curves, tol):
+        outcurves.extend(join_chain(curves, chain, tol, corner_break))
+    return outcurves
@@ -1,9 +1,13 @@
 import os
 import math
+import numpy as np
 import FreeCAD
 import FreeCADGui
 import Part
 from freecad.Curves import _utils
+from freecad.Curves import nurbs_array
+from freecad.Curves import logger
+from freecad.Curves import rail_frames
 from freecad.Curves import ICONPATH
 from FreeCAD import Base
 from operator import itemgetter
@@ -13,6 +17,37 @@ fac = 1.0
 DEBUG = False
 EXTEND = True
 
+log = logger.get_logger(__name__)
+
+
+def transform_poles(poles, mat):
+    """Applies the (4, 4) matrix mat to a (n, 3) array of poles, as an (n, 4) homogeneous array"""
+    hpoles = np.hstack((poles, np.ones((len(poles), 1))))
+    return hpoles.dot(mat.T)[:, :3]
+
+
+def rebuild_curve(bs, poles):
+    """Returns a copy of BSpline curve bs, with its poles replaced by the (n, 3) array poles"""
+    c = Part.BSplineCurve()
+    c.buildFromPolesMultsKnots(nurbs_array.to_vectors(poles), bs.getMultiplicities(), bs.getKnots(),
+                               bs.isPeriodic(), bs.Degree, bs.getWeights(), bs.isRational())
+    return c
+
+
+def profile_bspline(edge, samples=100):
+    """Returns a BSpline edge of the profile.
+    BSpline profiles are used as is, other curves are approximated."""
+    if isinstance(edge.Curve, Part.BSplineCurve):
+        bs = edge.Curve.copy()
+        first, last = edge.ParameterRange
+        if (first > bs.FirstParameter) or (last < bs.LastParameter):
+            bs.segment(first, last)
+        return Part.Edge(bs)
+    pts = edge.discretize(samples)
+    bspline = Part.BSplineCurve()
+    bspline.approximate(Points=pts, ParamType='Chordlength')  # 'Uniform' 'Centripetal'
+    return Part.Edge(bspline)
+
 
 class profile:
     
@@ -39,6 +74,18 @@ class birail:
         self.normBin = False
         self.normNor = True
         self.paramCurves = []
+        self.frameSamples = 200
+        self._field = None
+
+    @property
+    def field(self):
+        """The RailFrameField of the rails, built on first use"""
+        if self._field is None:
+            self._field = rail_frames.RailFrameField(self.rails, self.ruled, self.frameSamples)
+        self._field.normTan = self.normTan
+        self._field.normBin = self.normBin
+        self._field.normNor = self.normNor
+        return self._field
 
     def tangentAt(self, p, i):
         if self.normTan:
@@ -71,14 +118,12 @@ class birail:
         n = self.normalAt(p,i)
         return((b, t, n))
 
+    def matricesAt(self, params, i):
+        """Returns the (n, 4, 4) array of the frame matrices of rail i at params"""
+        return self.field.matrices(params, i)
+
     def matrixAt(self, p, i):
-        t = self.rails[i].valueAt(p)
-        u,v,w = self.frameAt(p,i)
-        m = FreeCAD.Matrix( u.x, v.x, w.x, t.x,
-                            u.y, v.y, w.y, t.y,
-                            u.z, v.z, w.z, t.z,
-                            0.0, 0.0, 0.0, 1.0)
-        return(m)
+        return(rail_frames.to_matrix(self.matricesAt([p], i)[0]))
     
 
 class SweepOn2Rails:
@@ -110,22 +155,58 @@ class SweepOn2Rails:
         # Check and reverse profile here
         pro1ContactParam = pro.Curve.parameter(sols1[0])
         pro2ContactParam = pro.Curve.parameter(sols2[0])
-        FreeCAD.Console.PrintMessage('\nProfile parameters :\n%s\n%s\n'%(str(pro1ContactParam),str(pro2ContactParam)))
+        log.debug('Profile parameters : {} - {}', pro1ContactParam, pro2ContactParam)
         #if pro1ContactParam > pro2ContactParam:
             #return((rail1ContactParam, rail2ContactParam, pro, pro2ContactParam, pro1ContactParam))
         #else:
             #return((rail1ContactParam, rail2ContactParam, pro, pro1ContactParam, pro2ContactParam))
         return((rail1ContactParam, rail2ContactParam, pro, pro1ContactParam, pro2ContactParam))
             
-    def setProfiles(self, plist):
+    def railEvaluator(self, i):
+        """Returns the evaluator of rail i, and a flag telling
+        that its parametrization differs from the rail curve"""
+        rail = self.birail.rails[i]
+        if isinstance(rail.Curve, Part.BSplineCurve):
+            return nurbs_array.CurveEvaluator(rail.Curve), False
+        bs = rail.Curve.toBSpline(rail.FirstParameter, rail.LastParameter)
+        return nurbs_array.CurveEvaluator(bs), True
+
+    def getContactParamsBatch(self, pros, refine=2):
+        """Batched version of getContactParams, for a list of BSpline edges.
+        The dense polylines of all the profiles are projected on each rail at once.
+        The closest sample of each profile is then refined by alternate projections."""
+        evs = [nurbs_array.CurveEvaluator(pro.Curve) for pro in pros]
+        polys = [ev.polyline()[1] for ev in evs]
+        bounds = np.cumsum([0] + [len(p) for p in polys])
+        pts = np.vstack(polys)
+        contacts = []
+        for i in range(2):
+            rev, reparam = self.railEvaluator(i)
+            t = rev.closest_parameters(pts)
+            dist = np.linalg.norm(rev.values(t) - pts, axis=1)
+            best = [bounds[k] + np.argmin(dist[bounds[k]:bounds[k + 1]]) for k in range(len(pros))]
+            rail_params = t[best]
+            pro_params = np.empty(len(pros))
+            for _ in range(refine):
+                rail_pts = rev.values(rail_params)
+                for k, ev in enumerate(evs):
+                    pro_params[k] = ev.closest_parameters(rail_pts[k])[0]
+                pro_pts = np.array([ev.values([u])[0] for u, ev in zip(pro_params, evs)])
+                rail_params = rev.closest_parameters(pro_pts)
+            if reparam:
+                rail = self.birail.rails[i].Curve
+                rail_params = [rail.parameter(v) for v in nurbs_array.to_vectors(rev.values(rail_params))]
+            contacts.append((list(rail_params), pro_params.tolist()))
         data = []
+        for k, pro in enumerate(pros):
+            log.debug('Profile parameters : {} - {}', contacts[0][1][k], contacts[1][1][k])
+            data.append((float(contacts[0][0][k]), float(contacts[1][0][k]), pro, contacts[0][1][k], contacts[1][1][k]))
+        return data
+
+    def setProfiles(self, plist):
         self.knots1, self.knots2 = [],[]
-        for pro in plist:
-            pts = pro.discretize(100)
-            bspline = Part.BSplineCurve()
-            bspline.approximate(Points = pts, ParamType = 'Chordlength') # 'Uniform' 'Centripetal'
-            bs = Part.Edge(bspline) #, pro.FirstParameter, pro.LastParameter)
-            data.append(self.getContactParams(bs))
+        edges = [profile_bspline(pro) for pro in plist]
+        data = self.getContactParamsBatch(edges)
         sortedProfs = sorted(data,key=itemgetter(0)) # Sort profiles on rail1ContactParam
         self.profiles = []
         for datum in sortedProfs:
@@ -138,18 +219,18 @@ class SweepOn2Rails:
             p.LastParameter = datum[4]
             self.getLocalProfile(p)
             self.profiles.append(p)
-            FreeCAD.Console.PrintMessage("\n Profile : %f - %f\n"%(p.Rail1Param,p.Rail2Param))
+            log.debug('Profile : {:f} - {:f}', p.Rail1Param, p.Rail2Param)
         if len(plist) == 1:
             self.extend = True
-            FreeCAD.Console.PrintMessage('\n1 Profile given\n')
-        FreeCAD.Console.PrintMessage('\nProfiles sorted\n')
+            log.info('1 Profile given')
+        log.debug('Profiles sorted')
 
     def setBirailParametrization(self):
         pts1 = []
         pts2 = []
         kts = []
         for i in range(len(self.knots1)):
-            FreeCAD.Console.PrintMessage("\n param : %f - %f\n"%(self.knots1[i],self.knots2[i]))
+            log.debug('param : {:f} - {:f}', self.knots1[i], self.knots2[i])
             pts1.append(Base.Vector2d(i, self.knots1[i]))
             pts2.append(Base.Vector2d(i, self.knots2[i]))
             kts.append(i)
@@ -160,30 +241,25 @@ class SweepOn2Rails:
         self.birail.paramCurves = (bs1, bs2)            
 
     def getLocalProfile(self, pro):
-        m1 = self.birail.matrixAt(pro.Rail1Param,0)
-        m2 = self.birail.matrixAt(pro.Rail2Param,1)
-        FreeCAD.Console.PrintMessage('\nMatrix 1\n%s\n'%str(m1))
-        FreeCAD.Console.PrintMessage('\nMatrix 2\n%s\n'%str(m2))
-        # Not sure it will work on Curve Poles ----v
-        pts = pro.realCurve.Curve.getPoles()
-        c1 = pro.realCurve.Curve.copy()
-        c2 = pro.realCurve.Curve.copy()
-        for i in range(len(pts)):
-            #np = m1.inverse().multiply(p)
-            c1.setPole(i+1, m1.inverse().multiply(pts[i]))
-            c2.setPole(i+1, m2.inverse().multiply(pts[i]))
+        m1 = self.birail.matricesAt([pro.Rail1Param], 0)[0]
+        m2 = self.birail.matricesAt([pro.Rail2Param], 1)[0]
+        log.debug('Matrix 1\n{}\nMatrix 2\n{}', m1, m2)
+        bs = pro.realCurve.Curve
+        pts = nurbs_array.to_array(bs.getPoles())
+        c1 = rebuild_curve(bs, transform_poles(pts, np.linalg.inv(m1)))
+        c2 = rebuild_curve(bs, transform_poles(pts, np.linalg.inv(m2)))
         pro.localCurve1 = Part.Edge(c1, pro.FirstParameter, pro.LastParameter)
         pro.localCurve2 = Part.Edge(c2, pro.FirstParameter, pro.LastParameter)
 
     def getLocalProfiles(self):
         i = 0
         for pro in self.profiles:
-            FreeCAD.Console.PrintMessage('\nComputing local Profile %d\n'%(i+1))
+            log.debug('Computing local Profile {}', i + 1)
             self.getLocalProfile(pro)
             i += 1
 
     def extendProfiles(self):
-        FreeCAD.Console.PrintMessage('\nextending ...\n')
+        log.debug('extending ...')
         p0 = self.profiles[0]
         p1 = self.profiles[-1]
         if (not p0.Rail1Param == self.birail.rails[0].FirstParameter) and (not p0.Rail2Param == self.birail.rails[1].FirstParameter):
@@ -206,9 +282,9 @@ class SweepOn2Rails:
             self.profiles.append(p)
             self.knots1.append(p.Rail1Param)
             self.knots2.append(p.Rail2Param)
-        FreeCAD.Console.PrintMessage('\nNumber of profiles : %d\n'%len(self.profiles))
+        log.info('Number of profiles : {}', len(self.profiles))
         for p in self.profiles:
-            FreeCAD.Console.PrintMessage("\n Profile : %f - %f\n"%(p.Rail1Param,p.Rail2Param))
+            log.debug('Profile : {:f} - {:f}', p.Rail1Param, p.Rail2Param)
 
     def translateLocalProfiles(self):
         for i in range(len(self.profiles)):
@@ -282,41 +358,24 @@ class SweepOn2Rails:
         return(Part.Compound(el))
 
     def discretize(self):
-        p1 = []
-        p2 = []
         n = len(self.profiles) - 1
         #gr = int(1.0 * self.railSamples / n) + 1
         #self.railSamples = gr * n
-        for i in range(self.railSamples):
-            pts1 = []
-            pts2 = []
-            t = 1.0 * n * i / (self.railSamples - 1)
-            # Get the good matrices from the birail
-            t1 = self.birail.paramCurves[0].value(t).y
-            t2 = self.birail.paramCurves[1].value(t).y
-            m1 = self.birail.matrixAt(t1,0)
-            m2 = self.birail.matrixAt(t2,1)
-            for ri in range(self.profileSamples):
-
-
+        params = [1.0 * n * i / (self.railSamples - 1) for i in range(self.railSamples)]
+        # Get the good matrices from the birail
+        t1 = [self.birail.paramCurves[0].value(t).y for t in params]
+        t2 = [self.birail.paramCurves[1].value(t).y for t in params]
+        mats = (self.birail.matricesAt(t1, 0), self.birail.matricesAt(t2, 1))
+        results = ([], [])
+        for r in range(2):
+            curves = self.interpoCurves[r]
+            for i, t in enumerate(params):
                 # Pick a point on interpolating curves
-                e1 = Part.Edge(self.interpoCurves[0][ri])
-                pt1 = e1.valueAt(t) #u1)
-                
-                e2 = Part.Edge(self.interpoCurves[1][ri])
-                pt2 = e2.valueAt(t) #u2)
-                
-                v = FreeCAD.Vector(self.transvec)
-                v.multiply(- t * self.fac)
-                
-                pts1.append(m1.multiply(pt1.add(v)))
-                pts2.append(m2.multiply(pt2.add(v)))
-                
-            p1.append(pts1)
-            p2.append(pts2)
-            
-        self.results = (p1,p2)
- 
+                pts = nurbs_array.to_array([c.value(t) for c in curves])
+                pts -= np.array((self.transvec.x, self.transvec.y, self.transvec.z)) * t * self.fac
+                results[r].append(nurbs_array.to_vectors(transform_poles(pts, mats[r][i])))
+        self.results = results
+
     def downgradeArray(self):
         pt1 = []
         for row in self.result:
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Logger"
+__author__ = "Christophe Grellier (Chris_G)"
+__license__ = "LGPL 2.1"
+__doc__ = "Structured logging of the Curves workbench, with per-module levels and rate limiting."
+
+import time
+import FreeCAD
+
+# Usage :
+# log = logger.get_logger(__name__)
+# log.debug("{} poles : {}", len(poles), poles)
+# Messages are only formatted if the level of the logger is enabled.
+# Arguments that are callables are only called at formatting time,
+# so that expensive diagnostics are never computed when disabled :
+# log.debug("distance : {}", lambda: sh.distToShape(edge)[0])
+# Levels are read from the preferences (Mod/Curves/Logging group),
+# with a string entry per module name, and a "Default" entry.
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVELS = {"debug": DEBUG,
+          "info": INFO,
+          "warning": WARNING,
+          "error": ERROR,
+          "off": OFF}
+
+PARAM_PATH = "User parameter:BaseApp/Preferences/Mod/Curves/Logging"
+
+_loggers = dict()
+_levels = dict()
+
+
+def _parse_level(level):
+    if isinstance(level, str):
+        return LEVELS.get(level.lower(), INFO)
+    return int(level)
+
+
+def _param_level(name, default):
+    try:
+        value = FreeCAD.ParamGet(PARAM_PATH).GetString(name, "")
+    except Exception:
+        value = ""
+    if value:
+        return _parse_level(value)
+    return default
+
+
+def default_level():
+    """Returns the level of the loggers that have no specific level"""
+    if None not in _levels:
+        _levels[None] = _param_level("Default", INFO)
+    return _levels[None]
+
+
+def set_level(level, name=None):
+    """Sets the level of the logger 'name' (short or full module name),
+    or the default level if name is None.
+    level is an int or a level name ('debug', 'info', 'warning', 'error', 'off')"""
+    _levels[name] = _parse_level(level)
+    for lg in _loggers.values():
+        if name is None or name in (lg.name, lg.short_name):
+            lg._level = None
+
+
+class RateLimiter(object):
+    """Token bucket that allows 'burst' messages at once,
+    and 'rate' messages per second on average"""
+    def __init__(self, rate=20.0, burst=50):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.stamp = time.monotonic()
+        self.suppressed = 0
+
+    def allow(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        self.suppressed += 1
+        return False
+
+
+class Logger(object):
+    """Logger of a module of the workbench
+    Use get_logger(__name__) to get the shared instance."""
+    def __init__(self, name):
+        self.name = name
+        self.short_name = name.split(".")[-1]
+        self._level = None
+        self.limiter = RateLimiter()
+
+    @property
+    def level(self):
+        if self._level is None:
+            if self.name in _levels:
+                self._level = _levels[self.name]
+            elif self.short_name in _levels:
+                self._level = _levels[self.short_name]
+            else:
+                self._level = _param_level(self.short_name, default_level())
+        return self._level
+
+    def enabled(self, level=DEBUG):
+        """Returns True if messages of this level are output.
+        Use it to guard the computation of expensive diagnostics."""
+        return level >= self.level
+
+    def _format(self, msg, args):
+        if callable(msg):
+            msg = msg()
+        if args:
+            msg = str(msg).format(*[a() if callable(a) else a for a in args])
+        return "[{}] {}\n".format(self.short_name, msg)
+
+    def log(self, level, msg, *args):
+        """Outputs msg.format(*args) if level is enabled and the rate limit is not reached.
+        Errors are never rate limited."""
+        if level < self.level:
+            return
+        if level < ERROR and not self.limiter.allow():
+            return
+        text = self._format(msg, args)
+        if self.limiter.suppressed:
+            text = "[{}] ({} messages suppressed)\n{}".format(self.short_name, self.limiter.suppressed, text)
+            self.limiter.suppressed = 0
+        if level >= ERROR:
+            FreeCAD.Console.PrintError(text)
+        elif level >= WARNING:
+            FreeCAD.Console.PrintWarning(text)
+        else:
+            FreeCAD.Console.PrintMessage(text)
+
+    def debug(self, msg, *args):
+        self.log(DEBUG, msg, *args)
+
+    def info(self, msg, *args):
+        self.log(INFO, msg, *args)
+
+    def warning(self, msg, *args):
+        self.log(WARNING, msg, *args)
+
+    def error(self, msg, *args):
+        self.log(ERROR, msg, *args)
+
+
+def get_logger(name):
+    """Returns the shared logger of module 'name'"""
+    if name not in _loggers:
+        _loggers[name] = Logger(name)
+    return _loggers[name]
@@ -10,6 +10,7 @@ import FreeCAD
 import FreeCADGui
 import Part
 from freecad.Curves import approximate_extension
+from freecad.Curves import surface_intersection
 from freecad.Curves import _utils
 from freecad.Curves import ICONPATH
 
@@ -31,19 +32,15 @@ class MixedCurve:
             self.dir2 = dir2
         else:
             raise ValueError("Vector is null")
+        self.clip = True
+        self.parallel = False
+        self.processes = None
 
     def shape(self):
         proj1 = self.shape1.toNurbs().extrude(self.dir1)
         proj2 = self.shape2.toNurbs().extrude(self.dir2)
-        curves = list()
-        for f1 in proj1.Faces:
-            for f2 in proj2.Faces:
-                curves += f1.Surface.intersectSS(f2.Surface)
-        intersect = [c.toShape() for c in curves]
-        edges = []
-        for sh in intersect:
-            if isinstance(sh, Part.Edge) and sh.Length > 1e-7:
-                edges.append(sh)
+        edges = surface_intersection.intersect_extrusions(proj1.Faces, proj2.Faces, self.dir1, self.dir2,
+                                                          self.clip, self.parallel, self.processes)
         se = Part.sortEdges(edges)
         wires = []
         for el in se:
@@ -58,6 +55,8 @@ class MixedCurveFP:
         obj.addProperty("App::PropertyLink", "Shape2", "Mixed Curve", "Second shape").Shape2 = s2
         obj.addProperty("App::PropertyVector", "Direction1", "Mixed Curve", "Projection direction of the first shape.\nIf vector is null, shape's placement is used.").Direction1 = d1
         obj.addProperty("App::PropertyVector", "Direction2", "Mixed Curve", "Projection direction of the second shape.\nIf vector is null, shape's placement is used.").Direction2 = d2
+        obj.addProperty("App::PropertyBool", "Parallel", "Mixed Curve", "Compute the surface intersections in worker processes").Parallel = False
+        obj.addProperty("App::PropertyInteger", "Processes", "Mixed Curve", "Number of worker processes (0 = number of cores)").Processes = 0
         obj.Proxy = self
 
     def execute(self, obj):
@@ -72,12 +71,19 @@ class MixedCurveFP:
         else:
             d2 = obj.Direction2
         cc = MixedCurve(s1, s2, d1, d2)
+        if hasattr(obj, "Parallel"):
+            cc.parallel = obj.Parallel
+            cc.processes = obj.Processes
+        else:
+            cc.clip = False
         if hasattr(obj, "ExtensionProxy"):
             obj.Shape = obj.ExtensionProxy.approximate(obj, cc.shape().Edges)
         else:
             obj.Shape = cc.shape()
 
     def onChanged(self, fp, prop):
+        if prop == "Processes" and fp.Processes < 0:
+            fp.Processes = 0
         if hasattr(fp, "ExtensionProxy"):
             fp.ExtensionProxy.onChanged(fp, prop)
 
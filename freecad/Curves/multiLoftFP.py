@@ -10,6 +10,8 @@ import FreeCAD
 import FreeCADGui
 import Part
 # from freecad.Curves import _utils
+from freecad.Curves import multi_loft
+from freecad.Curves import fingerprint
 from freecad.Curves import ICONPATH
 
 TOOL_ICON = os.path.join(ICONPATH, 'multiLoft.svg')
@@ -25,8 +27,11 @@ class MultiLoftFP:
         obj.addProperty("App::PropertyBool", "Ruled", "Multiloft", "Ruled Loft").Ruled = False
         obj.addProperty("App::PropertyBool", "Closed", "Multiloft", "Close loft").Closed = False
         obj.addProperty("App::PropertyInteger", "MaxDegree", "Multiloft", "Max Bspline degree").MaxDegree = 5
+        obj.addProperty("App::PropertyBool", "Parallel", "Multiloft", "Loft the faces in worker processes").Parallel = False
+        obj.addProperty("App::PropertyInteger", "Processes", "Multiloft", "Number of worker processes (0 = number of cores)").Processes = 0
         obj.Proxy = self
 
+    @fingerprint.cached_execute()
     def execute(self, obj):
         if not hasattr(obj, "Sources"):
             return
@@ -36,19 +41,12 @@ class MultiLoftFP:
             # pl = sh.Placement
             sh.Placement = o.getGlobalPlacement()
             src_shapes.append(sh)
-        solids = []
-        for i in range(len(src_shapes[0].Faces)):
-            faces = [src_shapes[0].Faces[i], src_shapes[-1].Faces[i]]
-            loft = []
-            num_wires = len(faces[0].Wires)
-            for j in range(num_wires):
-                wires = []
-                for o in src_shapes:
-                    wires.append(o.Faces[i].Wires[j])
-                loft = Part.makeLoft(wires, False, obj.Ruled, obj.Closed, obj.MaxDegree)
-                faces.extend(loft.Faces)
-            shell = Part.Shell(faces)
-            solids.append(Part.Solid(shell))
+        parallel_mode = False
+        processes = None
+        if hasattr(obj, "Parallel"):
+            parallel_mode = obj.Parallel
+            processes = obj.Processes
+        solids, failed = multi_loft.multi_loft(src_shapes, obj.Ruled, obj.Closed, obj.MaxDegree, parallel_mode, processes)
         obj.Shape = Part.Compound(solids)
 
     def onChanged(self, obj, prop):
@@ -57,8 +55,9 @@ class MultiLoftFP:
                 obj.MaxDegree = 1
             if obj.MaxDegree > 25:
                 obj.MaxDegree = 25
-        if prop in ["Ruled", "Closed", "MaxDegree"]:
-            self.execute(obj)
+        if prop == "Processes":
+            if obj.Processes < 0:
+                obj.Processes = 0
         return
 
 
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Multi loft"
+__author__ = "Christophe Grellier (Chris_G)"
+__license__ = "LGPL 2.1"
+__doc__ = "Loft a list of shapes made of multiple faces, face by face."
+
+import FreeCAD
+import Part
+from freecad.Curves import parallel
+
+
+def face_solid(faces, ruled=False, closed=False, max_degree=5):
+    """Returns the solid lofted through a list of faces that have matching wires
+    solid = face_solid(faces, ruled=False, closed=False, max_degree=5)"""
+    shell_faces = [faces[0], faces[-1]]
+    for j in range(len(faces[0].Wires)):
+        wires = [f.Wires[j] for f in faces]
+        loft = Part.makeLoft(wires, False, ruled, closed, max_degree)
+        shell_faces.extend(loft.Faces)
+    return Part.Solid(Part.Shell(shell_faces))
+
+
+def try_face_solid(faces, ruled=False, closed=False, max_degree=5):
+    """Same as face_solid, but returns (success, solid or error message)
+    This is the error policy of both the serial and the parallel modes :
+    a failing face is reported, and doesn't stop the other ones."""
+    try:
+        return True, face_solid(faces, ruled, closed, max_degree)
+    except Exception as exc:
+        return False, str(exc)
+
+
+def _face_solid_job(job):
+    """Worker job : (face BREP strings, ruled, closed, max_degree) -> (success, BREP string or error message)"""
+    breps, ruled, closed, max_degree = job
+    try:
+        faces = [parallel.brep_to_shape(b).Faces[0] for b in breps]
+    except Exception as exc:
+        return False, str(exc)
+    success, res = try_face_solid(faces, ruled, closed, max_degree)
+    if success:
+        return True, parallel.shape_to_brep(res)
+    return False, res
+
+
+def multi_loft(shapes, ruled=False, closed=False, max_degree=5, parallel_mode=False, processes=None):
+    """Lofts the i-th faces of all the shapes into a solid
+    solids, failed = multi_loft(shapes, ruled=False, closed=False, max_degree=5, parallel_mode=False, processes=None)
+    solids are in the face order, failed is the list of (face index, error message)
+    With parallel_mode, the faces are lofted in worker processes."""
+    faces = [sh.Faces for sh in shapes]
+    nb_faces = len(faces[0])
+    solids = []
+    failed = []
+    if parallel_mode:
+        jobs = []
+        for i in range(nb_faces):
+            breps = [parallel.shape_to_brep(f[i]) for f in faces]
+            jobs.append((breps, ruled, closed, max_degree))
+        results = parallel.map_jobs(_face_solid_job, jobs, processes)
+        for i, (success, res) in enumerate(results):
+            if success:
+                solids.append(parallel.brep_to_shape(res))
+            else:
+                failed.append((i, res))
+    else:
+        for i in range(nb_faces):
+            success, res = try_face_solid([f[i] for f in faces], ruled, closed, max_degree)
+            if success:
+                solids.append(res)
+            else:
+                failed.append((i, res))
+    for i, msg in failed:
+        FreeCAD.Console.PrintWarning("MultiLoft : loft of face #{} failed : {}\n".format(i + 1, msg))
+    return solids, failed
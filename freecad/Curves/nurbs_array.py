@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Nurbs array tools"
+__author__ = "Christophe Grellier (Chris_G)"
+__license__ = "LGPL 2.1"
+__doc__ = "Vectorized NumPy evaluation of BSpline data."
+
+from math import factorial
+import numpy as np
+import FreeCAD
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+
+def to_array(pts):
+    """Converts a list of FreeCAD.Vector to a (n, 3) array"""
+    return np.array([(p.x, p.y, p.z) for p in pts], dtype=float).reshape(-1, 3)
+
+
+def to_vectors(arr):
+    """Converts a (n, 3) array to a list of FreeCAD.Vector"""
+    return [FreeCAD.Vector(*p) for p in np.asarray(arr, dtype=float).tolist()]
+
+
+def chord_parameters(pts, fac=1.0, closed=False):
+    """Returns the normalized parameters of an array of points
+    params = chord_parameters(pts, fac=1.0, closed=False)
+    fac=0 -> Uniform / fac=0.5 -> Centripetal / fac=1.0 -> Chord-Length
+    If closed, the first point is appended as end point,
+    and the returned array has one extra parameter."""
+    pts = np.asarray(pts, dtype=float)
+    if closed:
+        pts = np.vstack((pts, pts[:1]))
+    lengths = np.linalg.norm(np.diff(pts, axis=0), axis=1) ** fac
+    params = np.concatenate(([0.0], np.cumsum(lengths)))
+    return params / params[-1]
+
+
+def bspline_arrays(bs):
+    """Returns the array data of a BSpline curve
+    knot_seq, degree, poles, weights = bspline_arrays(bs)
+    Periodic curves are unwrapped into the equivalent clamped curve."""
+    if bs.isPeriodic():
+        bs = bs.copy()
+        bs.setNotPeriodic()
+    return (np.array(bs.KnotSequence, dtype=float),
+            bs.Degree,
+            to_array(bs.getPoles()),
+            np.array(bs.getWeights(), dtype=float))
+
+
+def find_spans(knot_seq, degree, params, left=False):
+    """Returns the knot span index of each parameter
+    With left=True, a parameter equal to a knot gets the span that ends at this knot."""
+    n = len(knot_seq) - degree - 1
+    spans = np.searchsorted(knot_seq, params, side="left" if left else "right") - 1
+    return np.clip(spans, degree, n - 1)
+
+
+def de_boor(knot_seq, degree, poles, params, left=False):
+    """Evaluates a non-rational BSpline at an array of parameters
+    pts = de_boor(knot_seq, degree, poles, params, left=False)
+    poles is a (n, dim) array, pts is a (len(params), dim) array
+    With left=True, the left limits are evaluated at the knots."""
+    t = np.asarray(knot_seq, dtype=float)
+    u = np.atleast_1d(np.asarray(params, dtype=float))
+    poles = np.asarray(poles, dtype=float)
+    k = find_spans(t, degree, u, left)
+    idx = k[:, np.newaxis] - degree + np.arange(degree + 1)
+    d = poles[idx].copy()
+    for r in range(1, degree + 1):
+        for j in range(degree, r - 1, -1):
+            left = t[j + k - degree]
+            den = t[j + 1 + k - r] - left
+            den[den == 0] = 1.0
+            alpha = ((u - left) / den)[:, np.newaxis]
+            d[:, j] = (1.0 - alpha) * d[:, j - 1] + alpha * d[:, j]
+    return d[:, degree]
+
+
+def rational_de_boor(knot_seq, degree, poles, weights, params):
+    """Evaluates a rational BSpline at an array of parameters
+    pts = rational_de_boor(knot_seq, degree, poles, weights, params)"""
+    poles = np.asarray(poles, dtype=float)
+    weights = np.asarray(weights, dtype=float)[:, np.newaxis]
+    hpts = de_boor(knot_seq, degree, np.hstack((poles * weights, weights)), params)
+    return hpts[:, :-1] / hpts[:, -1:]
+
+
+def greville_abscissae(knot_seq, degree, nb_poles):
+    """Returns the Greville abscissae of a BSpline, the parameters associated to the poles"""
+    t = np.asarray(knot_seq, dtype=float)
+    if degree == 0:
+        return t[:nb_poles]
+    cs = np.concatenate(([0.0], np.cumsum(t)))
+    i = np.arange(nb_poles)
+    return (cs[i + degree + 1] - cs[i + 1]) / degree
+
+
+def derivative_arrays(knot_seq, degree, poles):
+    """Returns the knot sequence, degree and poles of the derivative of a non-rational BSpline
+    knot_seq, degree, poles = derivative_arrays(knot_seq, degree, poles)"""
+    t = np.asarray(knot_seq, dtype=float)
+    poles = np.asarray(poles, dtype=float)
+    if degree == 0:
+        return t[1:-1], 0, np.zeros_like(poles[:-1])
+    den = t[degree + 1:degree + len(poles)] - t[1:len(poles)]
+    den[den == 0] = np.inf
+    q = degree * np.diff(poles, axis=0) / den.reshape((-1,) + (1,) * (poles.ndim - 1))
+    return t[1:-1], degree - 1, q
+
+
+def basis_derivatives(knot_seq, degree, nb_poles, params, order=0, left=False):
+    """Returns the (len(params), nb_poles) matrix of the order-th derivatives
+    of the basis functions, so that ders = matrix.dot(poles)"""
+    t, deg, poles = knot_seq, degree, np.eye(nb_poles)
+    for _ in range(order):
+        t, deg, poles = derivative_arrays(t, deg, poles)
+    return de_boor(t, deg, poles, params, left)
+
+
+def averaged_knots(params, degree):
+    """Returns the clamped knot sequence of an interpolation at params,
+    by averaging of the parameters (NURBS Book, eq. 9.8)"""
+    params = np.asarray(params, dtype=float)
+    n = len(params)
+    inner = [params[j:j + degree].mean() for j in range(1, n - degree)]
+    return np.concatenate(([params[0]] * (degree + 1), inner, [params[-1]] * (degree + 1)))
+
+
+def interpolate_arrays(params, pts, degree=3):
+    """Interpolates several point sets at the same parameters
+    knot_seq, degree, poles = interpolate_arrays(params, pts, degree=3)
+    pts is an array of shape (len(params), ...), each trailing index being one curve,
+    for example (S, V, 3) for V curves through S points.
+    The collocation matrix is factorized once for all the curves.
+    poles has the same shape as pts."""
+    pts = np.asarray(pts, dtype=float)
+    n = len(params)
+    degree = max(1, min(degree, n - 1))
+    knot_seq = averaged_knots(params, degree)
+    colloc = basis_derivatives(knot_seq, degree, n, params)
+    poles = np.linalg.solve(colloc, pts.reshape(n, -1))
+    return knot_seq, degree, poles.reshape(pts.shape)
+
+
+def knots_mults(knot_seq):
+    """Returns the distinct knots and multiplicities of a knot sequence"""
+    knots, mults = np.unique(np.asarray(knot_seq, dtype=float), return_counts=True)
+    return knots.tolist(), mults.tolist()
+
+
+def curve_derivatives(bs, params, order=1):
+    """Evaluates a BSpline curve and its derivatives at an array of parameters
+    ders = curve_derivatives(bs, params, order=1)
+    ders is a (order + 1, len(params), 3) array, ders[0] being the points."""
+    return CurveEvaluator(bs, order).derivatives(params, order)
+
+
+class CurveEvaluator(object):
+    """Batched evaluator of a BSpline curve
+    ev = CurveEvaluator(bs, order=2)
+    The derivative splines up to 'order' are computed once,
+    so repeated evaluations only cost array operations.
+    Rational curves are handled with the homogeneous form (NURBS Book, eq. 4.8)."""
+    def __init__(self, bs, order=2):
+        t, deg, poles, weights = bspline_arrays(bs)
+        self._setup(t, deg, poles, weights, bs.isRational(), order)
+        self.first = bs.FirstParameter
+        self.last = bs.LastParameter
+
+    @classmethod
+    def from_arrays(cls, knot_seq, degree, poles, weights=None, order=2):
+        """Builds an evaluator from the arrays of a clamped BSpline
+        ev = CurveEvaluator.from_arrays(knot_seq, degree, poles, weights=None, order=2)"""
+        ev = cls.__new__(cls)
+        t = np.asarray(knot_seq, dtype=float)
+        poles = np.asarray(poles, dtype=float)
+        rational = weights is not None and np.ptp(weights) > 0
+        if weights is None:
+            weights = np.ones(len(poles))
+        ev._setup(t, degree, poles, np.asarray(weights, dtype=float), rational, order)
+        ev.first = t[degree]
+        ev.last = t[len(poles)]
+        return ev
+
+    def _setup(self, t, deg, poles, weights, rational, order):
+        self.rational = rational
+        self.nb_poles = len(poles)
+        if self.rational:
+            poles = np.hstack((poles * weights[:, np.newaxis], weights[:, np.newaxis]))
+        self.splines = []
+        for _ in range(order + 1):
+            self.splines.append((t, deg, poles))
+            t, deg, poles = derivative_arrays(t, deg, poles)
+        self._polyline = None
+        self._index = None
+
+    @property
+    def order(self):
+        return len(self.splines) - 1
+
+    def derivatives(self, params, order=None, left=False):
+        """Returns the (order + 1, len(params), 3) array of points and derivatives
+        With left=True, the left limits are evaluated at the knots."""
+        if order is None:
+            order = self.order
+        hders = np.array([de_boor(t, deg, poles, params, left) for t, deg, poles in self.splines[:order + 1]])
+        if not self.rational:
+            return hders
+        a = hders[:, :, :3]
+        w = hders[:, :, 3:]
+        ders = np.empty_like(a)
+        for k in range(order + 1):
+            v = a[k].copy()
+            for i in range(1, k + 1):
+                binom = factorial(k) / (factorial(i) * factorial(k - i))
+                v -= binom * w[i] * ders[k - i]
+            ders[k] = v / w[0]
+        return ders
+
+    def values(self, params):
+        """Returns the (len(params), 3) array of curve points"""
+        return self.derivatives(params, 0)[0]
+
+    def polyline(self, samples=None):
+        """Returns the (params, points) arrays of a dense uniform sampling of the curve.
+        The default sampling is computed once and cached."""
+        if samples is None:
+            if self._polyline is None:
+                nb = max(500, 20 * self.nb_poles)
+                params = np.linspace(self.first, self.last, nb)
+                self._polyline = (params, self.values(params))
+            return self._polyline
+        params = np.linspace(self.first, self.last, samples)
+        return params, self.values(params)
+
+    def closest_parameters(self, pts, iterations=10, tol=1e-12):
+        """Returns the parameters of the points of the curve closest to pts
+        The start parameters come from a nearest point search on the cached polyline,
+        and are refined with vectorized Newton iterations."""
+        if self.order < 2:
+            raise ValueError("closest_parameters needs an evaluator of order 2")
+        pts = np.asarray(pts, dtype=float).reshape(-1, 3)
+        params, poly = self.polyline()
+        if self._index is None:
+            self._index = PointIndex(poly)
+        t = params[self._index.query(pts)]
+        for _ in range(iterations):
+            d = self.derivatives(t, 2)
+            diff = d[0] - pts
+            f = (d[1] * diff).sum(axis=1)
+            fp = (d[2] * diff).sum(axis=1) + (d[1] * d[1]).sum(axis=1)
+            fp[fp <= 0] = np.inf
+            step = f / fp
+            t = np.clip(t - step, self.first, self.last)
+            if np.abs(step).max() < tol:
+                break
+        return t
+
+    def plane_crossings(self, origin, direction, iterations=10, tol=1e-12):
+        """Returns the parameters of the first intersections of the curve
+        with the planes of normal 'direction' through each point of origin
+        params, found = ev.plane_crossings(origin, direction)
+        found is a boolean array, False where the plane doesn't cut the curve."""
+        d = np.asarray(direction, dtype=float)
+        s = np.asarray(origin, dtype=float).reshape(-1, 3).dot(d)
+        params, poly = self.polyline()
+        h = poly.dot(d)
+        side = h[np.newaxis, :] - s[:, np.newaxis]
+        cross = side[:, :-1] * side[:, 1:] <= 0
+        found = cross.any(axis=1)
+        j = cross.argmax(axis=1)
+        dh = h[j + 1] - h[j]
+        dh[dh == 0] = 1.0
+        t = params[j] + (params[j + 1] - params[j]) * (s - h[j]) / dh
+        for _ in range(iterations):
+            ders = self.derivatives(t, 1)
+            g = ders[0].dot(d) - s
+            gp = ders[1].dot(d)
+            gp[gp == 0] = np.inf
+            step = g / gp
+            t = np.clip(t - step, params[j], params[j + 1])
+            if np.abs(step).max() < tol:
+                break
+        return t, found
+
+
+class PointIndex(object):
+    """Nearest point index of a (n, 3) point array.
+    Uses scipy KD-tree if available, else a chunked brute force search."""
+    def __init__(self, points):
+        self.points = np.asarray(points, dtype=float)
+        self.tree = None
+        if cKDTree is not None:
+            self.tree = cKDTree(self.points)
+        self.sq_norms = (self.points ** 2).sum(axis=1)
+
+    def query(self, queries, k=1):
+        """Returns the indices of the k nearest points of each query point
+        The returned array is of shape (n,) if k == 1, else (n, k)"""
+        queries = np.asarray(queries, dtype=float).reshape(-1, 3)
+        k = min(k, len(self.points))
+        if self.tree is not None:
+            return self.tree.query(queries, k)[1]
+        chunk = max(1, 4000000 // len(self.points))
+        res = np.empty((len(queries), k), dtype=int)
+        for i in range(0, len(queries), chunk):
+            q = queries[i:i + chunk]
+            sq = self.sq_norms[np.newaxis, :] - 2.0 * q.dot(self.points.T)
+            if k == 1:
+                res[i:i + chunk, 0] = sq.argmin(axis=1)
+            else:
+                part = np.argpartition(sq, k - 1, axis=1)[:, :k]
+                order = np.take_along_axis(sq, part, axis=1).argsort(axis=1)
+                res[i:i + chunk] = np.take_along_axis(part, order, axis=1)
+        if k == 1:
+            return res[:, 0]
+        return res
+
+
+def unit_vectors(arr):
+    """Normalizes the rows of a (n, 3) array. Null rows are left unchanged."""
+    arr = np.asarray(arr, dtype=float)
+    length = np.linalg.norm(arr, axis=-1)
+    length = np.where(length == 0, 1.0, length)
+    return arr / length[..., np.newaxis]
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Nurbs binary format"
+__author__ = "Christophe Grellier (Chris_G)"
+__license__ = "LGPL 2.1"
+__doc__ = "Compact binary container for Bezier and BSpline curves and surfaces."
+
+import struct
+import numpy as np
+import FreeCAD
+import Part
+
+# File layout (little endian) :
+# - header (HEADER_FORMAT)
+# - index table (nb_items records of INDEX_DTYPE)
+# - poles   : float64 array of shape (nb_poles, 3)
+# - weights : float64 array of shape (nb_poles,)
+# - knots   : float64 array of shape (nb_knots,)
+# - mults   : int32 array of shape (nb_knots,)
+# Each index record holds the start offsets of the item
+# in the 4 contiguous arrays, so any item can be read independently.
+# Surface poles and weights are stored row by row (U major),
+# surface knots and mults are stored U first, then V.
+
+MAGIC = b"CURVESNB"
+VERSION = 1
+EXTENSION = "cnb"
+HEADER_FORMAT = "<8sIIQQQ"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+BSPLINE_CURVE = 0
+BEZIER_CURVE = 1
+BSPLINE_SURFACE = 2
+BEZIER_SURFACE = 3
+
+U_PERIODIC = 1
+V_PERIODIC = 2
+RATIONAL = 4
+
+INDEX_DTYPE = np.dtype([("kind", "<u2"),
+                        ("flags", "<u2"),
+                        ("udegree", "<u2"),
+                        ("vdegree", "<u2"),
+                        ("nb_upoles", "<u4"),
+                        ("nb_vpoles", "<u4"),
+                        ("nb_uknots", "<u4"),
+                        ("nb_vknots", "<u4"),
+                        ("poles", "<u8"),
+                        ("knots", "<u8")])
+
+
+def _vectors(arr):
+    return [FreeCAD.Vector(*p) for p in arr.tolist()]
+
+
+def geometry_data(geom):
+    """Returns the index record fields and the data arrays of a geometry
+    (record, poles, weights, knots, mults) = geometry_data(geom)
+    geom must be a Part.BSplineCurve, Part.BezierCurve,
+    Part.BSplineSurface or Part.BezierSurface"""
+    rec = dict(nb_vpoles=1, nb_uknots=0, nb_vknots=0, vdegree=0, flags=0)
+    knots = []
+    mults = []
+    if isinstance(geom, Part.BSplineCurve):
+        rec["kind"] = BSPLINE_CURVE
+        rec["udegree"] = geom.Degree
+        knots = geom.getKnots()
+        mults = geom.getMultiplicities()
+        rec["nb_uknots"] = len(knots)
+        if geom.isPeriodic():
+            rec["flags"] |= U_PERIODIC
+    elif isinstance(geom, Part.BezierCurve):
+        rec["kind"] = BEZIER_CURVE
+        rec["udegree"] = geom.Degree
+    elif isinstance(geom, Part.BSplineSurface):
+        rec["kind"] = BSPLINE_SURFACE
+        rec["udegree"] = geom.UDegree
+        rec["vdegree"] = geom.VDegree
+        uknots = geom.getUKnots()
+        vknots = geom.getVKnots()
+        knots = uknots + vknots
+        mults = geom.getUMultiplicities() + geom.getVMultiplicities()
+        rec["nb_uknots"] = len(uknots)
+        rec["nb_vknots"] = len(vknots)
+        if geom.isUPeriodic():
+            rec["flags"] |= U_PERIODIC
+        if geom.isVPeriodic():
+            rec["flags"] |= V_PERIODIC
+    elif isinstance(geom, Part.BezierSurface):
+        rec["kind"] = BEZIER_SURFACE
+        rec["udegree"] = geom.UDegree
+        rec["vdegree"] = geom.VDegree
+    else:
+        raise TypeError("nurbs_binary: unsupported geometry {}".format(geom))
+    if rec["kind"] in (BSPLINE_CURVE, BEZIER_CURVE):
+        poles = np.array(geom.getPoles(), dtype=np.float64)
+        weights = np.array(geom.getWeights(), dtype=np.float64)
+        rec["nb_upoles"] = len(poles)
+        if geom.isRational():
+            rec["flags"] |= RATIONAL
+    else:
+        poles = np.array(geom.getPoles(), dtype=np.float64)
+        weights = np.array(geom.getWeights(), dtype=np.float64)
+        rec["nb_upoles"] = poles.shape[0]
+        rec["nb_vpoles"] = poles.shape[1]
+        poles = poles.reshape(-1, 3)
+        weights = weights.reshape(-1)
+        if geom.isURational() or geom.isVRational():
+            rec["flags"] |= RATIONAL
+    return (rec,
+            poles,
+            weights,
+            np.array(knots, dtype=np.float64),
+            np.array(mults, dtype=np.int32))
+
+
+def build_geometry(rec, poles, weights, knots, mults):
+    """Builds a geometry from an index record and its data arrays
+    geom = build_geometry(record, poles, weights, knots, mults)"""
+    kind = int(rec["kind"])
+    flags = int(rec["flags"])
+    rational = bool(flags & RATIONAL)
+    if kind == BSPLINE_CURVE:
+        bs = Part.BSplineCurve()
+        bs.buildFromPolesMultsKnots(_vectors(poles),
+                                    mults.tolist(),
+                                    knots.tolist(),
+                                    bool(flags & U_PERIODIC),
+                                    int(rec["udegree"]),
+                                    weights.tolist(),
+                                    rational)
+        return bs
+    elif kind == BEZIER_CURVE:
+        be = Part.BezierCurve()
+        be.increase(int(rec["udegree"]))
+        be.setPoles(_vectors(poles))
+        if rational:
+            for i, w in enumerate(weights.tolist()):
+                be.setWeight(i + 1, w)
+        return be
+    nu = int(rec["nb_upoles"])
+    nv = int(rec["nb_vpoles"])
+    grid = [_vectors(poles[i * nv:(i + 1) * nv]) for i in range(nu)]
+    wgrid = weights.reshape(nu, nv).tolist()
+    if kind == BSPLINE_SURFACE:
+        nuk = int(rec["nb_uknots"])
+        bs = Part.BSplineSurface()
+        bs.buildFromPolesMultsKnots(grid,
+                                    mults[:nuk].tolist(),
+                                    mults[nuk:].tolist(),
+                                    knots[:nuk].tolist(),
+                                    knots[nuk:].tolist(),
+                                    bool(flags & U_PERIODIC),
+                                    bool(flags & V_PERIODIC),
+                                    int(rec["udegree"]),
+                                    int(rec["vdegree"]),
+                                    wgrid)
+        return bs
+    elif kind == BEZIER_SURFACE:
+        be = Part.BezierSurface()
+        be.increase(int(rec["udegree"]), int(rec["vdegree"]))
+        for i, row in enumerate(grid):
+            be.setPoleRow(i + 1, row, wgrid[i])
+        return be
+    raise ValueError("nurbs_binary: unknown geometry kind {}".format(kind))
+
+
+def write(filename, geometries):
+    """Writes a list of geometries in a binary file
+    nb_written = write(filename, geometries)
+    Supported geometries are Part.BSplineCurve, Part.BezierCurve,
+    Part.BSplineSurface and Part.BezierSurface"""
+    index = np.zeros(len(geometries), dtype=INDEX_DTYPE)
+    poles = []
+    weights = []
+    knots = []
+    mults = []
+    nb_poles = 0
+    nb_knots = 0
+    for i, geom in enumerate(geometries):
+        rec, p, w, k, m = geometry_data(geom)
+        for key, val in rec.items():
+            index[key][i] = val
+        index["poles"][i] = nb_poles
+        index["knots"][i] = nb_knots
+        nb_poles += len(p)
+        nb_knots += len(k)
+        poles.append(p)
+        weights.append(w)
+        knots.append(k)
+        mults.append(m)
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, len(index), 0, nb_poles, nb_knots)
+    with open(filename, "wb") as f:
+        f.write(header)
+        f.write(index.tobytes())
+        for arrays, dtype in ((poles, "<f8"), (weights, "<f8"), (knots, "<f8"), (mults, "<i4")):
+            for arr in arrays:
+                f.write(np.ascontiguousarray(arr, dtype=dtype).tobytes())
+    return len(index)
+
+
+class NurbsBinaryFile(object):
+    """Random access reader of a Curves binary NURBS file
+    nbf = NurbsBinaryFile(filename, mmap=True)
+    len(nbf) is the number of stored geometries
+    nbf[i] builds the geometry #i
+    nbf.geometries() builds all the geometries
+    With mmap=True, the data arrays are memory-mapped
+    and only the requested items are read from disk."""
+    def __init__(self, filename, mmap=True):
+        self.filename = filename
+        with open(filename, "rb") as f:
+            head = f.read(HEADER_SIZE)
+        if len(head) < HEADER_SIZE:
+            raise ValueError("nurbs_binary: {} is too short".format(filename))
+        magic, version, nb_items, _, nb_poles, nb_knots = struct.unpack(HEADER_FORMAT, head)
+        if not magic == MAGIC:
+            raise ValueError("nurbs_binary: {} is not a Curves binary NURBS file".format(filename))
+        if version > VERSION:
+            raise ValueError("nurbs_binary: unsupported file version {}".format(version))
+        offset = HEADER_SIZE
+        layout = [("index", INDEX_DTYPE, (nb_items,)),
+                  ("poles", np.dtype("<f8"), (nb_poles, 3)),
+                  ("weights", np.dtype("<f8"), (nb_poles,)),
+                  ("knots", np.dtype("<f8"), (nb_knots,)),
+                  ("mults", np.dtype("<i4"), (nb_knots,))]
+        if not mmap:
+            with open(filename, "rb") as f:
+                buf = f.read()
+        for name, dtype, shape in layout:
+            count = int(np.prod(shape))
+            if count == 0:
+                arr = np.zeros(shape, dtype=dtype)
+            elif mmap:
+                arr = np.memmap(filename, dtype=dtype, mode="r", offset=offset, shape=shape)
+            else:
+                arr = np.frombuffer(buf, dtype=dtype, count=count, offset=offset).reshape(shape)
+            setattr(self, name, arr)
+            offset += count * dtype.itemsize
+
+    def __len__(self):
+        return len(self.index)
+
+    def item_arrays(self, i):
+        """Returns the index record and the data arrays of item #i
+        (record, poles, weights, knots, mults) = nbf.item_arrays(i)"""
+        rec = self.index[i]
+        p0 = int(rec["poles"])
+        p1 = p0 + int(rec["nb_upoles"]) * int(rec["nb_vpoles"])
+        k0 = int(rec["knots"])
+        k1 = k0 + int(rec["nb_uknots"]) + int(rec["nb_vknots"])
+        return (rec,
+                self.poles[p0:p1],
+                self.weights[p0:p1],
+                self.knots[k0:k1],
+                self.mults[k0:k1])
+
+    def __getitem__(self, i):
+        return build_geometry(*self.item_arrays(i))
+
+    def geometries(self, indices=None):
+        """Builds the geometries of the given indices (default: all)"""
+        if indices is None:
+            indices = range(len(self))
+        return [self[i] for i in indices]
+
+
+def read(filename, indices=None, mmap=True):
+    """Reads geometries from a binary file
+    geometries = read(filename, indices=None, mmap=True)
+    indices : optional list of item indices to read"""
+    return NurbsBinaryFile(filename, mmap).geometries(indices)
+
+
+def shape_geometries(shape):
+    """Returns the Bezier and BSpline geometries of a shape
+    The surfaces of the faces are returned untrimmed.
+    Free edges are returned as curves segmented to the edge range."""
+    geoms = []
+    face_edges = set()
+    for f in shape.Faces:
+        if isinstance(f.Surface, (Part.BSplineSurface, Part.BezierSurface)):
+            geoms.append(f.Surface)
+        face_edges.update([e.hashCode() for e in f.Edges])
+    for e in shape.Edges:
+        if e.hashCode() in face_edges:
+            continue
+        if isinstance(e.Curve, (Part.BSplineCurve, Part.BezierCurve)):
+            c = e.Curve
+            if (e.FirstParameter, e.LastParameter) != (c.FirstParameter, c.LastParameter):
+                c = c.copy()
+                c.segment(e.FirstParameter, e.LastParameter)
+            geoms.append(c)
+    return geoms
+
+
+def to_shapes(geometries):
+    """Converts a list of geometries to a list of edges and faces"""
+    return [g.toShape() for g in geometries]
@@ -5,6 +5,8 @@ __author__ = "Christophe Grellier (Chris_G)"
 __license__ = "LGPL 2.1"
 __doc__ = "Collection of tools for Nurbs."
 
+from math import factorial
+import numpy
 import FreeCAD
 import Part
 
@@ -152,6 +154,38 @@ def remove_subsegments(edges, num=20, tol=1e-7):  # remove subsegment edges from
     return ret
 
 
+def remove_subsegments_indexed(edges, num=20, tol=1e-7):
+    """remove subsegment edges from a list, like remove_subsegments.
+    The bounding boxes of the edges are used as a spatial index :
+    an edge is only compared to the edges whose box overlaps its own box.
+    """
+    boxes = numpy.array([[e.BoundBox.XMin, e.BoundBox.YMin, e.BoundBox.ZMin,
+                          e.BoundBox.XMax, e.BoundBox.YMax, e.BoundBox.ZMax] for e in edges]).reshape(-1, 6)
+    lo = boxes[:, :3]
+    hi = boxes[:, 3:]
+    ret = []
+    kept = []
+    dups = 0
+    for i, e1 in enumerate(edges):
+        overlap = numpy.all(lo <= hi[i] + tol, axis=1) & numpy.all(hi >= lo[i] - tol, axis=1)
+        found = False
+        for j in numpy.nonzero(overlap)[0]:
+            if j == i or not is_subsegment(e1, edges[j], num, tol):
+                continue
+            if is_subsegment(edges[j], e1, num, tol):  # e1 == e2
+                found = any(overlap[k] and is_subsegment(e1, edges[k], num, tol) for k in kept)
+            else:
+                found = True
+            if found:
+                dups += 1
+                break
+        if not found:
+            ret.append(e1)
+            kept.append(i)
+    message("Removed {} subsegment edges\n".format(dups))
+    return ret
+
+
 class BsplineBasis(object):
     """Computes basis functions of a bspline curve, and its derivatives"""
     def __init__(self):
@@ -562,6 +596,87 @@ def curvematch(c1, c2, par1, level=0, scale=1.0):
     return nc
 
 
+def edge_derivatives(edges, params, level=2):
+    """Evaluates edges and their derivatives, for a parameter scaled to the edge length,
+    like the knot vectors scaled by curvematch.
+    ders = edge_derivatives(edges, params, level=2)
+    ders is a (len(edges), level + 1, 3) array, ders[:, 0] being the points."""
+    ders = numpy.empty((len(edges), level + 1, 3))
+    for i, (e, p) in enumerate(zip(edges, params)):
+        fac = (e.LastParameter - e.FirstParameter) / e.Length
+        vecs = [e.valueAt(p)]
+        for k in range(1, level + 1):
+            if k == 1:
+                d = e.derivative1At(p)
+            elif k == 2:
+                d = e.derivative2At(p)
+            elif k == 3:
+                d = e.derivative3At(p)
+            else:
+                d = e.Curve.getDN(p, k)
+            vecs.append(d * fac ** k)
+        ders[i] = [(v.x, v.y, v.z) for v in vecs]
+    return ders
+
+
+def _match_start(poles, ders, scale, chord):
+    """Moves the first poles of an array of Bezier curves to match
+    the point and derivatives ders, as curvematch does."""
+    degree = poles.shape[1] - 1
+    length = numpy.abs(scale) * chord
+    sign = numpy.where(scale < 0, -1.0, 1.0)
+    for k in range(ders.shape[1]):
+        fac = (sign * length) ** k * factorial(degree - k) / factorial(degree)
+        pk = ders[:, k] * fac[:, numpy.newaxis]
+        for i in range(k):
+            binom = factorial(k) / (factorial(i) * factorial(k - i))
+            pk -= (-1) ** (k - i) * binom * poles[:, i]
+        poles[:, k] = pk
+
+
+def blend_poles(ders1, ders2, scale1=1.0, scale2=1.0):
+    """Computes the poles of N blend curves in one batch
+    poles = blend_poles(ders1, ders2, scale1=1.0, scale2=1.0)
+    ders1, ders2 : (N, cont + 1, 3) arrays of the points and derivatives at both ends
+    (see edge_derivatives), up to the continuity order cont1 and cont2
+    scale1, scale2 : floats or (N,) arrays of scale factors. Negative scales reverse the tangents.
+    Returns the (N, cont1 + cont2 + 2, 3) array of the Bezier poles,
+    the same curves as blendCurve.compute with the same inputs.
+    Rows with coincident end points are filled with NaN."""
+    ders1 = numpy.asarray(ders1, dtype=float)
+    ders2 = numpy.asarray(ders2, dtype=float)
+    nb = len(ders1)
+    nb_poles = ders1.shape[1] + ders2.shape[1]
+    scale1 = numpy.broadcast_to(numpy.asarray(scale1, dtype=float), (nb,))
+    scale2 = numpy.broadcast_to(numpy.asarray(scale2, dtype=float), (nb,))
+    p1 = ders1[:, 0]
+    p2 = ders2[:, 0]
+    chord = numpy.linalg.norm(p2 - p1, axis=1)
+    t = numpy.linspace(0.0, 1.0, nb_poles)[numpy.newaxis, :, numpy.newaxis]
+    poles = p1[:, numpy.newaxis] * (1.0 - t) + p2[:, numpy.newaxis] * t
+    _match_start(poles, ders1, scale1, chord)
+    _match_start(poles[:, ::-1], ders2, scale2, chord)
+    poles[chord == 0] = numpy.nan
+    return poles
+
+
+def bezier_curves(poles):
+    """Returns the list of Bezier BSplineCurves of a (N, nb_poles, 3) pole array
+    None is returned for the rows that contain NaN."""
+    poles = numpy.asarray(poles, dtype=float)
+    degree = poles.shape[1] - 1
+    knots, mults = createKnotsMults(degree, poles.shape[1])
+    curves = []
+    for row in poles:
+        if numpy.isnan(row).any():
+            curves.append(None)
+            continue
+        bs = Part.BSplineCurve()
+        bs.buildFromPolesMultsKnots([FreeCAD.Vector(*p) for p in row.tolist()], mults, knots, False, degree)
+        curves.append(bs)
+    return curves
+
+
 class blendCurve(object):
     def __init__(self, e1=None, e2=None):
         self.param1 = 0.0
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Outline"
+__author__ = "Christophe Grellier (Chris_G)"
+__license__ = "LGPL 2.1"
+__doc__ = "Outline points of a shape, with candidate faces prefiltered on a tessellation."
+
+import numpy as np
+import FreeCAD
+import Part
+from freecad.Curves import parallel
+from freecad.Curves import logger
+
+log = logger.get_logger(__name__)
+
+# The outline points are the closest points of the shape to the
+# radial lines of a cylinder that surrounds the shape.
+# For each radial line, a lower and an upper bound of the distance
+# to each face are computed from the tessellation of the face :
+# - upper bound : the distance of the closest tessellation vertex
+# - lower bound : the same distance, minus the size of the largest
+#   triangle of the face and the tessellation deflection
+# Only the faces whose lower bound is below the best upper bound
+# can hold the closest point, and the exact extrema is only run on them.
+
+_source = (None, None)  # (BREP string, shape) of the worker
+
+
+class FaceIndex(object):
+    """Tessellation based index of the faces of a shape
+    idx = FaceIndex(shape, deflection=None)
+    The default deflection is 1% of the diagonal of the shape bounding box."""
+    def __init__(self, shape, deflection=None):
+        if deflection is None:
+            deflection = shape.BoundBox.DiagonalLength * 0.01
+        self.deflection = deflection
+        self.vertices = []
+        self.slack = []
+        # faces that don't tessellate are indexed by their bounding box center,
+        # which is not on the face : it gives a lower bound, but no upper bound
+        self.on_face = []
+        for f in shape.Faces:
+            pts, tris = f.tessellate(deflection)
+            pts = np.array([(p.x, p.y, p.z) for p in pts], dtype=float).reshape(-1, 3)
+            size = 0.0
+            on_face = True
+            if len(tris) > 0 and len(pts) > 0:
+                t = pts[np.array(tris, dtype=int)]
+                edges = np.linalg.norm(t - np.roll(t, 1, axis=1), axis=2)
+                size = edges.max()
+            if len(pts) == 0:
+                bb = f.BoundBox
+                pts = np.array([(bb.Center.x, bb.Center.y, bb.Center.z)])
+                size = bb.DiagonalLength / 2
+                on_face = False
+            self.vertices.append(pts)
+            self.slack.append(size + deflection)
+            self.on_face.append(on_face)
+        self.slack = np.array(self.slack)
+        self.on_face = np.array(self.on_face, dtype=bool)
+
+    def line_distances(self, origins, direction):
+        """Returns the (F, K) array of the distances of the closest
+        tessellation vertex of the F faces to the K lines
+        that go through origins, along direction"""
+        origins = np.asarray(origins, dtype=float)
+        d = np.asarray(direction, dtype=float)
+        d = d / np.linalg.norm(d)
+        res = np.empty((len(self.vertices), len(origins)))
+        for i, pts in enumerate(self.vertices):
+            q = pts[:, np.newaxis, :] - origins[np.newaxis, :, :]
+            perp = q - np.einsum("nkj,j->nk", q, d)[:, :, np.newaxis] * d
+            res[i] = np.linalg.norm(perp, axis=2).min(axis=0)
+        return res
+
+    def candidates(self, origins, direction):
+        """Returns the list of the arrays of the candidate face indices of each line"""
+        dist = self.line_distances(origins, direction)
+        lower = dist - self.slack[:, np.newaxis]
+        upper = np.where(self.on_face[:, np.newaxis], dist, np.inf)
+        best = upper.min(axis=0)
+        return [np.nonzero(lower[:, k] <= best[k])[0] for k in range(len(origins))]
+
+
+def radial_lines(shape, direction, samples):
+    """Returns the list of the (start, end) points of the radial lines
+    of the cylinder that surrounds shape, along direction"""
+    base = shape.BoundBox.Center
+    dl = shape.BoundBox.DiagonalLength
+    cyl = Part.makeCylinder(dl, dl * 2, base - direction * dl, direction).Face1
+    uf, ul, vf, vl = cyl.ParameterRange
+    lines = []
+    for i in range(samples):
+        u = uf + (float(i) / (samples - 1)) * (ul - uf)
+        lines.append((cyl.Surface.value(u, vf), cyl.Surface.value(u, vl)))
+    return lines
+
+
+def face_points(faces, start, end):
+    """Returns the closest points of faces to the segment (start, end),
+    that lie inside a face"""
+    e = Part.LineSegment(start, end).toShape()
+    d, pts, info = Part.Compound(faces).distToShape(e)
+    if len(pts) > 1:
+        log.debug("multi pt {}", pts)
+    return [pts[i][0] for i, inf in enumerate(info) if inf[0] in (b"Face", "Face")]
+
+
+def _source_shape():
+    global _source
+    brep = parallel.shared_data()
+    if _source[0] is not brep:
+        _source = (brep, parallel.brep_to_shape(brep))
+    return _source[1]
+
+
+def _outline_job(job):
+    """Worker job : (start, end, candidate face indices) -> list of point tuples"""
+    start, end, indices = job
+    faces = _source_shape().Faces
+    pts = face_points([faces[i] for i in indices], FreeCAD.Vector(*start), FreeCAD.Vector(*end))
+    return [(p.x, p.y, p.z) for p in pts]
+
+
+def outline_points(shape, direction, samples=360, parallel_mode=False, processes=None):
+    """Returns the outline points of shape, seen from direction
+    pts = outline_points(shape, direction, samples=360, parallel_mode=False, processes=None)
+    With parallel_mode, the radial lines are processed in worker processes."""
+    lines = radial_lines(shape, direction, samples)
+    index = FaceIndex(shape)
+    origins = [(s.x, s.y, s.z) for s, e in lines]
+    cands = index.candidates(origins, (direction.x, direction.y, direction.z))
+    log.debug("{} candidate faces per line, on average", lambda: sum(len(c) for c in cands) / float(len(cands)))
+    if parallel_mode:
+        jobs = [((s.x, s.y, s.z), (e.x, e.y, e.z), c.tolist()) for (s, e), c in zip(lines, cands)]
+        results = parallel.map_jobs(_outline_job, jobs, processes, chunksize=max(1, len(jobs) // 64),
+                                    shared=parallel.shape_to_brep(shape))
+        return [FreeCAD.Vector(*p) for res in results for p in res]
+    faces = shape.Faces
+    pts = []
+    for (s, e), c in zip(lines, cands):
+        pts.extend(face_points([faces[i] for i in c], s, e))
+    return pts
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Parallel tools"
+__author__ = "Christophe Grellier (Chris_G)"
+__license__ = "LGPL 2.1"
+__doc__ = "Run independent geometry jobs in worker processes."
+
+import os
+import sys
+import multiprocessing
+import multiprocessing.spawn
+import FreeCAD
+import Part
+
+# Worker processes can't run the FreeCAD executable.
+# They are spawned with a python interpreter that can import FreeCAD,
+# and shapes are exchanged as BREP strings.
+# Job functions must be defined at module level in modules
+# that don't import FreeCADGui.
+# Data that is common to all the jobs (like a source shape)
+# is sent once to each worker with the shared argument of map_jobs,
+# and read by the job functions with shared_data().
+
+_shared = None
+
+
+def shape_to_brep(shape):
+    """Serializes a shape to a BREP string"""
+    return shape.exportBrepToString()
+
+
+def brep_to_shape(brep):
+    """Builds a shape from a BREP string"""
+    sh = Part.Shape()
+    sh.importBrepFromString(brep)
+    return sh
+
+
+def python_executable():
+    """Returns a python interpreter able to import FreeCAD, or None"""
+    if os.path.basename(sys.executable).lower().startswith("python"):
+        return sys.executable
+    bindir = os.path.dirname(sys.executable)
+    for name in ("python", "python3", "python.exe"):
+        path = os.path.join(bindir, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def shared_data():
+    """Returns the shared data of the current map_jobs call"""
+    return _shared
+
+
+def _init_worker(paths, shared=None):
+    global _shared
+    for p in paths:
+        if p not in sys.path:
+            sys.path.append(p)
+    _shared = shared
+
+
+def _map_serial(func, jobs, shared):
+    global _shared
+    _shared = shared
+    try:
+        return [func(j) for j in jobs]
+    finally:
+        _shared = None
+
+
+def map_jobs(func, jobs, processes=None, chunksize=1, shared=None):
+    """Calls func on each item of jobs, in worker processes
+    results = map_jobs(func, jobs, processes=None, chunksize=1, shared=None)
+    The results are returned in the order of jobs.
+    processes : number of workers (default: number of cores)
+    shared : data sent once to each worker, available with shared_data()
+    Falls back to serial execution if there is a single job,
+    or if no worker pool can be started."""
+    jobs = list(jobs)
+    if processes is None or processes < 1:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(jobs))
+    exe = python_executable()
+    if processes < 2 or exe is None:
+        return _map_serial(func, jobs, shared)
+    # set_executable is a process wide setting of the spawn context
+    ctx = multiprocessing.get_context("spawn")
+    previous = multiprocessing.spawn.get_executable()
+    try:
+        ctx.set_executable(exe)
+        with ctx.Pool(processes, _init_worker, (list(sys.path), shared)) as pool:
+            return pool.map(func, jobs, chunksize)
+    except (OSError, RuntimeError, multiprocessing.ProcessError) as exc:
+        FreeCAD.Console.PrintWarning("Parallel execution failed ({}). Running serially.\n".format(exc))
+    finally:
+        ctx.set_executable(previous)
+    return _map_serial(func, jobs, shared)
@@ -10,6 +10,8 @@ import FreeCAD
 import FreeCADGui
 import Part
 from freecad.Curves import _utils
+from freecad.Curves import section_pipeline
+from freecad.Curves import draft_mode
 from freecad.Curves import ICONPATH
 
 TOOL_ICON = os.path.join( ICONPATH, 'pipeshell.svg')
@@ -22,6 +24,8 @@ def debug(string):
 
 class pipeShell:
     "PipeShell featurePython object"
+    supports_draft = True
+
     def __init__(self, obj):
         ''' Add the properties '''
         obj.addProperty("App::PropertyLinkSubList","Spine",       "Main", "Sweep path")
@@ -34,6 +38,7 @@ class pipeShell:
         obj.addProperty("App::PropertyInteger",    "MaxDegree",   "Settings",  "Maximum degree of the generated surface").MaxDegree = 5
         obj.addProperty("App::PropertyInteger",    "MaxSegments", "Settings",  "Maximum number of segments of the generated surface").MaxSegments = 999
         obj.addProperty("App::PropertyInteger",    "Samples",     "Settings",  "Number of samples for preview").Samples = 100
+        obj.addProperty("App::PropertyBool",       "DirectLoft",  "Settings",  "Skin the lofted sections directly from their poles, instead of makeLoft").DirectLoft = False
         obj.addProperty("App::PropertyFloat",      "Tol3d",       "Settings",  "Tolerance 3D").Tol3d = 1.0e-4
         obj.addProperty("App::PropertyFloat",      "TolBound",    "Settings",  "Tolerance boundary").TolBound = 1.0e-4
         obj.addProperty("App::PropertyFloat",      "TolAng",      "Settings",  "Tolerance angular").TolAng = 1.0e-2
@@ -196,9 +201,9 @@ class pipeShell:
         ps = Part.BRepOffsetAPI.MakePipeShell(path)
         ps.setMaxDegree(self.getprop(obj, "MaxDegree") or 3)
         ps.setMaxSegments(self.getprop(obj, "MaxSegments") or 32)
-        t3 = self.getprop(obj, "Tol3d") or 1.0e-4
-        tb = self.getprop(obj, "TolBound") or 1.0e-4
-        ta = self.getprop(obj, "TolAng") or 1.0e-2
+        t3 = draft_mode.tolerance(obj, self.getprop(obj, "Tol3d") or 1.0e-4)
+        tb = draft_mode.tolerance(obj, self.getprop(obj, "TolBound") or 1.0e-4)
+        ta = draft_mode.tolerance(obj, self.getprop(obj, "TolAng") or 1.0e-2, 10.0)
         ps.setTolerance(t3, tb, ta)
         
         mode = self.getprop(obj, "Mode")# or "DiscreteTrihedron"
@@ -263,9 +268,9 @@ class pipeShell:
                     ps.makeSolid()
                 obj.Shape = ps.shape()
             else:
-                shapes = ps.simulate(self.getprop(obj, "Samples") or 100)
+                shapes = ps.simulate(draft_mode.samples(obj, self.getprop(obj, "Samples") or 100))
                 if output == "Lofted sections":
-                    obj.Shape = Part.makeLoft(shapes, solid, False, False, self.getprop(obj, "MaxDegree"))
+                    obj.Shape = self.loftSections(obj, shapes, solid)
                 else:
                     rails = self.getRails(shapes)
                     c = Part.Compound(shapes + rails)
@@ -281,22 +286,25 @@ class pipeShell:
         else:
             return(0)
 
-    def getRails(self, shapes):
-        nbvert = len(shapes[0].Vertexes)
-        edges = []
-        for i in range(nbvert):
-            pts = []
-            for s in shapes:
-                pts.append(s.Vertexes[i].Point)
+    def loftSections(self, obj, shapes, solid):
+        if (not solid) and hasattr(obj, "DirectLoft") and obj.DirectLoft:
             try:
-                bs = Part.BSplineCurve()
-                bs.interpolate(pts)
-                edges.append(bs.toShape())
-                debug("Rail %d : BSpline curve"%i)
-            except Part.OCCError:
-                po = Part.makePolygon(pts)
-                edges.append(po)
-                debug("Rail %d : Polygon"%i)
+                degree = min(self.getprop(obj, "MaxDegree") or 3, 3)
+                faces = section_pipeline.skin_sections(shapes, degree)
+                shell = Part.Shell(faces)
+                shell.sewShape()
+                return(shell)
+            except (ValueError, Part.OCCError) as exc:
+                debug("Direct loft failed (%s), using makeLoft"%str(exc))
+        return(Part.makeLoft(shapes, solid, False, False, self.getprop(obj, "MaxDegree")))
+
+    def getRails(self, shapes):
+        try:
+            pts = section_pipeline.section_points(shapes)
+        except ValueError:
+            return([])
+        edges = section_pipeline.fit_rails(pts)
+        debug("%d rails"%len(edges))
         return(edges)
                 
 
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Profile solve"
+__author__ = "Christophe Grellier (Chris_G)"
+__license__ = "LGPL 2.1"
+__doc__ = "Batched projection of the snapped points of a profile, and stretch of its free points."
+
+import numpy as np
+import FreeCAD
+import Part
+from freecad.Curves import nurbs_array
+from freecad.Curves import logger
+
+log = logger.get_logger(__name__)
+
+# Each support shape (vertex, edge or face) gets a SupportIndex :
+# a nearest point index of its tessellation, with the curve or surface
+# parameters of the tessellation points.
+# A snapped point is seeded with the parameters of the closest
+# tessellation point, and refined by Newton iterations on the geometry.
+# If the refinement fails, or leaves the face domain,
+# the exact distToShape is used instead.
+# The indexes are cached, and rebuilt when the support shape changes.
+
+EDGE_SAMPLES = 64
+CACHE_SIZE = 256
+
+_indexes = dict()  # shape key -> SupportIndex
+
+
+def shape_key(shape):
+    """Key of a shape in the index cache"""
+    bb = shape.BoundBox
+    return (shape.hashCode(), shape.ShapeType, bb.XMin, bb.YMin, bb.ZMin, bb.XMax, bb.YMax, bb.ZMax)
+
+
+def support_index(shape):
+    """Returns the cached SupportIndex of shape"""
+    key = shape_key(shape)
+    if key not in _indexes:
+        if len(_indexes) >= CACHE_SIZE:
+            _indexes.clear()
+        _indexes[key] = SupportIndex(shape)
+    return _indexes[key]
+
+
+def clear_cache():
+    _indexes.clear()
+
+
+class SupportIndex(object):
+    """Closest point projection on a vertex, an edge or a face
+    idx = SupportIndex(shape, deflection=None)
+    d, pt = idx.project(point)"""
+    def __init__(self, shape, deflection=None):
+        self.shape = shape
+        self.type = shape.ShapeType
+        self.params = None
+        if deflection is None:
+            deflection = max(shape.BoundBox.DiagonalLength * 0.01, 1e-6)
+        self.tol = deflection * 1e-6
+        if self.type == "Edge":
+            self.params = np.linspace(shape.FirstParameter, shape.LastParameter, EDGE_SAMPLES)
+            pts = [shape.valueAt(u) for u in self.params]
+        elif self.type == "Face":
+            pts = shape.tessellate(deflection)[0]
+            if len(pts) == 0:
+                pts = [shape.valueAt(*shape.Surface.parameter(shape.BoundBox.Center))]
+            self.params = np.array([shape.Surface.parameter(p) for p in pts], dtype=float)
+        else:
+            pts = [v.Point for v in shape.Vertexes]
+        self.points = nurbs_array.to_array(pts)
+        self.index = nurbs_array.PointIndex(self.points)
+
+    def exact(self, point):
+        """Projection of point with distToShape"""
+        d, pts, info = Part.Vertex(point).distToShape(self.shape)
+        return d, pts[0][1]
+
+    def refine_edge(self, point, u):
+        first, last = self.shape.FirstParameter, self.shape.LastParameter
+        for _ in range(20):
+            c = self.shape.valueAt(u)
+            d1 = self.shape.derivative1At(u)
+            d2 = self.shape.derivative2At(u)
+            diff = c - point
+            f = d1.dot(diff)
+            fp = d2.dot(diff) + d1.dot(d1)
+            if fp <= 0:
+                return None
+            step = f / fp
+            u = min(max(u - step, first), last)
+            if abs(step) * d1.Length < self.tol:
+                return self.shape.valueAt(u)
+        return None
+
+    def refine_face(self, point, u, v):
+        surf = self.shape.Surface
+        u0, u1, v0, v1 = self.shape.ParameterRange
+        for _ in range(20):
+            diff = surf.value(u, v) - point
+            su = surf.getDN(u, v, 1, 0)
+            sv = surf.getDN(u, v, 0, 1)
+            suu = surf.getDN(u, v, 2, 0)
+            suv = surf.getDN(u, v, 1, 1)
+            svv = surf.getDN(u, v, 0, 2)
+            jac = np.array([[su.dot(su) + suu.dot(diff), su.dot(sv) + suv.dot(diff)],
+                            [su.dot(sv) + suv.dot(diff), sv.dot(sv) + svv.dot(diff)]])
+            rhs = np.array([su.dot(diff), sv.dot(diff)])
+            try:
+                du, dv = np.linalg.solve(jac, rhs)
+            except np.linalg.LinAlgError:
+                return None
+            u = min(max(u - du, u0), u1)
+            v = min(max(v - dv, v0), v1)
+            if (su * du + sv * dv).Length < self.tol:
+                if not self.shape.isPartOfDomain(u, v):
+                    return None
+                return surf.value(u, v)
+        return None
+
+    def project(self, point, seed=None):
+        """Returns the distance and the closest point of the support to point
+        seed is the index of the closest tessellation point, if already known."""
+        if seed is None:
+            seed = int(self.index.query((point.x, point.y, point.z)))
+        if self.type == "Vertex":
+            p = self.shape.Point
+            return point.distanceToPoint(p), p
+        if self.type not in ("Edge", "Face"):
+            return self.exact(point)
+        try:
+            if self.type == "Edge":
+                res = self.refine_edge(point, float(self.params[seed]))
+            else:
+                res = self.refine_face(point, *self.params[seed])
+        except (AttributeError, Part.OCCError):
+            res = None
+        seed_dist = point.distanceToPoint(FreeCAD.Vector(*self.points[seed]))
+        if res is None or point.distanceToPoint(res) > seed_dist + self.tol:
+            log.debug("{} projection refinement failed", self.type)
+            return self.exact(point)
+        return point.distanceToPoint(res), res
+
+
+def project_points(points, shapes):
+    """Projects points[i] on shapes[i]
+    dists, pts = project_points(points, shapes)
+    The points of the same support are seeded in a single index query."""
+    groups = dict()
+    indexes = []
+    for i, sh in enumerate(shapes):
+        idx = support_index(sh)
+        indexes.append(idx)
+        groups.setdefault(id(idx), []).append(i)
+    dists = np.zeros(len(points))
+    res = [None] * len(points)
+    for members in groups.values():
+        idx = indexes[members[0]]
+        seeds = np.atleast_1d(idx.index.query(nurbs_array.to_array([points[i] for i in members])))
+        for i, s in zip(members, seeds):
+            dists[i], res[i] = idx.project(points[i], int(s))
+    return dists, res
+
+
+def stretch(data, pts, snapped):
+    """Moves the free points of a profile with its snapped points
+    new_pts = stretch(data, pts, snapped)
+    data are the original points, pts the points after projection,
+    snapped the flags of the snapped points.
+    The moves of the snapped points are linearly interpolated
+    over the cumulative lengths of the data polyline, and extrapolated
+    beyond the last snapped point. The first point is always a control point."""
+    data = nurbs_array.to_array(data)
+    res = nurbs_array.to_array(pts)
+    snapped = np.asarray(snapped, dtype=bool)
+    lengths = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(data, axis=0), axis=1))))
+    ctrl = snapped.copy()
+    ctrl[0] = True
+    if ctrl.sum() < 2:
+        return nurbs_array.to_vectors(res)
+    knots = lengths[ctrl]
+    moves = res[ctrl] - data[ctrl]
+    free = ~snapped
+    free[0] = False
+    params = lengths[free]
+    # linear extrapolation on the end segments, like a degree 1 BSpline
+    lo = np.searchsorted(knots, params, side="right") - 1
+    lo = np.clip(lo, 0, len(knots) - 2)
+    span = knots[lo + 1] - knots[lo]
+    span[span == 0] = 1.0
+    t = (params - knots[lo]) / span
+    inside = (params >= knots[0]) & (params <= knots[-1])
+    interp = np.array([np.interp(params, knots, moves[:, k]) for k in range(3)]).T.reshape(-1, 3)
+    extrap = moves[lo] + t[:, np.newaxis] * (moves[lo + 1] - moves[lo])
+    res[free] += np.where(inside[:, np.newaxis], interp, extrap)
+    return nurbs_array.to_vectors(res)
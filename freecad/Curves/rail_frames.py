@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Rail frames"
+__author__ = "Christophe Grellier (Chris_G)"
+__license__ = "LGPL 2.1"
+__doc__ = "Precomputed frame field of a pair of sweep rails."
+
+import numpy as np
+import FreeCAD
+import Part
+from freecad.Curves import nurbs_array
+
+# The frame of rail i at parameter u is the (4, 4) matrix whose columns are :
+# - the binormal : the chord from this rail to the other rail
+# - the tangent : the first derivative of the rail
+# - the normal : the normal of the ruled surface between the rails
+# - the origin : the point of the rail
+# This is the frame of libS2R.birail.matrixAt.
+# Both rails must share the same parameter range, which is the case
+# of the two V-isocurves of a ruled surface.
+
+
+def to_matrix(arr):
+    """Converts a (4, 4) array to a FreeCAD.Matrix"""
+    return FreeCAD.Matrix(*np.asarray(arr, dtype=float).ravel().tolist())
+
+
+class RailFrameField(object):
+    """Frames of two rails, sampled once on a dense parameter grid
+    ff = RailFrameField(rails, ruled=None, samples=200)
+    rails are 2 edges with the same parameter range.
+    ruled is the face between the rails. It only sets the orientation of the normals.
+    The normTan / normBin / normNor attributes select the unit vectors,
+    as in libS2R.birail. The grid is sampled again when they change.
+    ff.grid is the (2, samples, 4, 4) array of the sampled frames."""
+    def __init__(self, rails, ruled=None, samples=200):
+        self.rails = rails
+        self.ruled = ruled
+        self.samples = samples
+        self.first = rails[0].FirstParameter
+        self.last = rails[0].LastParameter
+        self.normTan = False
+        self.normBin = False
+        # Surface normals are always unit vectors, normNor is kept for symmetry with birail
+        self.normNor = True
+        self.evaluators = []
+        for r in rails:
+            if isinstance(r.Curve, Part.BSplineCurve):
+                self.evaluators.append(nurbs_array.CurveEvaluator(r.Curve, 1))
+            else:
+                self.evaluators.append(None)
+        self._signs = None
+        self._grid = None
+        self._policy = None
+
+    def rail_derivatives(self, i, params):
+        """Returns the (2, n, 3) array of the points and first derivatives of rail i"""
+        params = np.asarray(params, dtype=float).ravel()
+        if self.evaluators[i] is not None:
+            return self.evaluators[i].derivatives(params, 1)
+        rail = self.rails[i]
+        pts = nurbs_array.to_array([rail.valueAt(u) for u in params])
+        ders = nurbs_array.to_array([rail.derivative1At(u) for u in params])
+        return np.array([pts, ders])
+
+    def _normal_signs(self):
+        """Orientation of the normals of each rail, compared to the ruled face normal"""
+        if self._signs is not None:
+            return self._signs
+        self._signs = [1.0, 1.0]
+        if self.ruled is None:
+            return self._signs
+        params = np.linspace(self.first, self.last, 9)
+        d0 = self.rail_derivatives(0, params)
+        d1 = self.rail_derivatives(1, params)
+        chord = d1[0] - d0[0]
+        v = self.ruled.ParameterRange[2:]
+        for i, d in enumerate((d0, d1)):
+            cross = np.cross(d[1], chord)
+            k = int(np.argmax(np.linalg.norm(cross, axis=1)))
+            n = self.ruled.normalAt(float(params[k]), v[i]).negative()
+            if np.dot(cross[k], (n.x, n.y, n.z)) < 0:
+                self._signs[i] = -1.0
+        return self._signs
+
+    def frames(self, params, i):
+        """Computes the (n, 4, 4) array of the frames of rail i at params"""
+        params = np.asarray(params, dtype=float).ravel()
+        d0 = self.rail_derivatives(0, params)
+        d1 = self.rail_derivatives(1, params)
+        d = (d0, d1)[i]
+        chord = d1[0] - d0[0]
+        tan = nurbs_array.unit_vectors(d[1]) if self.normTan else d[1]
+        binormal = chord if i == 0 else -chord
+        if self.normBin:
+            binormal = nurbs_array.unit_vectors(binormal)
+        normal = self._normal_signs()[i] * nurbs_array.unit_vectors(np.cross(d[1], chord))
+        res = np.zeros((len(params), 4, 4))
+        res[:, :3, 0] = binormal
+        res[:, :3, 1] = tan
+        res[:, :3, 2] = normal
+        res[:, :3, 3] = d[0]
+        res[:, 3, 3] = 1.0
+        return res
+
+    @property
+    def params(self):
+        return np.linspace(self.first, self.last, self.samples)
+
+    @property
+    def grid(self):
+        policy = (self.normTan, self.normBin)
+        if self._grid is None or not self._policy == policy:
+            params = self.params
+            self._grid = np.array([self.frames(params, 0), self.frames(params, 1)])
+            self._policy = policy
+        return self._grid
+
+    def matrices(self, params, i, interpolate=False, tol=1e-12):
+        """Returns the (n, 4, 4) array of the frames of rail i at params
+        The parameters that are on the grid are looked up.
+        The other ones are recomputed, or, with interpolate,
+        linearly interpolated between the grid frames."""
+        params = np.asarray(params, dtype=float).ravel()
+        grid = self.grid[i]
+        pos = (params - self.first) / (self.last - self.first) * (self.samples - 1)
+        idx = np.clip(np.rint(pos).astype(int), 0, self.samples - 1)
+        on_grid = np.abs(pos - idx) * (self.last - self.first) / (self.samples - 1) <= tol
+        res = np.empty((len(params), 4, 4))
+        res[on_grid] = grid[idx[on_grid]]
+        off = ~on_grid
+        if not off.any():
+            return res
+        if interpolate:
+            lo = np.clip(np.floor(pos[off]).astype(int), 0, self.samples - 2)
+            f = (pos[off] - lo)[:, np.newaxis, np.newaxis]
+            m = (1 - f) * grid[lo] + f * grid[lo + 1]
+            m[:, :3, 2] = nurbs_array.unit_vectors(m[:, :3, 2])
+            if self.normTan:
+                m[:, :3, 1] = nurbs_array.unit_vectors(m[:, :3, 1])
+            if self.normBin:
+                m[:, :3, 0] = nurbs_array.unit_vectors(m[:, :3, 0])
+            res[off] = m
+        else:
+            res[off] = self.frames(params[off], i)
+        return res
+
+    def matrixAt(self, p, i, interpolate=False):
+        """Returns the frame of rail i at parameter p, as a FreeCAD.Matrix"""
+        return to_matrix(self.matrices([p], i, interpolate)[0])
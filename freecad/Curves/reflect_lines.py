@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Reflect lines"
+__author__ = "Christophe Grellier (Chris_G)"
+__license__ = "LGPL 2.1"
+__doc__ = "Reflect lines of a shape for a batch of view directions."
+
+import math
+import zipfile
+import FreeCAD
+import Part
+from freecad.Curves import nurbs_tools
+from freecad.Curves import parallel
+from freecad.Curves import logger
+
+log = logger.get_logger(__name__)
+
+# In batch mode, the source shape is serialized once,
+# and sent once to each worker process, as shared data.
+# The cache file is a zip archive with one BREP entry per view,
+# and a "views.txt" entry that lists the view directions, in the same order.
+
+_source = (None, None)  # (BREP string, shape) of the worker
+
+
+def reflect_lines(shape, view_dir, view_pos, up_dir, clean=False, samples=10, tol=1e-3):
+    """Returns the compound of the reflect lines of shape, or None
+    lines = reflect_lines(shape, view_dir, view_pos, up_dir, clean=False, samples=10, tol=1e-3)
+    With clean, the duplicate and subsegment edges are removed."""
+    up = FreeCAD.Vector(up_dir)
+    if up.cross(view_dir).Length < 1e-7:
+        # up direction can't be parallel to the view direction
+        up = FreeCAD.Vector(1, 0, 0) if abs(view_dir.x) < 0.9 * view_dir.Length else FreeCAD.Vector(0, 1, 0)
+    try:
+        rl = shape.reflectLines(view_dir, view_pos, up)
+    except (AttributeError, Part.OCCError):
+        return None
+    if rl and clean:
+        rl = Part.Compound(nurbs_tools.remove_subsegments_indexed(rl.Edges, num=samples, tol=tol))
+    return rl or None
+
+
+def _source_shape():
+    global _source
+    brep = parallel.shared_data()
+    if _source[0] is not brep:
+        _source = (brep, parallel.brep_to_shape(brep))
+    return _source[1]
+
+
+def _view_job(job):
+    """Worker job : (view dir, view pos, up dir, clean, samples, tol) -> BREP string or None"""
+    vdir, vpos, udir, clean, samples, tol = job
+    rl = reflect_lines(_source_shape(), FreeCAD.Vector(*vdir), FreeCAD.Vector(*vpos), FreeCAD.Vector(*udir),
+                       clean, samples, tol)
+    if rl is None:
+        return None
+    return parallel.shape_to_brep(rl)
+
+
+def batch_reflect_lines(shape, view_dirs, view_pos, up_dir, clean=False, samples=10, tol=1e-3, processes=None):
+    """Returns the list of the reflect lines of shape, for each view direction
+    lines = batch_reflect_lines(shape, view_dirs, view_pos, up_dir, clean=False, samples=10, tol=1e-3, processes=None)
+    The views are computed in worker processes. The items of lines are compounds, or None."""
+    def tup(v):
+        return (v.x, v.y, v.z)
+    jobs = [(tup(d), tup(view_pos), tup(up_dir), clean, samples, tol) for d in view_dirs]
+    results = parallel.map_jobs(_view_job, jobs, processes, shared=parallel.shape_to_brep(shape))
+    lines = [None if r is None else parallel.brep_to_shape(r) for r in results]
+    log.info("Reflect lines of {} views, {} failed", len(lines), lambda: lines.count(None))
+    return lines
+
+
+def turntable(count=36, axis=FreeCAD.Vector(0, 0, 1), elevation=0.0):
+    """Returns count view directions evenly spaced around axis
+    elevation is the angle in degrees of the views above the plane normal to axis."""
+    rot = FreeCAD.Rotation(FreeCAD.Vector(0, 0, 1), axis)
+    el = math.radians(elevation)
+    dirs = []
+    for i in range(count):
+        a = 2 * math.pi * i / count
+        v = FreeCAD.Vector(math.cos(a) * math.cos(el), math.sin(a) * math.cos(el), -math.sin(el))
+        dirs.append(rot.multVec(v))
+    return dirs
+
+
+def write_cache(filename, view_dirs, lines):
+    """Writes the reflect lines of the views to a cache file"""
+    with zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("views.txt", "\n".join("{} {} {}".format(d.x, d.y, d.z) for d in view_dirs))
+        for i, rl in enumerate(lines):
+            if rl is not None:
+                zf.writestr("view_{:03d}.brep".format(i), parallel.shape_to_brep(rl))
+
+
+def read_cache(filename):
+    """Reads a cache file, and returns the list of (view direction, reflect lines or None)"""
+    res = []
+    with zipfile.ZipFile(filename, "r") as zf:
+        names = zf.namelist()
+        text = zf.read("views.txt").decode("utf-8")
+        for i, line in enumerate(text.splitlines()):
+            d = FreeCAD.Vector(*[float(x) for x in line.split()])
+            name = "view_{:03d}.brep".format(i)
+            rl = parallel.brep_to_shape(zf.read(name).decode("utf-8")) if name in names else None
+            res.append((d, rl))
+    return res
@@ -9,10 +9,13 @@ __doc__ = """reparametrize a curve to match another one"""
 #if sys.version_info.major >= 3:
     #from importlib import reload
 
+from bisect import bisect_left
+import numpy as np
 import FreeCAD
 import Part
 
 from freecad.Curves import nurbs_tools
+from freecad.Curves import nurbs_array
 from freecad.Curves import _utils
 from freecad.Curves.BSplineAlgorithms import BSplineAlgorithms
 
@@ -30,6 +33,36 @@ def get_ascending(mylist):
         old2 = p2
     return newlist
 
+def monotone_correspondence(pairs):
+    """Returns the longest subsequence of parameter pairs
+    that is strictly increasing in both parameters, in O(n log n)
+    monotone_pairs = monotone_correspondence([[p1, p2], ...])
+    Pairs are first sorted by p1, so it doesn't depend on the sampling order."""
+    if not pairs:
+        return []
+    # equal p1 values are sorted by decreasing p2, so only one of them can be kept
+    ordered = sorted(pairs, key=lambda pa: (pa[0], -pa[1]))
+    tails = []  # smallest p2 ending an increasing subsequence of each length
+    tail_idx = []
+    prev = [-1] * len(ordered)
+    for i, (p1, p2) in enumerate(ordered):
+        k = bisect_left(tails, p2)
+        if k > 0:
+            prev[i] = tail_idx[k - 1]
+        if k == len(tails):
+            tails.append(p2)
+            tail_idx.append(i)
+        else:
+            tails[k] = p2
+            tail_idx[k] = i
+    res = []
+    i = tail_idx[-1]
+    while i >= 0:
+        res.append(list(ordered[i]))
+        i = prev[i]
+    res.reverse()
+    return res
+
 def normalized_bspline(e1, reverse=False):
     bs = None
     if isinstance(e1, Part.Wire):
@@ -78,6 +111,30 @@ def get_chord_normal_params (e1,e2,n):
             _utils.warn("chord_normal compute error")
     return params
 
+def batch_ortho_params(ev1, ev2, n):
+    """Batched version of get_ortho_params
+    ev1, ev2 are nurbs_array.CurveEvaluator of the 2 curves.
+    Returns the [param1, param2] pairs of n samples of curve 1
+    and their orthogonal foot points on curve 2.
+    Foot points at the ends of curve 2 are discarded."""
+    p = np.linspace(ev1.first, ev1.last, n)
+    q = ev2.closest_parameters(ev1.values(p))
+    tol = 1e-9 * (ev2.last - ev2.first)
+    valid = (q > ev2.first + tol) & (q < ev2.last - tol)
+    return np.column_stack((p[valid], q[valid])).tolist()
+
+def batch_chord_normal_params(ev1, ev2, n):
+    """Batched version of get_chord_normal_params
+    Returns the [param1, param2] pairs of the intersections of the 2 curves
+    with n planes normal to the chord of curve 1."""
+    ends = ev1.values([ev1.first, ev1.last])
+    direction = nurbs_array.unit_vectors(ends[1] - ends[0])
+    origins = ends[0] + np.linspace(0.0, 1.0, n)[:, np.newaxis] * (ends[1] - ends[0])
+    p, found1 = ev1.plane_crossings(origins, direction)
+    q, found2 = ev2.plane_crossings(origins, direction)
+    valid = found1 & found2
+    return np.column_stack((p[valid], q[valid])).tolist()
+
 def stretch_params(par, edge, start=0.3, end=0.3):
     #_utils.info(len(par))
     npar = par[:]
@@ -127,8 +184,8 @@ def get_max_cp(curve, nb_interp):
     max_cp_u = max(min_u, min(max_cp_u + 10, max_u))
     return max_cp_u
 
-def reparametrize(ie1, ie2, num=20, smooth_start=0.2, smooth_end=0.2, method=3):
-    """reparametrize(ie1, ie2, num=20, smooth_start=0.2, smooth_end=0.2, method=0)
+def reparametrize(ie1, ie2, num=20, smooth_start=0.2, smooth_end=0.2, method=3, batched=True, monotone=True):
+    """reparametrize(ie1, ie2, num=20, smooth_start=0.2, smooth_end=0.2, method=3, batched=True, monotone=True)
     Reparametrize Edge ie2 according to Edge ie1.
     - num is the number of samples
     - smooth_start and smooth_end [0., 0.5] is how much the stretching of the end parameters
@@ -138,23 +195,48 @@ def reparametrize(ie1, ie2, num=20, smooth_start=0.2, smooth_end=0.2, method=3):
     2 - Edge 2 projected on Edge 1
     3 - Best of methods 1 and 2 by number of results
     4 - Normal plane of chord line
+    - batched option : compute all the samples at once, with NumPy,
+    on dense polylines of the curves refined by Newton iterations
+    - monotone option : keep the longest monotone subsequence of the samples,
+    instead of dropping every sample that is lower than the previous one
     """
+    if monotone:
+        get_sorted = monotone_correspondence
+    else:
+        get_sorted = get_ascending
     c1 = normalized_bspline(ie1, False)
     c2 = normalized_bspline(ie2, not _utils.same_direction(ie1, ie2, 10))
     e1 = c1.toShape()
     e2 = c2.toShape()
 
-    if method == 1:
+    if batched:
+        ev1 = nurbs_array.CurveEvaluator(c1)
+        ev2 = nurbs_array.CurveEvaluator(c2)
+        if method == 1:
+            params = batch_ortho_params(ev1, ev2, num)
+        elif method == 2:
+            params = [[p[1],p[0]] for p in batch_ortho_params(ev2, ev1, num)]
+        elif method == 3:
+            pa1 = batch_ortho_params(ev1, ev2, num)
+            pa2 = [[p[1],p[0]] for p in batch_ortho_params(ev2, ev1, num)]
+            if len(get_sorted(pa2)) > len(get_sorted(pa1)):
+                params = pa2
+            else:
+                params = pa1
+        else:
+            params = batch_chord_normal_params(ev1, ev2, num)
+        sorted_params = get_sorted(params)
+    elif method == 1:
         params = get_ortho_params(e1, e2, num)
-        sorted_params = get_ascending(params)
+        sorted_params = get_sorted(params)
     elif method == 2:
         params = [[p[1],p[0]] for p in get_ortho_params(e2, e1, num)]
-        sorted_params = get_ascending(params)
+        sorted_params = get_sorted(params)
     elif method == 3:
         pa1 = get_ortho_params(e1, e2, num)
-        so_pa1 = get_ascending(pa1)
+        so_pa1 = get_sorted(pa1)
         pa2 = [[p[1],p[0]] for p in get_ortho_params(e2, e1, num)]
-        so_pa2 = get_ascending(pa2)
+        so_pa2 = get_sorted(pa2)
         if len(so_pa2) > len(so_pa1):
             params = pa2
             sorted_params = so_pa2
@@ -163,7 +245,7 @@ def reparametrize(ie1, ie2, num=20, smooth_start=0.2, smooth_end=0.2, method=3):
             sorted_params = so_pa1
     else: #elif method == 4:
         params = get_chord_normal_params(e1,e2,num)
-        sorted_params = get_ascending(params)
+        sorted_params = get_sorted(params)
     p1 = [s[0] for s in sorted_params]
     p2 = [s[1] for s in sorted_params]
     gp = [1.0*i/(len(p1)-1) for i in range(len(p1))]
@@ -172,8 +254,6 @@ def reparametrize(ie1, ie2, num=20, smooth_start=0.2, smooth_end=0.2, method=3):
 
     np1 = stretch_params(p1, e1, start=smooth_start, end=smooth_end)
     np2 = stretch_params(p2, e2, start=smooth_start, end=smooth_end)
-    sorted_params = list(zip(np1,np2))
-    sorted_params = deviation_filter(sorted_params, 1e-3)
 
     #show_lines(e1, e2, sorted_params, title="second_pass")
 
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Section pipeline"
+__author__ = "Christophe Grellier (Chris_G)"
+__license__ = "LGPL 2.1"
+__doc__ = "Rail fitting and skinning of the simulated sections of a sweep."
+
+import numpy as np
+import Part
+from freecad.Curves import nurbs_array
+from freecad.Curves import logger
+
+log = logger.get_logger(__name__)
+
+# The sections are the shapes returned by MakePipeShell.simulate().
+# They all have the same topology, so their vertices and
+# the poles of their edges can be stacked in arrays, and all the
+# curves along the sweep are interpolated at the same parameters.
+
+
+def section_points(shapes):
+    """Returns the (S, V, 3) array of the V vertices of the S section shapes"""
+    pts = [[(v.X, v.Y, v.Z) for v in s.Vertexes] for s in shapes]
+    if len(set(len(p) for p in pts)) > 1:
+        raise ValueError("Sections have different numbers of vertices")
+    return np.array(pts, dtype=float)
+
+
+def shared_parameters(arr):
+    """Returns the parameters of the S rows of an (S, ...) point array
+    The normalized chord length parameters of all the curves are averaged.
+    Degenerate curves (all points equal) are ignored."""
+    arr = np.asarray(arr, dtype=float)
+    arr = arr.reshape(len(arr), -1, 3)
+    lengths = np.linalg.norm(np.diff(arr, axis=0), axis=2)
+    cum = np.vstack((np.zeros(arr.shape[1]), np.cumsum(lengths, axis=0)))
+    total = cum[-1]
+    valid = total > 1e-12
+    if not valid.any():
+        return np.linspace(0.0, 1.0, len(arr))
+    params = (cum[:, valid] / total[valid]).mean(axis=1)
+    params[0] = 0.0
+    params[-1] = 1.0
+    return params
+
+
+def fit_rails(arr, degree=3, params=None):
+    """Interpolates the rails of an (S, V, 3) section point array
+    edges = fit_rails(arr, degree=3, params=None)
+    All the rails are interpolated at once, at shared parameters.
+    If the interpolation fails, the rails are returned as polygons."""
+    arr = np.asarray(arr, dtype=float)
+    if len(arr) < 2:
+        return []
+    if params is None:
+        params = shared_parameters(arr)
+    try:
+        knot_seq, deg, poles = nurbs_array.interpolate_arrays(params, arr, degree)
+    except np.linalg.LinAlgError:
+        return [Part.makePolygon(nurbs_array.to_vectors(arr[:, i])) for i in range(arr.shape[1])]
+    knots, mults = nurbs_array.knots_mults(knot_seq)
+    edges = []
+    for i in range(arr.shape[1]):
+        bs = Part.BSplineCurve()
+        bs.buildFromPolesMultsKnots(nurbs_array.to_vectors(poles[:, i]), mults, knots, False, deg)
+        edges.append(bs.toShape())
+    return edges
+
+
+def section_curves(shape):
+    """Returns the non-periodic BSpline curves of the edges of a section shape"""
+    curves = []
+    for e in shape.Edges:
+        c = e.Curve.toBSpline(e.FirstParameter, e.LastParameter)
+        if c.isPeriodic():
+            c.setNotPeriodic()
+        curves.append(c)
+    return curves
+
+
+def _same_structure(curves, tol=1e-9):
+    c0 = curves[0]
+    k0 = np.array(c0.getKnots())
+    for c in curves[1:]:
+        if not (c.Degree == c0.Degree and c.NbPoles == c0.NbPoles):
+            return False
+        if not c.getMultiplicities() == c0.getMultiplicities():
+            return False
+        if not np.allclose(np.array(c.getKnots()), k0, atol=tol):
+            return False
+    return True
+
+
+def skin_sections(shapes, degree=3, params=None):
+    """Builds the skinning surfaces of the section shapes from their pole arrays
+    faces = skin_sections(shapes, degree=3, params=None)
+    The edges of same index of all the sections must have the same knots and degree,
+    which is the case of simulated sections. Returns one face per section edge.
+    The U direction of the surfaces follows the sweep. All the surfaces use the same
+    parameters, so that adjacent faces have coincident boundaries.
+    The faces don't share their edges : they must be sewn to make a shell.
+    Raises ValueError on incompatible sections, or if the interpolation fails."""
+    sections = [section_curves(s) for s in shapes]
+    if len(set(len(c) for c in sections)) > 1:
+        raise ValueError("Sections have different numbers of edges")
+    if params is None:
+        params = shared_parameters(section_points(shapes))
+    faces = []
+    for curves in zip(*sections):
+        if not _same_structure(curves):
+            raise ValueError("Section curves are not compatible")
+        poles = np.array([nurbs_array.to_array(c.getPoles()) for c in curves])
+        weights = np.array([c.getWeights() for c in curves], dtype=float)
+        hpoles = np.concatenate((poles * weights[:, :, np.newaxis], weights[:, :, np.newaxis]), axis=2)
+        try:
+            knot_seq, udeg, hres = nurbs_array.interpolate_arrays(params, hpoles, degree)
+        except np.linalg.LinAlgError:
+            raise ValueError("Singular skinning interpolation")
+        w = hres[:, :, 3]
+        if (w <= 0).any():
+            raise ValueError("Skinning produced negative weights")
+        pts = hres[:, :, :3] / w[:, :, np.newaxis]
+        uknots, umults = nurbs_array.knots_mults(knot_seq)
+        c0 = curves[0]
+        surf = Part.BSplineSurface()
+        surf.buildFromPolesMultsKnots([nurbs_array.to_vectors(row) for row in pts],
+                                      umults, c0.getMultiplicities(), uknots, c0.getKnots(),
+                                      False, False, udeg, c0.Degree, w.tolist())
+        faces.append(surf.toShape())
+    log.debug("{} sections skinned in {} faces", len(shapes), len(faces))
+    return faces
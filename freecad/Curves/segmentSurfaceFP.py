@@ -12,6 +12,8 @@ import FreeCADGui
 import Part
 from freecad.Curves import _utils
 from freecad.Curves import ICONPATH
+from freecad.Curves import surface_segments
+from freecad.Curves import fingerprint
 from freecad.Curves.nurbs_tools import knotSeqScale
 
 TOOL_ICON = os.path.join(ICONPATH, 'segment_surface.svg')
@@ -80,6 +82,7 @@ class SegmentSurface:
         obj.addProperty("App::PropertyFloatList", "KnotsV", "OptionCustom", "Splitting parameters in V direction")
         obj.addProperty("App::PropertyLink", "KnotsUProvider", "OptionCustom", "Object generating normalized parameters in U direction")
         obj.addProperty("App::PropertyLink", "KnotsVProvider", "OptionCustom", "Object generating normalized parameters in V direction")
+        obj.addProperty("App::PropertyBool", "Compound", "Base", "Output a compound of faces, without building a shell").Compound = False
         obj.Proxy = self
         obj.Option = "Auto"
 
@@ -87,7 +90,7 @@ class SegmentSurface:
         ml = list(set(mults))
         ml.sort()
         if len(ml) == 1:
-            return mults
+            return knots
         target = ml[-2]
         cutknots = list()
         for i, m in enumerate(mults):
@@ -104,10 +107,10 @@ class SegmentSurface:
         params = lnk.getPropertyByName('NormalizedParameters')
         return params
 
+    @fingerprint.cached_execute(link_props=("NormalizedParameters",))
     def execute(self, obj):
         f = _utils.getShape(obj, "Source", "Face")
         bs = f.toNurbs().Faces[0].Surface
-        surfs = list()
         u0, u1, v0, v1 = bs.bounds()
         cutKnotsU = [u0, u1]
         cutKnotsV = [v0, v1]
@@ -141,12 +144,12 @@ class SegmentSurface:
             cutKnotsV = list(set(cutKnotsV))
             cutKnotsU.sort()
             cutKnotsV.sort()
-        for i in range(len(cutKnotsU) - 1):
-            for j in range(len(cutKnotsV) - 1):
-                s = bs.copy()
-                s.segment(cutKnotsU[i], cutKnotsU[i + 1], cutKnotsV[j], cutKnotsV[j + 1])
-                surfs.append(s)
-        obj.Shape = Part.Shell([s.toShape() for s in surfs])
+        surfs = surface_segments.segment_surface(bs, cutKnotsU, cutKnotsV)
+        faces = [s.toShape() for s in surfs]
+        if hasattr(obj, "Compound") and obj.Compound:
+            obj.Shape = Part.Compound(faces)
+        else:
+            obj.Shape = Part.Shell(faces)
 
     def setOption(self, obj, prop):
         for p in obj.PropertiesList:
@@ -14,6 +14,7 @@ import FreeCAD
 import FreeCADGui
 import Part
 from freecad.Curves import _utils
+from freecad.Curves import fingerprint
 from freecad.Curves import ICONPATH
 from freecad.Curves.nurbs_tools import knotSeqNormalize
 
@@ -102,15 +103,10 @@ class split:
         return parameters
 
     def onChanged(self, fp, prop):
-        e = None
-        if hasattr(fp, "Source") and fp.Source:
-            e, w = self.getShape(fp)
-        if not e:
-            return
         if prop in ["Source", "Values", "Distance", "CuttingObjects"]:
             debug("Split : {} changed".format(prop))
-            self.execute(fp)
 
+    @fingerprint.cached_execute(outputs=("NormalizedParameters",))
     def execute(self, obj):
         e, w = self.getShape(obj)
         if not isinstance(e, Part.Edge):
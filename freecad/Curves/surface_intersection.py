@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Surface intersection"
+__author__ = "Christophe Grellier (Chris_G)"
+__license__ = "LGPL 2.1"
+__doc__ = "Intersection of the faces of two extrusions, with pair pruning and clipping."
+
+import numpy as np
+import FreeCAD
+import Part
+from freecad.Curves import parallel
+
+# The faces are extrusions of edges along known directions.
+# Their surfaces are intersected untrimmed (infinite along the extrusion direction).
+# A point of the intersection of the extrusions of edges e1 (along d1)
+# and e2 (along d2) has the same projection on n = d1 ^ d2 as a point of e1
+# and as a point of e2. So the face pairs whose projections on n don't overlap
+# have no intersection.
+
+
+def projected_intervals(faces, normal):
+    """Returns the (n, 2) array of the bounding box intervals of the faces, projected on normal"""
+    res = np.empty((len(faces), 2))
+    n = np.array([normal.x, normal.y, normal.z])
+    for i, f in enumerate(faces):
+        bb = f.BoundBox
+        corners = np.array([(x, y, z) for x in (bb.XMin, bb.XMax) for y in (bb.YMin, bb.YMax) for z in (bb.ZMin, bb.ZMax)])
+        proj = corners.dot(n)
+        res[i] = proj.min(), proj.max()
+    return res
+
+
+def face_pairs(faces1, faces2, dir1, dir2, tol=1e-7):
+    """Returns the list of the (i, j) index pairs of the faces that may intersect
+    faces1 are extruded along dir1, faces2 along dir2.
+    If the directions are parallel, all the pairs are returned."""
+    normal = dir1.cross(dir2)
+    if normal.Length < 1e-9:
+        return [(i, j) for i in range(len(faces1)) for j in range(len(faces2))]
+    normal.normalize()
+    iv1 = projected_intervals(faces1, normal)
+    iv2 = projected_intervals(faces2, normal)
+    overlap = (iv1[:, np.newaxis, 0] <= iv2[np.newaxis, :, 1] + tol) & (iv2[np.newaxis, :, 0] <= iv1[:, np.newaxis, 1] + tol)
+    return [(int(i), int(j)) for i, j in zip(*np.nonzero(overlap))]
+
+
+def inside_domains(pt, faces, tol=1e-7):
+    """Checks that the projection of pt on the face surfaces is in their U parameter range,
+    which is the parameter range of the extruded edge."""
+    for f in faces:
+        u, v = f.Surface.parameter(pt)
+        u0, u1 = f.ParameterRange[:2]
+        if u < u0 - tol or u > u1 + tol:
+            return False
+    return True
+
+
+def clip_curve(curve, faces, samples=50, tol=1e-7):
+    """Returns the list of the edges of the parts of curve that are inside the U domains of the faces.
+    Curves with infinite bounds are returned untrimmed."""
+    first = curve.FirstParameter
+    last = curve.LastParameter
+    if abs(first) > 1e50 or abs(last) > 1e50:
+        return [curve.toShape()]
+    params = np.linspace(first, last, samples)
+    inside = [inside_domains(curve.value(t), faces, tol) for t in params]
+    if all(inside):
+        return [curve.toShape()]
+
+    def boundary(t_in, t_out):
+        "Bisection of the domain boundary between an inside and an outside parameter"
+        for _ in range(30):
+            mid = 0.5 * (t_in + t_out)
+            if inside_domains(curve.value(mid), faces, tol):
+                t_in = mid
+            else:
+                t_out = mid
+        return t_in
+
+    edges = []
+    start = first if inside[0] else None
+    for k in range(1, samples):
+        if inside[k] and not inside[k - 1]:
+            start = boundary(params[k], params[k - 1])
+        elif inside[k - 1] and not inside[k]:
+            end = boundary(params[k - 1], params[k])
+            if end - start > tol:
+                edges.append(curve.toShape(start, end))
+            start = None
+    if start is not None and last - start > tol:
+        edges.append(curve.toShape(start, last))
+    return edges
+
+
+def intersect_faces(f1, f2, clip=True):
+    """Returns the intersection edges of the surfaces of faces f1 and f2
+    With clip, the edges are restricted to the U domains of both faces."""
+    edges = []
+    for c in f1.Surface.intersectSS(f2.Surface):
+        if clip:
+            edges.extend(clip_curve(c, [f1, f2]))
+        else:
+            edges.append(c.toShape())
+    return [e for e in edges if isinstance(e, Part.Edge) and e.Length > 1e-7]
+
+
+def _intersect_job(job):
+    """Worker job : (face BREP string, face BREP string, clip) -> list of edge BREP strings"""
+    brep1, brep2, clip = job
+    f1 = parallel.brep_to_shape(brep1).Faces[0]
+    f2 = parallel.brep_to_shape(brep2).Faces[0]
+    return [parallel.shape_to_brep(e) for e in intersect_faces(f1, f2, clip)]
+
+
+def intersect_extrusions(faces1, faces2, dir1, dir2, clip=True, parallel_mode=False, processes=None):
+    """Returns the intersection edges of the faces of two extrusions
+    edges = intersect_extrusions(faces1, faces2, dir1, dir2, clip=True, parallel_mode=False, processes=None)
+    The face pairs that can't intersect are skipped.
+    With parallel_mode, the surface intersections run in worker processes."""
+    pairs = face_pairs(faces1, faces2, dir1, dir2)
+    FreeCAD.Console.PrintLog("Surface intersection : {} / {} face pairs\n".format(len(pairs), len(faces1) * len(faces2)))
+    edges = []
+    if parallel_mode:
+        breps1 = [parallel.shape_to_brep(f) for f in faces1]
+        breps2 = [parallel.shape_to_brep(f) for f in faces2]
+        jobs = [(breps1[i], breps2[j], clip) for i, j in pairs]
+        for res in parallel.map_jobs(_intersect_job, jobs, processes):
+            edges.extend([parallel.brep_to_shape(b).Edges[0] for b in res])
+    else:
+        for i, j in pairs:
+            edges.extend(intersect_faces(faces1[i], faces2[j], clip))
+    return edges
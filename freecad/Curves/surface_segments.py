@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Surface segments"
+__author__ = "Christophe Grellier (Chris_G)"
+__license__ = "LGPL 2.1"
+__doc__ = "Bulk segmentation of a BSpline surface on isocurves."
+
+import numpy as np
+import FreeCAD
+import Part
+
+
+def _cut_indices(cuts, knots, mults):
+    """Returns the indices of the cut knots in the distinct knots,
+    and the index of the pole row interpolated at each cut knot.
+    The interior cut knots must have a multiplicity of degree."""
+    knots = np.asarray(knots)
+    cum = np.concatenate(([0], np.cumsum(mults)))
+    idx = [int(np.argmin(np.abs(knots - c))) for c in cuts]
+    rows = [0 if k == 0 else int(cum[k] - 1) for k in idx]
+    return idx, rows
+
+
+def _patch_mults(mults, k0, k1, degree):
+    "Clamped multiplicities of the knots k0..k1"
+    m = list(mults[k0:k1 + 1])
+    m[0] = m[-1] = degree + 1
+    return m
+
+
+def segment_surface(bs, ucuts, vcuts, tol=1e-10):
+    """Splits a BSpline surface at the given U and V parameters
+    surfs = segment_surface(bs, ucuts, vcuts, tol=1e-10)
+    ucuts and vcuts are the sorted cut parameters, including the bounds of the patches.
+    All the cut knots are inserted once, on a single copy of the surface,
+    and the poles of each patch are sliced out of the refined pole array.
+    surfs is the list of the patches, V index varying fastest,
+    in the same order as successive calls to bs.segment()."""
+    s = bs.copy()
+    if s.isUPeriodic():
+        s.setUNotPeriodic()
+    if s.isVPeriodic():
+        s.setVNotPeriodic()
+    udeg = s.UDegree
+    vdeg = s.VDegree
+    inner_u = list(ucuts[1:-1])
+    inner_v = list(vcuts[1:-1])
+    if inner_u:
+        s.insertUKnots(inner_u, [udeg] * len(inner_u), tol, False)
+    if inner_v:
+        s.insertVKnots(inner_v, [vdeg] * len(inner_v), tol, False)
+    uknots = s.getUKnots()
+    vknots = s.getVKnots()
+    umults = s.getUMultiplicities()
+    vmults = s.getVMultiplicities()
+    poles = np.array([[(p.x, p.y, p.z) for p in row] for row in s.getPoles()], dtype=float)
+    weights = np.array(s.getWeights(), dtype=float)
+    uidx, urows = _cut_indices(ucuts, uknots, umults)
+    vidx, vrows = _cut_indices(vcuts, vknots, vmults)
+    surfs = list()
+    for i in range(len(ucuts) - 1):
+        um = _patch_mults(umults, uidx[i], uidx[i + 1], udeg)
+        uk = uknots[uidx[i]:uidx[i + 1] + 1]
+        us = slice(urows[i], urows[i + 1] + 1)
+        for j in range(len(vcuts) - 1):
+            vm = _patch_mults(vmults, vidx[j], vidx[j + 1], vdeg)
+            vk = vknots[vidx[j]:vidx[j + 1] + 1]
+            vs = slice(vrows[j], vrows[j + 1] + 1)
+            pts = [[FreeCAD.Vector(*p) for p in row] for row in poles[us, vs].tolist()]
+            patch = Part.BSplineSurface()
+            patch.buildFromPolesMultsKnots(pts, um, vm, uk, vk, False, False, udeg, vdeg, weights[us, vs].tolist())
+            surfs.append(patch)
+    return surfs
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Zebra texture"
+__author__ = "Christophe Grellier (Chris_G)"
+__license__ = "LGPL 2.1"
+__doc__ = "Zebra stripes environment texture and isophote display for surface inspection."
+
+from math import pi
+import numpy as np
+import FreeCAD
+import FreeCADGui
+from pivy import coin
+
+TEX_HEIGHT = 100
+WHITE_WIDTH = 50
+
+_stripe_cache = dict()
+
+
+def stripe_image(width, scale):
+    """Returns the (size, bytes) luminance image of the zebra stripes
+    size, data = stripe_image(width, scale)
+    width : width of the black stripes, in pixels
+    scale : number of stripe periods in the texture
+    Images are cached by (width, scale) key."""
+    key = (int(width), int(scale))
+    if key not in _stripe_cache:
+        row = np.zeros(WHITE_WIDTH + key[0], dtype=np.uint8)
+        row[:WHITE_WIDTH] = 255
+        img = np.tile(row, (TEX_HEIGHT, key[1]))
+        _stripe_cache[key] = ((img.shape[1], img.shape[0]), img.tobytes())
+    return _stripe_cache[key]
+
+
+def document_views(gui_doc):
+    """Returns the list of 3D views of a Gui document"""
+    try:
+        return gui_doc.mdiViewsOfType("Gui::View3DInventor")
+    except AttributeError:  # FC 0.18
+        return [gui_doc.ActiveView]
+
+
+class ZebraTexture(object):
+    """Environment mapped stripes texture.
+    The same coin nodes are shared by the scene graphs of all the 3D views
+    of the document, so a texture update is applied to every view at once."""
+    def __init__(self, width=25, scale=10):
+        self.width = None
+        self.scale = scale
+        self.stripes = coin.SoTexture2()
+        self.stripes.filename = ""
+        self.transform = coin.SoTexture2Transform()
+        self.coords = coin.SoTextureCoordinateEnvironment()
+        self.nodes = (self.coords, self.transform, self.stripes)
+        self.scene_graphs = []
+        self.set_width(width)
+
+    def set_width(self, width):
+        """Updates the stripe image in place"""
+        if width == self.width:
+            return
+        self.width = width
+        size, data = stripe_image(width, self.scale)
+        self.stripes.image.setValue(coin.SbVec2s(*size), 1, data)
+
+    def set_scale(self, scale):
+        self.transform.scaleFactor.setValue(scale, scale)
+
+    def set_rotation(self, angle):
+        self.transform.rotation.setValue(angle)
+
+    def attach(self, gui_doc=None):
+        """Inserts the texture nodes in all the 3D views of gui_doc"""
+        if gui_doc is None:
+            gui_doc = FreeCADGui.ActiveDocument
+        for view in document_views(gui_doc):
+            sg = view.getSceneGraph()
+            if sg.findChild(self.stripes) >= 0:
+                continue
+            for node in self.nodes:
+                sg.insertChild(node, 0)
+            self.scene_graphs.append(sg)
+
+    def detach(self):
+        """Removes the texture nodes from all the scene graphs"""
+        for sg in self.scene_graphs:
+            for node in self.nodes:
+                if sg.findChild(node) >= 0:
+                    sg.removeChild(node)
+        self.scene_graphs = []
+
+
+def vertex_normals(points, triangles):
+    """Returns the unit vertex normals of a triangle mesh,
+    as the area weighted average of the adjacent face normals
+    normals = vertex_normals(points, triangles)
+    points : (n, 3) array
+    triangles : (m, 3) int array"""
+    p0 = points[triangles[:, 0]]
+    face_normals = np.cross(points[triangles[:, 1]] - p0, points[triangles[:, 2]] - p0)
+    normals = np.zeros_like(points)
+    for i in range(3):
+        np.add.at(normals, triangles[:, i], face_normals)
+    length = np.linalg.norm(normals, axis=1)
+    length[length == 0] = 1.0
+    return normals / length[:, np.newaxis]
+
+
+def isophote_colors(normals, direction, bands=10, ratio=0.5):
+    """Returns the (n, 3) black and white vertex colors of isophote stripes
+    The angle between the normals and direction is split in 'bands' intervals,
+    ratio is the white fraction of each interval."""
+    d = np.array(direction, dtype=float)
+    d /= np.linalg.norm(d)
+    angles = np.arccos(np.clip(normals.dot(d), -1.0, 1.0))
+    t = (angles * bands / pi) % 1.0
+    colors = np.zeros((len(normals), 3))
+    colors[t < ratio] = 1.0
+    return colors
+
+
+class IsophoteMesh(object):
+    """Shader-free isophote display of a shape.
+    The shape is tessellated once and its vertex normals are cached,
+    so a change of direction or stripes only updates the vertex colors."""
+    def __init__(self, shape, deviation=0.05):
+        pts, tris = shape.tessellate(deviation)
+        self.points = np.array([(p.x, p.y, p.z) for p in pts], dtype=float).reshape(-1, 3)
+        self.triangles = np.array(tris, dtype=np.int32).reshape(-1, 3)
+        self.normals = vertex_normals(self.points, self.triangles)
+        self.root = coin.SoSeparator()
+        light = coin.SoLightModel()
+        light.model = coin.SoLightModel.BASE_COLOR
+        offset = coin.SoPolygonOffset()
+        offset.factor = -1.0
+        offset.units = -1.0
+        self.material = coin.SoMaterial()
+        binding = coin.SoMaterialBinding()
+        binding.value = coin.SoMaterialBinding.PER_VERTEX_INDEXED
+        coords = coin.SoCoordinate3()
+        coords.point.setValues(0, len(self.points), self.points.tolist())
+        faces = coin.SoIndexedFaceSet()
+        index = np.full((len(self.triangles), 4), -1, dtype=np.int32)
+        index[:, :3] = self.triangles
+        faces.coordIndex.setValues(0, index.size, index.reshape(-1).tolist())
+        for node in (light, offset, self.material, binding, coords, faces):
+            self.root.addChild(node)
+
+    def update(self, direction, bands=10, ratio=0.5):
+        colors = isophote_colors(self.normals, direction, bands, ratio)
+        self.material.diffuseColor.setValues(0, len(colors), colors.tolist())
+
+
+class IsophoteDisplay(object):
+    """Isophote stripes of the visible shapes of a document, in all its 3D views"""
+    def __init__(self, gui_doc=None, deviation=0.05):
+        if gui_doc is None:
+            gui_doc = FreeCADGui.ActiveDocument
+        self.gui_doc = gui_doc
+        self.deviation = deviation
+        self.meshes = dict()
+        self.root = coin.SoSeparator()
+        self.scene_graphs = []
+        self.bands = 10
+        self.ratio = 0.5
+        self.direction = FreeCAD.Vector(0, 0, 1)
+
+    def build(self):
+        """Tessellates the visible shapes that are not in cache"""
+        self.root.removeAllChildren()
+        meshes = dict()
+        for obj in self.gui_doc.Document.Objects:
+            if not (hasattr(obj, "Shape") and obj.Shape.Faces):
+                continue
+            if not obj.ViewObject.Visibility:
+                continue
+            key = (obj.Name, obj.Shape.hashCode())
+            if key in self.meshes:
+                meshes[key] = self.meshes[key]
+            else:
+                meshes[key] = IsophoteMesh(obj.Shape, self.deviation)
+            self.root.addChild(meshes[key].root)
+        self.meshes = meshes
+        self.update()
+
+    def view_direction(self):
+        """Sets the light direction from the camera of the active view"""
+        rot = self.gui_doc.ActiveView.getCameraOrientation()
+        self.direction = rot.multVec(FreeCAD.Vector(0, 0, 1))
+        self.update()
+
+    def update(self):
+        d = (self.direction.x, self.direction.y, self.direction.z)
+        for mesh in self.meshes.values():
+            mesh.update(d, self.bands, self.ratio)
+
+    def attach(self):
+        self.build()
+        for view in document_views(self.gui_doc):
+            sg = view.getSceneGraph()
+            if sg.findChild(self.root) < 0:
+                sg.addChild(self.root)
+                self.scene_graphs.append(sg)
+
+    def detach(self):
+        for sg in self.scene_graphs:
+            if sg.findChild(self.root) >= 0:
+                sg.removeChild(self.root)
+        self.scene_graphs = []